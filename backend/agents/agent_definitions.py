@@ -7,14 +7,22 @@ Defines the 5 CrewAI agents for the feedback processing pipeline.
 import os
 from crewai import Agent
 from langchain_openai import ChatOpenAI
-from backend.tools import postgres_tool, slack_tool
+from backend.tools import postgres_tool, slack_tool, risk_tool
+from backend.metrics import llm_metrics_callback
+from backend.llm_transport import llm_client_kwargs
 
-# Initialize LLM
+# Initialize LLM (calls, latency and tokens are recorded in backend.metrics;
+# LLM_TRANSPORT_MODE=record/replay routes calls through a local cassette)
 llm = ChatOpenAI(
     model=os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
-    temperature=0.3
+    temperature=0.3,
+    callbacks=[llm_metrics_callback],
+    **llm_client_kwargs()
 )
 
+# Number of items carried through prioritization, risk and delivery
+TOP_ITEMS_COUNT = int(os.getenv("TOP_ITEMS_COUNT", "3"))
+
 
 def create_ingestor_agent() -> Agent:
     """
@@ -83,12 +91,12 @@ def create_prioritizer_agent() -> Agent:
     """
     Agent 3: PrioritizerAgent
     Role: Strategic Product Manager
-    Task: Select top 3 items and generate action plans.
+    Task: Select top N items and generate action plans.
     """
     return Agent(
         role="Strategic Product Manager",
         goal=(
-            "Retrieve the top 3 highest-scored feedback items from the "
+            f"Retrieve the top {TOP_ITEMS_COUNT} highest-scored feedback items from the "
             "database and create comprehensive, actionable plans for each. "
             "Generate a structured JSON action plan that includes: "
             "title, team assignment, immediate actions, and success metrics. "
@@ -116,12 +124,12 @@ def create_retention_critic_agent() -> Agent:
     """
     Agent 4: RetentionCriticAgent (Pre-Mortem Financial Risk Assessor)
     Role: 90-Day Financial Risk Assessor
-    Task: Run pre-mortem analysis on top 3 items for financial impact.
+    Task: Run pre-mortem analysis on top N items for financial impact.
     """
     return Agent(
         role="90-Day Financial Risk Assessor",
         goal=(
-            "Conduct a rigorous pre-mortem analysis on the top 3 prioritized "
+            f"Conduct a rigorous pre-mortem analysis on the top {TOP_ITEMS_COUNT} prioritized "
             "feedback items. For each item, assess: What happens if we IGNORE "
             "this for 90 days? Calculate estimated financial cost including:\n"
             "- Customer churn risk (% and $ ARR loss)\n"
@@ -143,7 +151,7 @@ def create_retention_critic_agent() -> Agent:
             "financial reasoning. Your forecasts have historically been "
             "accurate within 10% of actual outcomes."
         ),
-        tools=[],  # No tools needed - pure analytical agent
+        tools=[risk_tool],  # Fans out one concurrent LLM call per item
         verbose=True,
         allow_delegation=False,
         llm=llm,
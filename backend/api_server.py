@@ -3,17 +3,114 @@ FastAPI server for SURF feedback prioritization system.
 Provides REST API endpoints for the frontend dashboard.
 """
 import os
-from typing import List, Dict, Any
+import sys
+import html
+import json
+import time
+import base64
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import psycopg
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from psycopg_pool import AsyncConnectionPool
 from dotenv import load_dotenv
 
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.metrics import metrics, pool_collector
+from backend.events import EventBroadcaster, events_collector
+from backend.db_connection import EVENTS_CHANNEL
+from backend.ingest import (
+    FeedbackValidationError, GroupCommitWriter, IngestQueueFull, IngestUnavailable,
+    ingest_collector, iter_ndjson_lines, parse_ndjson_line, validate_feedback,
+)
+
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="SURF Feedback API", version="1.0.0")
+# Database configuration
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "5432")),
+    "dbname": os.getenv("DB_NAME", "surf_feedback_db"),
+    "user": os.getenv("DB_USER", "surf_user"),
+    "password": os.getenv("DB_PASSWORD", "surf_password_2024"),
+    # Naive TIMESTAMP columns hold UTC (see db_connection.get_db_config)
+    "options": "-c timezone=UTC",
+}
+
+# Connection pool limits (per server process)
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# /api/priorities page sizes
+PRIORITIES_DEFAULT_LIMIT = int(os.getenv("PRIORITIES_PAGE_SIZE", "100"))
+PRIORITIES_MAX_LIMIT = int(os.getenv("PRIORITIES_MAX_PAGE_SIZE", "500"))
+
+# /api/feedback/bulk: rows per COPY chunk, and rejected rows tolerated
+# with on_error=skip before the import is aborted
+BULK_CHUNK_ROWS = int(os.getenv("BULK_INGEST_CHUNK_ROWS", "5000"))
+BULK_MAX_ERRORS = int(os.getenv("BULK_INGEST_MAX_ERRORS", "1000"))
+
+# /api/search page sizes; the text search configuration must match the one
+# raw_feedback.search_vector is generated with (db/init_schema.sql)
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+# Matches ranked per query (the newest ones); ranking reads every candidate's
+# tsvector, so this bounds the cost of very common terms
+SEARCH_MAX_RANKED = int(os.getenv("SEARCH_MAX_RANKED", "5000"))
+SEARCH_CONFIG = "english"
+
+# ts_headline markers, swapped for <mark> after the snippet is HTML-escaped
+_HIGHLIGHT_START, _HIGHLIGHT_STOP = "\x02", "\x03"
+
+# Sort key of items without a priority rank (after every ranked item)
+UNRANKED = 2147483647
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared connection pool, event listener and feedback writer for the lifetime of the server."""
+    pool = AsyncConnectionPool(
+        kwargs=DB_CONFIG,
+        min_size=POOL_MIN_SIZE,
+        max_size=max(POOL_MIN_SIZE, POOL_MAX_SIZE),
+        timeout=POOL_TIMEOUT,
+        max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+        check=AsyncConnectionPool.check_connection,
+        name="surf-api",
+        open=False
+    )
+    # Don't block startup on the database; requests wait up to POOL_TIMEOUT
+    await pool.open(wait=False)
+    app.state.db_pool = pool
+    # One LISTEN connection per process, shared by every SSE client
+    broadcaster = EventBroadcaster(DB_CONFIG)
+    broadcaster.start()
+    app.state.events = broadcaster
+    # Group-commits POST /api/feedback items
+    writer = GroupCommitWriter(lambda: getattr(app.state, "db_pool", None))
+    writer.start()
+    app.state.ingest = writer
+    try:
+        yield
+    finally:
+        await writer.stop()
+        app.state.ingest = None
+        app.state.events = None
+        await broadcaster.stop()
+        app.state.db_pool = None
+        await pool.close()
+
+
+app = FastAPI(title="SURF Feedback API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS for frontend
 app.add_middleware(
@@ -24,23 +121,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database configuration
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "port": int(os.getenv("DB_PORT", "5432")),
-    "dbname": os.getenv("DB_NAME", "surf_feedback_db"),
-    "user": os.getenv("DB_USER", "surf_user"),
-    "password": os.getenv("DB_PASSWORD", "surf_password_2024"),
-}
+metrics.register_collector(pool_collector("api", lambda: getattr(app.state, "db_pool", None)))
+metrics.register_collector(events_collector(lambda: getattr(app.state, "events", None)))
+metrics.register_collector(ingest_collector(lambda: getattr(app.state, "ingest", None)))
 
 
-def get_db_connection():
-    """Create database connection."""
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time every request by route template, method and status."""
+    started = time.perf_counter()
+    status = 500
     try:
-        conn = psycopg.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.observe(
+            "surf_http_request_duration_seconds",
+            time.perf_counter() - started,
+            path=getattr(route, "path", "unmatched"),
+            method=request.method,
+            status=status
+        )
+
+
+def get_db_pool(request: Request) -> AsyncConnectionPool:
+    """Return the shared connection pool opened by the lifespan hook."""
+    pool = getattr(request.app.state, "db_pool", None)
+    if pool is None:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+    return pool
 
 
 @app.get("/")
@@ -54,42 +165,106 @@ async def root():
     }
 
 
+def encode_cursor(rank_key: int, score: float, item_id: int) -> str:
+    """Opaque keyset cursor for the position after an item."""
+    raw = json.dumps([rank_key, score, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, float, int]:
+    """Decode a cursor from encode_cursor()."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank_key, score, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(rank_key), float(score), int(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+async def get_data_version(conn, table_name: str) -> int:
+    """Change counter of a table, bumped by the bump_data_version trigger."""
+    cursor = await conn.execute(
+        "SELECT version FROM data_versions WHERE table_name = %s", (table_name,)
+    )
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
 @app.get("/api/priorities")
-async def get_priorities() -> Dict[str, Any]:
+async def get_priorities(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(PRIORITIES_DEFAULT_LIMIT, ge=1, le=PRIORITIES_MAX_LIMIT),
+    include_raw_text: bool = Query(True, description="Include the original feedback text")
+) -> Dict[str, Any]:
     """
     Get prioritized feedback from the database.
-    
+
+    Pages are ordered by priority rank, then score (descending), then id, and
+    continue from `cursor`. Responses carry an ETag derived from the
+    prioritized_output version, so a matching If-None-Match gets a 304
+    without running the query.
+
     Returns:
-        JSON response with prioritized items and action plans
+        JSON response with prioritized items, action plans and next_cursor
     """
+    position = decode_cursor(cursor) if cursor else None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Query prioritized output with raw feedback
-        cursor.execute("""
-            SELECT 
-                po.id,
-                po.title,
-                po.priority_rank,
-                rf.category,
-                po.score,
-                rf.severity_volume_score,
-                0 as effort_score,
-                po.pre_mortem_forecast,
-                po.action_plan,
-                po.created_at,
-                rf.raw_text,
-                po.team
-            FROM prioritized_output po
-            LEFT JOIN raw_feedback rf ON po.feedback_id = rf.id
-            ORDER BY po.priority_rank ASC, po.score DESC
-            LIMIT 100
-        """)
-        
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        pool = get_db_pool(request)
+        async with pool.connection() as conn:
+            # Read the version before the data: a write in between only makes
+            # the ETag older than the body, which costs one extra full response
+            version = await get_data_version(conn, "prioritized_output")
+            variant = hashlib.sha1(f"{cursor}|{limit}|{include_raw_text}".encode("utf-8")).hexdigest()[:12]
+            etag = f'W/"priorities-{version}-{variant}"'
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+            after_cursor = (
+                f"WHERE (COALESCE(po.priority_rank, {UNRANKED}), -po.score, po.id) "
+                "> (%(rank_key)s, %(neg_score)s, %(id)s)"
+                if position else ""
+            )
+            cursor_result = await conn.execute(f"""
+                SELECT 
+                    po.id,
+                    po.title,
+                    po.priority_rank,
+                    rf.category,
+                    po.score,
+                    rf.severity_volume_score,
+                    0 as effort_score,
+                    po.pre_mortem_forecast,
+                    po.action_plan,
+                    po.created_at,
+                    {"rf.raw_text" if include_raw_text else "NULL"},
+                    po.team,
+                    COALESCE(po.priority_rank, {UNRANKED}) AS rank_key
+                FROM prioritized_output po
+                LEFT JOIN raw_feedback rf ON po.feedback_id = rf.id
+                {after_cursor}
+                ORDER BY COALESCE(po.priority_rank, {UNRANKED}) ASC, -po.score ASC, po.id ASC
+                LIMIT %(limit)s
+            """, {
+                "rank_key": position[0] if position else None,
+                "neg_score": -position[1] if position else None,
+                "id": position[2] if position else None,
+                # One extra row tells us whether there is a next page
+                "limit": limit + 1,
+            })
+            rows = await cursor_result.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
         # Transform to frontend format
         items = []
@@ -113,74 +288,391 @@ async def get_priorities() -> Dict[str, Any]:
                 "created_at": row[9].isoformat() if row[9] else None
             }
             items.append(item)
-        
+
+        last = rows[-1] if rows else None
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
         return {
             "items": items,
             "total_analyzed": len(items),
             "total_risk_estimate": "$150K in potential revenue at risk",
+            "next_cursor": encode_cursor(last[12], float(last[4]), last[0]) if has_more else None,
             "generated_at": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch priorities: {str(e)}")
 
 
+def encode_search_cursor(rank: float, item_id: int) -> str:
+    """Opaque keyset cursor for the search result after an item."""
+    raw = json.dumps([rank, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor from encode_search_cursor()."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), int(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def render_snippet(headline: str) -> str:
+    """HTML-escape a ts_headline snippet and mark the matched terms."""
+    return (
+        html.escape(headline)
+        .replace(_HIGHLIGHT_START, "<mark>")
+        .replace(_HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+@app.get("/api/search")
+async def search_feedback(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (web search syntax)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    source: Optional[str] = Query(None, description="Only feedback from this source"),
+    category: Optional[str] = Query(None, description="Only feedback in this category")
+) -> Dict[str, Any]:
+    """
+    Full-text search over raw feedback.
+
+    `q` takes web search syntax: words, "quoted phrases", `or` and `-excluded`.
+    Matches come from the GIN index on raw_feedback.search_vector, ordered
+    by relevance (ts_rank_cd) then id, and continue from `cursor`. Only the
+    newest SEARCH_MAX_RANKED matches are ranked, so a term found in a large
+    share of the table stays fast. Snippets are only built for the returned
+    page; matched terms are wrapped in <mark> and the rest is HTML-escaped.
+
+    Returns:
+        JSON response with results (id, source, category, score, rank,
+        snippet, created_at) and next_cursor
+    """
+    position = decode_search_cursor(cursor) if cursor else None
+    try:
+        pool = get_db_pool(request)
+        async with pool.connection() as conn:
+            # Never prepared: the best plan (GIN bitmap for rare terms, newest
+            # rows first for common ones) depends on the actual search terms
+            cursor_result = await conn.execute(f"""
+                WITH matches AS (
+                    SELECT id, search_vector, query
+                    FROM raw_feedback, websearch_to_tsquery('{SEARCH_CONFIG}', %(q)s) AS query
+                    WHERE search_vector @@ query
+                      AND (%(source)s::text IS NULL OR source = %(source)s)
+                      AND (%(category)s::text IS NULL OR category = %(category)s)
+                    ORDER BY id DESC
+                    LIMIT %(max_ranked)s
+                ),
+                ranked AS (
+                    SELECT id, ts_rank_cd(search_vector, query)::float8 AS rank, query
+                    FROM matches
+                ),
+                page AS (
+                    SELECT id, rank, query
+                    FROM ranked
+                    WHERE %(rank)s::float8 IS NULL OR (rank, id) < (%(rank)s, %(id)s)
+                    ORDER BY rank DESC, id DESC
+                    LIMIT %(limit)s
+                )
+                SELECT
+                    rf.id,
+                    rf.source,
+                    rf.category,
+                    rf.severity_volume_score,
+                    rf.created_at,
+                    page.rank,
+                    ts_headline('{SEARCH_CONFIG}', rf.raw_text, page.query, %(headline_options)s)
+                FROM page
+                JOIN raw_feedback rf ON rf.id = page.id
+                ORDER BY page.rank DESC, page.id DESC
+            """, {
+                "q": q,
+                "max_ranked": SEARCH_MAX_RANKED,
+                "source": source,
+                "category": category,
+                "rank": position[0] if position else None,
+                "id": position[1] if position else None,
+                # One extra row tells us whether there is a next page
+                "limit": limit + 1,
+                "headline_options": (
+                    f"StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_STOP}, "
+                    "MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+                ),
+            }, prepare=False)
+            rows = await cursor_result.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = [
+            {
+                "id": row[0],
+                "source": row[1],
+                "category": row[2],
+                "score": float(row[3]) if row[3] is not None else 0.0,
+                "rank": row[5],
+                "snippet": render_snippet(row[6] or ""),
+                "created_at": row[4].isoformat() if row[4] else None,
+            }
+            for row in rows
+        ]
+        last = rows[-1] if rows else None
+        return {
+            "query": q,
+            "results": results,
+            "next_cursor": encode_search_cursor(last[5], last[0]) if has_more else None,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
 @app.get("/api/stats")
-async def get_stats() -> Dict[str, Any]:
+async def get_stats(request: Request) -> Dict[str, Any]:
     """
     Get statistics about feedback processing.
+
+    Reads the feedback_stats rollup, which triggers keep current, so the
+    cost doesn't grow with the feedback tables.
     
     Returns:
         JSON with counts by priority, category, etc.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get counts by priority rank
-        cursor.execute("""
-            SELECT priority_rank, COUNT(*) as count
-            FROM prioritized_output
-            GROUP BY priority_rank
-            ORDER BY priority_rank ASC
-        """)
-        priority_counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Get counts by category from raw_feedback
-        cursor.execute("""
-            SELECT rf.category, COUNT(*) as count
-            FROM prioritized_output po
-            LEFT JOIN raw_feedback rf ON po.feedback_id = rf.id
-            GROUP BY rf.category
-            ORDER BY count DESC
-        """)
-        category_counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Get total raw feedback
-        cursor.execute("SELECT COUNT(*) FROM raw_feedback")
-        total_raw = cursor.fetchone()[0]
-        
-        # Get total processed
-        cursor.execute("SELECT COUNT(*) FROM prioritized_output")
-        total_processed = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
-        
+        pool = get_db_pool(request)
+        async with pool.connection() as conn:
+            cursor = await conn.execute("SELECT metric, key, count FROM feedback_stats")
+            rows = await cursor.fetchall()
+
+        totals: Dict[str, int] = {}
+        priority_counts: Dict[Optional[int], int] = {}
+        category_counts: Dict[Optional[str], int] = {}
+        for metric, key, count in rows:
+            if metric == "total":
+                totals[key] = count
+            elif count <= 0:
+                continue
+            elif metric == "priority":
+                priority_counts[int(key) if key else None] = count
+            elif metric == "category":
+                category_counts[key or None] = count
+
         return {
-            "total_raw_feedback": total_raw,
-            "total_processed": total_processed,
-            "by_priority": priority_counts,
-            "by_category": category_counts,
+            "total_raw_feedback": totals.get("raw_feedback", 0),
+            "total_processed": totals.get("prioritized_output", 0),
+            # Ranked ascending with unranked items last, categories by count
+            "by_priority": dict(sorted(
+                priority_counts.items(), key=lambda kv: (kv[0] is None, kv[0] or 0)
+            )),
+            "by_category": dict(sorted(category_counts.items(), key=lambda kv: -kv[1])),
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
 
 
+@app.post("/api/feedback", status_code=201)
+async def ingest_feedback(request: Request) -> Dict[str, Any]:
+    """
+    Store one live feedback item.
+
+    The item (raw_text, source, optional metadata and created_at) is
+    committed together with other items arriving at the same time, and the
+    response is sent once it is durable.
+
+    Returns:
+        id of the new raw_feedback row; 429 with Retry-After when the
+        queue is full, 503 when the item couldn't be committed
+    """
+    try:
+        item = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+    try:
+        row = validate_feedback(item)
+    except FeedbackValidationError as e:
+        metrics.inc("surf_feedback_rejected_total", path="live")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    writer = getattr(request.app.state, "ingest", None)
+    if writer is None:
+        raise HTTPException(status_code=503, detail="Feedback writer not available")
+    try:
+        feedback_id = await writer.submit(row)
+    except IngestQueueFull:
+        metrics.inc("surf_feedback_throttled_total", reason="queue_full")
+        raise HTTPException(
+            status_code=429,
+            detail="Too much feedback arriving; retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except IngestUnavailable as e:
+        metrics.inc("surf_feedback_throttled_total", reason="unavailable")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Feedback not stored: {e}",
+            headers={"Retry-After": "5"}
+        )
+    return {"id": feedback_id, "status": "stored"}
+
+
+async def copy_feedback_chunk(cur, rows: List[tuple], now: datetime) -> None:
+    """COPY one chunk of validated rows into raw_feedback."""
+    async with cur.copy(
+        "COPY raw_feedback (raw_text, source, metadata, created_at, updated_at) FROM STDIN"
+    ) as copy:
+        for raw_text, source, metadata, created_at in rows:
+            await copy.write_row((raw_text, source, json.dumps(metadata), created_at or now, now))
+
+
+@app.post("/api/feedback/bulk")
+async def bulk_ingest_feedback(
+    request: Request,
+    on_error: str = Query("abort", pattern="^(abort|skip)$")
+) -> Dict[str, Any]:
+    """
+    Bulk-load feedback from a streamed NDJSON body.
+
+    Each line is a JSON object with raw_text, source and optionally
+    metadata and created_at. Lines are validated as they arrive and loaded
+    with COPY in chunks of BULK_INGEST_CHUNK_ROWS; the body is only read
+    as fast as Postgres accepts the chunks. The import is one transaction.
+
+    Query Parameters:
+        on_error: 'abort' (default) rolls back on the first invalid line;
+                  'skip' loads the valid lines and reports the rest
+
+    Returns:
+        inserted, rejected, errors (first 100, with line numbers), seconds
+    """
+    pool = get_db_pool(request)
+    started = time.perf_counter()
+    inserted = 0
+    rejected = 0
+    errors: List[Dict[str, Any]] = []
+
+    def reject(line_number: Optional[int], error: str) -> None:
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < 100:
+            errors.append({"line": line_number, "error": error})
+        if on_error == "abort":
+            raise HTTPException(
+                status_code=400,
+                detail={"message": f"Line {line_number}: {error}; nothing was imported", "errors": errors}
+            )
+        if rejected > BULK_MAX_ERRORS:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": f"More than {BULK_MAX_ERRORS} invalid lines; nothing was imported",
+                        "errors": errors}
+            )
+
+    try:
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
+                    # What the column defaults would have been for this transaction
+                    await cur.execute("SELECT LOCALTIMESTAMP")
+                    now = (await cur.fetchone())[0]
+
+                    chunk: List[tuple] = []
+                    try:
+                        async for line_number, line in iter_ndjson_lines(request.stream()):
+                            try:
+                                chunk.append(parse_ndjson_line(line))
+                            except FeedbackValidationError as e:
+                                reject(line_number, str(e))
+                                continue
+                            if len(chunk) >= BULK_CHUNK_ROWS:
+                                await copy_feedback_chunk(cur, chunk, now)
+                                inserted += len(chunk)
+                                chunk = []
+                    except FeedbackValidationError as e:
+                        # Over-long line: the rest of the stream can't be split
+                        rejected += 1
+                        raise HTTPException(status_code=400, detail={
+                            "message": f"{e}; nothing was imported",
+                            "errors": errors + [{"line": None, "error": str(e)}],
+                        })
+                    if chunk:
+                        await copy_feedback_chunk(cur, chunk, now)
+                        inserted += len(chunk)
+
+                    if inserted:
+                        await cur.execute(
+                            "SELECT pg_notify(%s, %s)",
+                            (EVENTS_CHANNEL, json.dumps({"type": "feedback_ingested", "count": inserted}))
+                        )
+    except HTTPException:
+        if rejected:
+            metrics.inc("surf_feedback_rejected_total", rejected, path="bulk")
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk import failed: {str(e)}")
+
+    seconds = time.perf_counter() - started
+    metrics.inc("surf_feedback_ingested_total", inserted, path="bulk")
+    if rejected:
+        metrics.inc("surf_feedback_rejected_total", rejected, path="bulk")
+    return {
+        "inserted": inserted,
+        "rejected": rejected,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+    }
+
+
+@app.get("/api/events")
+async def stream_events(request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events stream of pipeline progress and data changes.
+
+    Events:
+        data_changed        - a table changed (table, version); refetch it
+        pipeline_started    - a pipeline run began (mode)
+        stage_started       - a pipeline stage began (stage, agent)
+        stage_finished      - a pipeline stage ended (stage, seconds, status)
+        pipeline_finished   - a pipeline run ended (mode, success, seconds)
+        feedback_ingested   - feedback was imported (count)
+        listener_connected  - the server (re)connected to the database;
+                              events may have been missed, so refetch
+    """
+    broadcaster = getattr(request.app.state, "events", None)
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="Event stream not available")
+    return StreamingResponse(
+        broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Pipeline, API and connection pool metrics in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
+    if sys.platform == "win32":
+        # psycopg's async driver needs a selector-based event loop
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     print("Starting SURF Feedback API server...")
     print(f"Database: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}")
     print("API will be available at http://localhost:8000")
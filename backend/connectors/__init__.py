@@ -0,0 +1,18 @@
+"""
+SURF Customer Feedback Agent - Connectors Package
+=================================================
+Sync feedback from external sources into raw_feedback.
+"""
+
+from backend.connectors.notion import NotionConnector, sync_notion
+from backend.connectors.files import FileImporter, RecordReader
+from backend.connectors.slack_history import SlackHistoryIngestor, sync_slack_history
+
+__all__ = [
+    'NotionConnector',
+    'sync_notion',
+    'FileImporter',
+    'RecordReader',
+    'SlackHistoryIngestor',
+    'sync_slack_history',
+]
@@ -0,0 +1,423 @@
+"""
+SURF Customer Feedback Agent - File Importer
+============================================
+Imports feedback exports into raw_feedback: survey CSVs, JSONL dumps and
+email mbox archives.
+
+Files are streamed record by record, so memory stays flat whatever their
+size. Records are grouped into chunks of --chunk-rows, and chunks are
+loaded with COPY by --workers threads in parallel, at most two chunks per
+worker in flight. Each chunk's transaction also records the chunk as
+done in ingest_watermarks, so an interrupted import resumes where it
+stopped when run again with the same file and options (and a finished
+one is not loaded twice).
+
+Usage:
+    python -m backend.connectors.files survey.csv --text-column Comment --source Survey
+    python -m backend.connectors.files dump.jsonl
+    python -m backend.connectors.files support.mbox
+
+Column mapping (CSV and JSONL):
+    --text-column        field(s) joined into raw_text (default: raw_text)
+    --source             source for every row (CSV default: Survey, JSONL:
+                         the record's 'source', mbox: Email)
+    --source-column      field holding the source instead
+    --created-column     field holding the original timestamp (ISO 8601)
+    --metadata-columns   fields kept as metadata, 'Column:key' to rename
+                         (default: every other non-empty field)
+
+Configuration:
+    IMPORT_CHUNK_ROWS  - records per COPY chunk (default: 10000)
+    IMPORT_WORKERS     - chunks loaded in parallel, one connection each
+                         (default: 4)
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import time
+import email
+import hashlib
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.db_connection import DatabaseConnection, FeedbackDatabase
+from backend.ingest import FeedbackValidationError, validate_feedback
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ingest_watermarks.source of import checkpoints
+CHECKPOINT_SOURCE = "file-import"
+
+FORMATS = ("csv", "jsonl", "mbox")
+
+_HTML_TAGS = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*(\n\s*)+")
+
+# csv fields can be as long as raw_text allows
+csv.field_size_limit(sys.maxsize)
+
+
+def detect_format(path: str) -> str:
+    """File format from the extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("csv", "mbox"):
+        return extension
+    raise ValueError(f"Can't tell the format of {path}; pass --format ({', '.join(FORMATS)})")
+
+
+class _Lines:
+    """Binary line iterator that tracks the byte offset of the next line."""
+
+    def __init__(self, handle: BinaryIO, offset: int):
+        handle.seek(offset)
+        self.handle = handle
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[bytes]:
+        for line in self.handle:
+            self.offset += len(line)
+            yield line
+
+
+class RecordReader:
+    """
+    Streams records from an export file.
+
+    records(offset) yields (end_offset, item), where end_offset is the byte
+    position right after the record (so reading can resume there) and item
+    is a feedback item dict, or the FeedbackValidationError it couldn't be
+    turned into.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        file_format: str,
+        text_columns: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        source_column: Optional[str] = None,
+        created_column: Optional[str] = None,
+        metadata_columns: Optional[List[str]] = None
+    ):
+        self.path = path
+        self.format = file_format
+        self.text_columns = text_columns or ["raw_text"]
+        self.source = source
+        self.source_column = source_column
+        self.created_column = created_column
+        # {column: metadata key}
+        self.metadata_columns = None
+        if metadata_columns:
+            self.metadata_columns = dict(
+                column.split(":", 1) if ":" in column else (column, column)
+                for column in metadata_columns
+            )
+        self.header: Optional[List[str]] = None
+        self.data_start = 0
+        if file_format == "csv":
+            with open(path, "rb") as handle:
+                lines = _Lines(handle, 0)
+                decoded = (line.decode("utf-8-sig", errors="replace") for line in lines)
+                self.header = [name.strip() for name in next(csv.reader(decoded), [])]
+                self.data_start = lines.offset
+            missing = [c for c in self.text_columns if c not in self.header]
+            if missing:
+                raise ValueError(f"{path} has no column(s) {', '.join(missing)}; columns: {', '.join(self.header)}")
+
+    def map_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a CSV row or JSON object to a feedback item."""
+        parts = [record.get(column) for column in self.text_columns]
+        raw_text = "\n\n".join(str(part).strip() for part in parts if part not in (None, ""))
+        source = record.get(self.source_column) if self.source_column else None
+        source = source or self.source or record.get("source") or ("Survey" if self.format == "csv" else None)
+
+        created_column = self.created_column or "created_at"
+        used = set(self.text_columns) | {self.source_column, created_column, "source", "metadata"}
+        metadata = dict(record.get("metadata") or {}) if isinstance(record.get("metadata"), dict) else {}
+        if self.metadata_columns is not None:
+            columns = self.metadata_columns.items()
+        else:
+            columns = ((column, column) for column in record if column not in used)
+        for column, key in columns:
+            value = record.get(column)
+            if value not in (None, ""):
+                metadata[key] = value
+
+        created_at = record.get(created_column)
+        return {"raw_text": raw_text, "source": source, "metadata": metadata, "created_at": created_at or None}
+
+    def records(self, offset: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+        """Stream records starting at a byte offset (default: the first record)."""
+        offset = self.data_start if offset is None else offset
+        with open(self.path, "rb") as handle:
+            lines = _Lines(handle, offset)
+            if self.format == "csv":
+                yield from self._csv_records(lines)
+            elif self.format == "jsonl":
+                yield from self._jsonl_records(lines)
+            else:
+                yield from self._mbox_records(lines)
+
+    def _csv_records(self, lines: _Lines) -> Iterator[Tuple[int, Any]]:
+        # csv pulls one line at a time, so lines.offset is exact after each row
+        decoded = (line.decode("utf-8", errors="replace") for line in lines)
+        for row in csv.reader(decoded):
+            if not any(field.strip() for field in row):
+                continue
+            yield lines.offset, self.map_record(dict(zip(self.header, row)))
+
+    def _jsonl_records(self, lines: _Lines) -> Iterator[Tuple[int, Any]]:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield lines.offset, FeedbackValidationError(f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield lines.offset, FeedbackValidationError("record must be a JSON object")
+                continue
+            yield lines.offset, self.map_record(record)
+
+    def _mbox_records(self, lines: _Lines) -> Iterator[Tuple[int, Any]]:
+        message: List[bytes] = []
+        previous_blank = True
+        for line in lines:
+            if line.startswith(b"From ") and previous_blank and message:
+                # This line starts the next message
+                yield lines.offset - len(line), self._parse_message(message)
+                message = []
+            message.append(line)
+            previous_blank = not line.strip()
+        if message:
+            yield lines.offset, self._parse_message(message)
+
+    def _parse_message(self, lines: List[bytes]) -> Any:
+        # Drop the envelope line and undo mboxrd '>From ' quoting
+        body = b"".join(
+            line[1:] if re.match(rb">+From ", line) else line
+            for line in lines[1:]
+        )
+        try:
+            message = email.message_from_bytes(body, policy=policy.default)
+            part = message.get_body(preferencelist=("plain", "html"))
+            text = part.get_content() if part is not None else ""
+            if part is not None and part.get_content_type() == "text/html":
+                text = _HTML_TAGS.sub(" ", text)
+        except Exception as e:
+            return FeedbackValidationError(f"unreadable message: {e}")
+        subject = str(message.get("Subject") or "").strip()
+        text = _BLANK_LINES.sub("\n\n", text.strip())
+        metadata = {
+            key: str(message.get(header))
+            for key, header in (("from", "From"), ("to", "To"), ("message_id", "Message-ID"))
+            if message.get(header)
+        }
+        created_at = None
+        if message.get("Date"):
+            try:
+                created_at = message["Date"].datetime.isoformat()
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return {
+            "raw_text": "\n\n".join(part for part in (subject, text) if part),
+            "source": self.source or "Email",
+            "metadata": metadata,
+            "created_at": created_at,
+        }
+
+
+class FileImporter:
+    """
+    Loads an export file in parallel COPY chunks with a resumable checkpoint.
+    """
+
+    def __init__(
+        self,
+        reader: RecordReader,
+        chunk_rows: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_errors: int = 1000
+    ):
+        self.reader = reader
+        self.chunk_rows = chunk_rows or int(os.getenv("IMPORT_CHUNK_ROWS", "10000"))
+        self.workers = workers or int(os.getenv("IMPORT_WORKERS", "4"))
+        self.max_errors = max_errors
+
+    @property
+    def checkpoint_key(self) -> str:
+        """Identifies this file and chunking; chunks are recorded under it."""
+        reader = self.reader
+        fingerprint = json.dumps([
+            os.path.realpath(reader.path), os.path.getsize(reader.path), reader.format,
+            self.chunk_rows, reader.text_columns, reader.source, reader.source_column,
+            reader.created_column, reader.metadata_columns,
+        ], sort_keys=True, default=str)
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:24]
+
+    def restart(self) -> int:
+        """Forget this file's checkpoint so the next run loads it again."""
+        return FeedbackDatabase.delete_ingest_watermarks(CHECKPOINT_SOURCE, self.checkpoint_key + ":")
+
+    def _chunks(self, done: Dict[int, Tuple[int, int]], totals: Dict[str, Any]):
+        """
+        Yield (start, end, rows) per chunk not yet loaded, skipping done ones.
+        """
+        offset = self.reader.data_start
+        records = None
+        while True:
+            if offset in done:
+                end, count = done[offset]
+                totals["resumed"] += count
+                offset, records = end, None
+                continue
+            if records is None:
+                records = self.reader.records(offset)
+            start, rows = offset, []
+            for end, item in islice(records, self.chunk_rows):
+                offset = end
+                totals["records"] += 1
+                if isinstance(item, FeedbackValidationError):
+                    self._reject(end, item, totals)
+                    continue
+                try:
+                    rows.append(validate_feedback(item))
+                except FeedbackValidationError as e:
+                    self._reject(end, e, totals)
+            if offset == start:
+                return
+            yield start, offset, rows
+
+    def _reject(self, end: int, error: Exception, totals: Dict[str, Any]) -> None:
+        totals["rejected"] += 1
+        if totals["rejected"] <= 20:
+            logger.warning(f"⚠️  Skipping record ending at byte {end}: {error}")
+        if totals["rejected"] > self.max_errors:
+            raise ValueError(f"More than {self.max_errors} invalid records; stopping (loaded chunks are kept)")
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Import the file.
+
+        Returns:
+            dict: records read, loaded, rejected, resumed (loaded by an
+            earlier run), chunks and seconds
+        """
+        key = self.checkpoint_key
+        done: Dict[int, Tuple[int, int]] = {}
+        for scope, value in FeedbackDatabase.get_ingest_watermarks(CHECKPOINT_SOURCE, key + ":").items():
+            end, count = value.split(":")
+            done[int(scope.rsplit(":", 1)[1])] = (int(end), int(count))
+
+        totals: Dict[str, Any] = {"records": 0, "loaded": 0, "rejected": 0, "resumed": 0, "chunks": 0}
+        started = time.perf_counter()
+        logger.info(
+            f"📂 Importing {self.reader.path} ({self.reader.format}, "
+            f"{os.path.getsize(self.reader.path) / 1e6:.1f} MB) with {self.workers} workers"
+            + (f", resuming after {len(done)} chunks" if done else "")
+        )
+
+        def load(start: int, end: int, rows: List[tuple]) -> int:
+            return FeedbackDatabase.copy_raw_feedback(
+                rows, watermark=(CHECKPOINT_SOURCE, f"{key}:{start}", f"{end}:{len(rows)}")
+            )
+
+        in_flight: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="surf-import") as pool:
+            try:
+                for start, end, rows in self._chunks(done, totals):
+                    # Bounded read-ahead keeps memory flat
+                    while len(in_flight) >= self.workers * 2:
+                        totals["loaded"] += in_flight.popleft().result()
+                    in_flight.append(pool.submit(load, start, end, rows))
+                    totals["chunks"] += 1
+                    if totals["chunks"] % 10 == 0:
+                        logger.info(f"   ...{totals['records']} records read")
+                while in_flight:
+                    totals["loaded"] += in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+        totals["seconds"] = round(time.perf_counter() - started, 2)
+        metrics.inc("surf_feedback_ingested_total", totals["loaded"], path="import")
+        if totals["loaded"]:
+            FeedbackDatabase.publish_event("feedback_ingested", {"count": totals["loaded"]})
+        logger.info(
+            f"✅ Imported {totals['loaded']} feedback items in {totals['seconds']}s "
+            f"({totals['rejected']} rejected, {totals['resumed']} already loaded)"
+        )
+        return totals
+
+
+def main():
+    """Import a feedback export file."""
+    parser = argparse.ArgumentParser(description="Import feedback exports (CSV, JSONL, mbox) into SURF")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+    parser.add_argument("--text-column", default="raw_text",
+                        help="Comma-separated fields joined into raw_text")
+    parser.add_argument("--source", help="Source for every row")
+    parser.add_argument("--source-column", help="Field holding each row's source")
+    parser.add_argument("--created-column", help="Field holding each row's original timestamp")
+    parser.add_argument("--metadata-columns",
+                        help="Comma-separated fields kept as metadata ('Column:key' renames)")
+    parser.add_argument("--chunk-rows", type=int, help="Records per COPY chunk")
+    parser.add_argument("--workers", type=int, help="Chunks loaded in parallel")
+    parser.add_argument("--max-errors", type=int, default=1000, help="Invalid records tolerated")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and load everything again")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+
+    def columns(value: Optional[str]) -> Optional[List[str]]:
+        return [column.strip() for column in value.split(",") if column.strip()] if value else None
+
+    try:
+        reader = RecordReader(
+            args.path,
+            args.format or detect_format(args.path),
+            text_columns=columns(args.text_column),
+            source=args.source,
+            source_column=args.source_column,
+            created_column=args.created_column,
+            metadata_columns=columns(args.metadata_columns),
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    importer = FileImporter(reader, args.chunk_rows, args.workers, args.max_errors)
+    DatabaseConnection.initialize_pool(max_size=max(importer.workers + 1, 2))
+    try:
+        if args.restart:
+            importer.restart()
+        totals = importer.run()
+        print(f"📥 {totals['loaded']} loaded, {totals['rejected']} rejected, "
+              f"{totals['resumed']} already loaded, in {totals['seconds']}s")
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        DatabaseConnection.close_pool()
+
+
+if __name__ == "__main__":
+    main()
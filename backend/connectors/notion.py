@@ -0,0 +1,367 @@
+"""
+SURF Customer Feedback Agent - Notion Connector
+===============================================
+Syncs a Notion feedback database into raw_feedback (source='Notion').
+
+Each sync queries the database for pages edited since the saved
+last_edited_time watermark, fetches the changed pages' content
+concurrently (bounded by NOTION_CONCURRENCY and Notion's request rate)
+and upserts them in bulk on their page id, saving the new watermark in
+the same transaction. Page properties become metadata with snake_case
+keys, so a 'User Tier' select feeds the scoring bonuses like any other
+source.
+
+Run a sync:
+    python -m backend.connectors.notion           # pages changed since the last sync
+    python -m backend.connectors.notion --full    # every page
+
+Configuration:
+    NOTION_API_KEY       - integration token
+    NOTION_DATABASE_ID   - database holding the feedback pages
+    NOTION_API_URL       - API base URL (default: https://api.notion.com/v1/);
+                           point it at benchmarks/fake_notion.py to test
+    NOTION_CONCURRENCY   - page contents fetched in parallel (default: 4)
+    NOTION_RATE          - requests per second (default: 3, Notion's average limit)
+    NOTION_MAX_RETRIES   - retries on 429/5xx/network errors (default: 3)
+    NOTION_TIMEOUT       - HTTP timeout in seconds (default: 30)
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.db_connection import DatabaseConnection, FeedbackDatabase
+from backend.ingest import MAX_TEXT_CHARS
+from backend.metrics import metrics
+from backend.slack_client import TokenBucket, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+SOURCE = "Notion"
+DEFAULT_API_URL = "https://api.notion.com/v1/"
+NOTION_VERSION = "2022-06-28"
+
+# Nesting levels of child blocks read into a page's text
+MAX_BLOCK_DEPTH = 3
+
+_KEY_CHARS = re.compile(r"[^0-9a-z]+")
+
+
+class NotionError(RuntimeError):
+    """Raised when the Notion API rejects a request."""
+
+
+def _plain_text(rich_text: List[Dict[str, Any]]) -> str:
+    return "".join(part.get("plain_text", "") for part in rich_text or [])
+
+
+def property_key(name: str) -> str:
+    """Metadata key for a Notion property name ('User Tier' -> 'user_tier')."""
+    return _KEY_CHARS.sub("_", name.strip().lower()).strip("_")
+
+
+def property_value(prop: Dict[str, Any]) -> Any:
+    """Plain JSON value of a Notion page property, or None."""
+    kind = prop.get("type")
+    value = prop.get(kind)
+    if kind in ("title", "rich_text"):
+        return _plain_text(value) or None
+    if kind in ("select", "status"):
+        return value.get("name") if value else None
+    if kind == "multi_select":
+        return [option.get("name") for option in value or []]
+    if kind == "date":
+        return value.get("start") if value else None
+    if kind == "people":
+        return [person.get("name") or person.get("id") for person in value or []]
+    if kind == "relation":
+        return [related.get("id") for related in value or []]
+    if kind == "formula":
+        return value.get(value.get("type")) if value else None
+    if kind in ("created_by", "last_edited_by"):
+        return value.get("name") or value.get("id") if value else None
+    if kind in ("number", "checkbox", "url", "email", "phone_number",
+                "created_time", "last_edited_time", "unique_id"):
+        return value
+    return None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # raw_feedback stores naive UTC timestamps
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def page_to_row(page: Dict[str, Any], body: str) -> Optional[Dict[str, Any]]:
+    """
+    Map a Notion page to a raw_feedback upsert row.
+
+    Returns:
+        dict: external_id, raw_text, metadata and created_at, or None for a
+        page without any text
+    """
+    title = ""
+    metadata: Dict[str, Any] = {}
+    for name, prop in (page.get("properties") or {}).items():
+        if prop.get("type") == "title":
+            title = _plain_text(prop.get("title")).strip()
+            continue
+        value = property_value(prop)
+        if value not in (None, [], ""):
+            metadata[property_key(name)] = value
+
+    raw_text = "\n\n".join(part for part in (title, body.strip()) if part)
+    if not raw_text:
+        return None
+    metadata["notion_url"] = page.get("url")
+    metadata["notion_last_edited_time"] = page.get("last_edited_time")
+    return {
+        "external_id": page["id"],
+        "raw_text": raw_text[:MAX_TEXT_CHARS],
+        "metadata": metadata,
+        "created_at": _parse_time(page.get("created_time")),
+    }
+
+
+class NotionConnector:
+    """
+    Incremental Notion database sync.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        database_id: Optional[str] = None,
+        api_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("NOTION_API_KEY")
+        self.database_id = database_id if database_id is not None else os.getenv("NOTION_DATABASE_ID")
+        self.api_url = (api_url or os.getenv("NOTION_API_URL", DEFAULT_API_URL)).rstrip("/") + "/"
+        self.concurrency = concurrency or int(os.getenv("NOTION_CONCURRENCY", "4"))
+        self.rate = rate or float(os.getenv("NOTION_RATE", "3"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("NOTION_MAX_RETRIES", "3"))
+        self.timeout = timeout or float(os.getenv("NOTION_TIMEOUT", "30"))
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._bucket: Optional[TokenBucket] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.database_id)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Call the Notion API with rate limiting and retries."""
+        error = "unknown"
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            retry_after: Optional[float] = None
+            started = time.perf_counter()
+            try:
+                response = await self._client.request(method, path, json=json, params=params)
+                metrics.observe(
+                    "surf_connector_request_seconds", time.perf_counter() - started,
+                    source=SOURCE, status=response.status_code
+                )
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    error = "rate_limited"
+                    self._bucket.pause(retry_after)
+                elif response.status_code >= 500 or response.status_code == 409:
+                    error = f"http_{response.status_code}"
+                elif response.status_code >= 400:
+                    raise NotionError(f"{method} {path}: HTTP {response.status_code}: {response.text[:200]}")
+                else:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        data = None
+                    if isinstance(data, dict):
+                        return data
+                    # e.g. a proxy's HTML page
+                    error = "invalid_response"
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                metrics.inc("surf_connector_retries_total", source=SOURCE, reason=error.split(":")[0])
+                logger.warning(
+                    f"⚠️  Notion {method} {path} failed ({error}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+        raise NotionError(f"{method} {path} failed after {self.max_retries + 1} attempts: {error}")
+
+    async def changed_pages(self, since: Optional[str]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Query the database for pages edited on or after a timestamp.
+
+        Yields:
+            list: One result page of Notion pages, oldest edit first
+        """
+        body: Dict[str, Any] = {
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            "page_size": 100,
+        }
+        if since:
+            # Notion rounds last_edited_time to the minute, so re-read the
+            # watermark's minute; unchanged pages are skipped by the upsert
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+        while True:
+            data = await self._request("POST", f"databases/{self.database_id}/query", json=body)
+            yield data.get("results", [])
+            if not data.get("has_more"):
+                return
+            body["start_cursor"] = data["next_cursor"]
+
+    async def page_text(self, block_id: str, depth: int = 0) -> str:
+        """Plain text of a page's blocks, including nested blocks."""
+        lines: List[str] = []
+        params: Dict[str, Any] = {"page_size": 100}
+        while True:
+            data = await self._request("GET", f"blocks/{block_id}/children", params=params)
+            for block in data.get("results", []):
+                content = block.get(block.get("type"), {})
+                text = _plain_text(content.get("rich_text")) if isinstance(content, dict) else ""
+                if text:
+                    lines.append(text)
+                if block.get("has_children") and depth + 1 < MAX_BLOCK_DEPTH \
+                        and block.get("type") not in ("child_page", "child_database"):
+                    nested = await self.page_text(block["id"], depth + 1)
+                    if nested:
+                        lines.append(nested)
+            if not data.get("has_more"):
+                return "\n".join(lines)
+            params["start_cursor"] = data["next_cursor"]
+
+    async def _page_rows(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch page contents concurrently and map them to rows."""
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(page):
+            async with slots:
+                return page_to_row(page, await self.page_text(page["id"]))
+
+        rows = await asyncio.gather(*(fetch(page) for page in pages))
+        return [row for row in rows if row is not None]
+
+    async def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Sync changed pages into raw_feedback.
+
+        Args:
+            full: Ignore the watermark and re-read every page
+
+        Returns:
+            dict: pages, inserted, updated, unchanged, skipped (no text)
+            and the new watermark
+        """
+        if not self.configured:
+            raise ValueError("NOTION_API_KEY and NOTION_DATABASE_ID must be set")
+
+        since = None if full else await asyncio.to_thread(
+            FeedbackDatabase.get_ingest_watermark, SOURCE, self.database_id
+        )
+        totals: Dict[str, Any] = {
+            "pages": 0, "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "watermark": since,
+        }
+        started = time.perf_counter()
+        logger.info(f"🔄 Syncing Notion database {self.database_id} (changed since {since or 'the beginning'})")
+
+        self._bucket = TokenBucket(self.rate, self.rate)
+        async with httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Notion-Version": NOTION_VERSION,
+            },
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency + 1),
+            transport=self.transport
+        ) as client:
+            self._client = client
+            try:
+                async for pages in self.changed_pages(since):
+                    if not pages:
+                        continue
+                    rows = await self._page_rows(pages)
+                    # Results are sorted by edit time, so everything up to the
+                    # last page of this batch is now stored
+                    watermark = max(page["last_edited_time"] for page in pages)
+                    counts = await asyncio.to_thread(
+                        FeedbackDatabase.upsert_external_feedback,
+                        SOURCE, rows, (self.database_id, watermark)
+                    )
+                    totals["pages"] += len(pages)
+                    totals["skipped"] += len(pages) - len(rows)
+                    for key, value in counts.items():
+                        totals[key] += value
+                    totals["watermark"] = watermark
+            finally:
+                self._client = None
+
+        for key in ("inserted", "updated"):
+            if totals[key]:
+                metrics.inc("surf_connector_rows_total", totals[key], source=SOURCE, result=key)
+        logger.info(
+            f"✅ Notion sync: {totals['pages']} pages, {totals['inserted']} new, "
+            f"{totals['updated']} updated, {totals['unchanged']} unchanged "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return totals
+
+
+def sync_notion(full: bool = False) -> Dict[str, Any]:
+    """Blocking Notion sync with settings from the environment."""
+    return asyncio.run(NotionConnector().sync(full=full))
+
+
+def main():
+    """Run one Notion sync."""
+    parser = argparse.ArgumentParser(description="Sync a Notion feedback database into SURF")
+    parser.add_argument("--full", action="store_true", help="Re-read every page, ignoring the watermark")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    DatabaseConnection.initialize_pool()
+    try:
+        totals = sync_notion(full=args.full)
+        print(f"📥 {totals['inserted']} new, {totals['updated']} updated, "
+              f"{totals['unchanged']} unchanged, {totals['skipped']} without text")
+    except (ValueError, NotionError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        DatabaseConnection.close_pool()
+
+
+if __name__ == "__main__":
+    main()
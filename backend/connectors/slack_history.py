@@ -0,0 +1,321 @@
+"""
+SURF Customer Feedback Agent - Slack History Connector
+======================================================
+Ingests messages from feedback channels into raw_feedback (source='Slack').
+
+Each run pages through conversations.history for every configured channel
+since the channel's saved watermark (the newest message ts already
+ingested), upserting each page in bulk on channel:ts. Channels are read
+concurrently, sharing one token bucket sized for Slack's Tier 3 limit on
+conversations.history; 429s pause the bucket for Retry-After. A channel's
+watermark is saved once all of its pages are stored, so an interrupted
+run re-reads that channel and the upsert skips what it already has.
+
+Only top-level messages are read (thread replies are not), and bot
+messages and channel joins are skipped.
+
+Run it:
+    python -m backend.connectors.slack_history              # since the watermarks
+    python -m backend.connectors.slack_history --full       # the last SLACK_HISTORY_DAYS
+    python -m backend.connectors.slack_history --channels C01ABC,C02DEF
+
+Configuration:
+    SLACK_BOT_TOKEN             - bot token with channels:history
+    SLACK_API_URL               - Web API base URL (default: https://slack.com/api/);
+                                  point it at benchmarks/fake_slack.py to test
+    SLACK_HISTORY_CHANNELS      - comma-separated channel ids to ingest
+    SLACK_HISTORY_DAYS          - history read on a channel's first run (default: 30)
+    SLACK_HISTORY_RATE          - conversations.history calls per second across
+                                  channels (default: 0.8, i.e. Tier 3's ~50/minute)
+    SLACK_HISTORY_BURST         - calls allowed back to back (default: 5)
+    SLACK_HISTORY_CONCURRENCY   - channels read at once (default: 4)
+    SLACK_HISTORY_INCLUDE_BOTS  - also ingest bot messages (default: false)
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.db_connection import DatabaseConnection, FeedbackDatabase
+from backend.ingest import MAX_TEXT_CHARS
+from backend.metrics import metrics
+from backend.slack_client import DEFAULT_API_URL, RETRYABLE_ERRORS, TokenBucket, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+SOURCE = "Slack"
+
+# Message subtypes that are feedback; everything else (joins, topic
+# changes, ...) is channel noise
+FEEDBACK_SUBTYPES = {None, "thread_broadcast", "file_share", "me_message"}
+
+
+class SlackHistoryError(RuntimeError):
+    """Raised when Slack refuses a history request."""
+
+
+def message_to_row(channel: str, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Map a Slack message to a raw_feedback upsert row.
+
+    Returns:
+        dict: external_id, raw_text, metadata and created_at, or None for
+        a message without text
+    """
+    text = (message.get("text") or "").strip()
+    if not text:
+        return None
+    ts = message["ts"]
+    metadata: Dict[str, Any] = {"channel": channel, "ts": ts}
+    for key in ("user", "thread_ts", "reply_count", "reply_users_count"):
+        if message.get(key) is not None:
+            metadata[key] = message[key]
+    reactions = message.get("reactions") or []
+    if reactions:
+        metadata["reactions"] = sum(reaction.get("count", 0) for reaction in reactions)
+    if message.get("edited"):
+        metadata["edited"] = True
+    return {
+        "external_id": f"{channel}:{ts}",
+        "raw_text": text[:MAX_TEXT_CHARS],
+        "metadata": metadata,
+        "created_at": datetime.fromtimestamp(float(ts), timezone.utc).replace(tzinfo=None),
+    }
+
+
+class SlackHistoryIngestor:
+    """
+    Incremental conversations.history ingestion for several channels.
+    """
+
+    def __init__(
+        self,
+        channels: Optional[List[str]] = None,
+        bot_token: Optional[str] = None,
+        api_url: Optional[str] = None,
+        days: Optional[float] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        include_bots: Optional[bool] = None,
+        max_retries: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if channels is None:
+            channels = os.getenv("SLACK_HISTORY_CHANNELS", "").split(",")
+        self.channels = [channel.strip() for channel in channels if channel.strip()]
+        self.bot_token = bot_token if bot_token is not None else os.getenv("SLACK_BOT_TOKEN")
+        self.api_url = (api_url or os.getenv("SLACK_API_URL", DEFAULT_API_URL)).rstrip("/") + "/"
+        self.days = days or float(os.getenv("SLACK_HISTORY_DAYS", "30"))
+        self.rate = rate or float(os.getenv("SLACK_HISTORY_RATE", "0.8"))
+        self.burst = burst or float(os.getenv("SLACK_HISTORY_BURST", "5"))
+        self.concurrency = concurrency or int(os.getenv("SLACK_HISTORY_CONCURRENCY", "4"))
+        if include_bots is None:
+            include_bots = os.getenv("SLACK_HISTORY_INCLUDE_BOTS", "false").lower() == "true"
+        self.include_bots = include_bots
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("SLACK_MAX_RETRIES", "3"))
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._bucket: Optional[TokenBucket] = None
+
+    def _wanted(self, message: Dict[str, Any]) -> bool:
+        if message.get("subtype") not in FEEDBACK_SUBTYPES:
+            return self.include_bots and message.get("subtype") == "bot_message"
+        return self.include_bots or not message.get("bot_id")
+
+    async def _history_page(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """One conversations.history call with rate limiting and retries."""
+        error = "unknown"
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            retry_after: Optional[float] = None
+            started = time.perf_counter()
+            try:
+                response = await self._client.get("conversations.history", params=params)
+                metrics.observe(
+                    "surf_connector_request_seconds", time.perf_counter() - started,
+                    source=SOURCE, status=response.status_code
+                )
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    error = "ratelimited"
+                    # The limit is per workspace, so every channel waits
+                    self._bucket.pause(retry_after)
+                elif response.status_code >= 500:
+                    error = f"http_{response.status_code}"
+                elif response.status_code >= 400:
+                    raise SlackHistoryError(f"HTTP {response.status_code}: {response.text[:200]}")
+                else:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        data = None
+                    if not isinstance(data, dict):
+                        data = {"ok": False, "error": "invalid_response"}
+                    if data.get("ok"):
+                        return data
+                    error = data.get("error", "unknown")
+                    if error not in RETRYABLE_ERRORS:
+                        raise SlackHistoryError(error)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                metrics.inc("surf_connector_retries_total", source=SOURCE, reason=error.split(":")[0])
+                logger.warning(
+                    f"⚠️  conversations.history for {params['channel']} failed ({error}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+        raise SlackHistoryError(f"failed after {self.max_retries + 1} attempts: {error}")
+
+    async def history(self, channel: str, oldest: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Messages newer than oldest, one page at a time (newest first).
+
+        Yields:
+            list: Slack message objects
+        """
+        params: Dict[str, Any] = {"channel": channel, "oldest": oldest, "limit": 200}
+        while True:
+            data = await self._history_page(params)
+            yield data.get("messages", [])
+            cursor = (data.get("response_metadata") or {}).get("next_cursor")
+            if not data.get("has_more") or not cursor:
+                return
+            params["cursor"] = cursor
+
+    async def sync_channel(self, channel: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Ingest one channel's new messages.
+
+        Returns:
+            dict: messages, inserted, updated, unchanged, skipped and the new
+            watermark (or error if Slack refused the channel)
+        """
+        watermark = None if full else await asyncio.to_thread(
+            FeedbackDatabase.get_ingest_watermark, SOURCE, channel
+        )
+        oldest = watermark or f"{time.time() - self.days * 86400:.6f}"
+        totals: Dict[str, Any] = {
+            "messages": 0, "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "watermark": watermark,
+        }
+        newest = oldest
+        try:
+            async for messages in self.history(channel, oldest):
+                rows = [
+                    row for row in (message_to_row(channel, m) for m in messages if self._wanted(m))
+                    if row is not None
+                ]
+                counts = await asyncio.to_thread(FeedbackDatabase.upsert_external_feedback, SOURCE, rows)
+                totals["messages"] += len(messages)
+                totals["skipped"] += len(messages) - len(rows)
+                for key, value in counts.items():
+                    totals[key] += value
+                newest = max([newest] + [m["ts"] for m in messages], key=float)
+        except SlackHistoryError as e:
+            logger.error(f"❌ Slack history for {channel} failed: {e}")
+            totals["error"] = str(e)
+            return totals
+
+        if newest != oldest:
+            await asyncio.to_thread(FeedbackDatabase.save_ingest_watermark, SOURCE, channel, newest)
+            totals["watermark"] = newest
+        return totals
+
+    async def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Ingest every configured channel concurrently.
+
+        Returns:
+            dict: Totals plus per-channel results under 'channels'
+        """
+        if not self.bot_token:
+            raise ValueError("SLACK_BOT_TOKEN must be set")
+        if not self.channels:
+            raise ValueError("No channels configured (SLACK_HISTORY_CHANNELS)")
+
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        self._bucket = TokenBucket(self.rate, self.burst)
+        async with httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={"Authorization": f"Bearer {self.bot_token}"},
+            timeout=float(os.getenv("SLACK_TIMEOUT", "10")),
+            limits=httpx.Limits(max_connections=self.concurrency),
+            transport=self.transport
+        ) as client:
+            self._client = client
+
+            async def run(channel):
+                async with slots:
+                    return channel, await self.sync_channel(channel, full)
+
+            try:
+                results = dict(await asyncio.gather(*(run(channel) for channel in self.channels)))
+            finally:
+                self._client = None
+
+        totals: Dict[str, Any] = {"messages": 0, "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        for result in results.values():
+            for key in totals:
+                totals[key] += result[key]
+        totals["failed_channels"] = [channel for channel, result in results.items() if "error" in result]
+        totals["channels"] = results
+        for key in ("inserted", "updated"):
+            if totals[key]:
+                metrics.inc("surf_connector_rows_total", totals[key], source=SOURCE, result=key)
+        logger.info(
+            f"✅ Slack history: {totals['messages']} messages from {len(results)} channels, "
+            f"{totals['inserted']} new, {totals['updated']} updated "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return totals
+
+
+def sync_slack_history(full: bool = False, channels: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Blocking Slack history ingestion with settings from the environment."""
+    return asyncio.run(SlackHistoryIngestor(channels).sync(full=full))
+
+
+def main():
+    """Run one Slack history ingestion."""
+    parser = argparse.ArgumentParser(description="Ingest Slack channel history into SURF")
+    parser.add_argument("--channels", help="Comma-separated channel ids (default: SLACK_HISTORY_CHANNELS)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the watermarks and re-read the last SLACK_HISTORY_DAYS")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    DatabaseConnection.initialize_pool()
+    try:
+        totals = sync_slack_history(args.full, args.channels.split(",") if args.channels else None)
+        print(f"📥 {totals['inserted']} new, {totals['updated']} updated, "
+              f"{totals['unchanged']} unchanged, {totals['skipped']} skipped")
+        if totals["failed_channels"]:
+            print(f"❌ Failed channels: {', '.join(totals['failed_channels'])}")
+            sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        DatabaseConnection.close_pool()
+
+
+if __name__ == "__main__":
+    main()
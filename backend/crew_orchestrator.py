@@ -1,25 +1,73 @@
 """
 SURF Customer Feedback Agent - Crew Orchestrator
 ================================================
-Orchestrates the sequential execution of the 5-agent pipeline.
+Orchestrates the execution of the 5-agent pipeline.
+
+By default stages run on a DAG scheduler: each stage declares the stages
+it depends on and independent stages run concurrently. Set
+PIPELINE_SCHEDULER=sequential to use CrewAI's sequential process instead.
+
+With SLACK_DELIVERY_MODE=outbox (the default) the delivery stage commits
+the prioritized output and queues the Slack message in the same
+transaction, and the pipeline finishes without waiting for Slack; see
+backend/delivery.py. The sequential crew always delivers inline.
 """
 
+import os
+import json
+import time
 import logging
+import psycopg
 from crewai import Crew, Process
 from backend.agents import create_all_agents
 from backend.tasks.task_definitions import create_all_tasks
+from backend.tools import postgres_tool
+from backend.db_connection import FeedbackDatabase
+from backend.dag_scheduler import DAGScheduler
+from backend.delivery import delivery_mode, enqueue_report
+from backend.metrics import metrics, stage_context
 
 logger = logging.getLogger(__name__)
 
 
+# Pipeline stages and their dependencies. rule_scoring is the
+# deterministic scorer; the others map onto the five agent tasks.
+STAGE_DEPENDENCIES = {
+    "rule_scoring": (),
+    "ingestion": (),
+    "analysis": ("rule_scoring",),
+    "prioritization": ("analysis",),
+    "risk_assessment": ("prioritization",),
+    "delivery": ("risk_assessment", "ingestion"),
+}
+TASK_STAGES = ["ingestion", "analysis", "prioritization", "risk_assessment", "delivery"]
+# Incremental runs skip the ingestion summary: it pages through all
+# feedback, so its cost would grow with the table rather than the delta
+ANALYSIS_STAGES = ["rule_scoring", "analysis"]
+DELIVERY_STAGES = ["prioritization", "risk_assessment", "delivery"]
+
+
 class FeedbackCrew:
     """
     Orchestrates the SURF Customer Feedback Agent pipeline.
-    Manages the sequential execution of 5 agents.
+    Manages the execution of 5 agents as a stage dependency graph.
+    
+    In incremental mode the pipeline only runs when feedback is new or
+    changed since the last run, skips the whole-table ingestion summary,
+    and the Prioritizer/RetentionCritic/Deliverer stages only run when
+    the top-N candidate set changed.
     """
     
-    def __init__(self):
-        """Initialize the crew with agents and tasks."""
+    def __init__(self, incremental: bool = False):
+        """
+        Initialize the crew with agents and tasks.
+        
+        Args:
+            incremental: Process only the delta since the last run
+        """
+        self.incremental = incremental
+        self.top_items_count = int(os.getenv("TOP_ITEMS_COUNT", "3"))
+        self.scheduler = os.getenv("PIPELINE_SCHEDULER", "dag").lower()
         logger.info("🚀 Initializing SURF Feedback Crew...")
         
         # Create all agents
@@ -38,6 +86,25 @@ class FeedbackCrew:
             verbose=True,
             full_output=True
         )
+        
+        # Stage graph for the DAG scheduler
+        self.dag = DAGScheduler(max_workers=int(os.getenv("PIPELINE_MAX_WORKERS", "4")))
+        self.dag.add_stage(
+            "rule_scoring",
+            self._instrumented("rule_scoring", "Rule Engine", self._run_rule_scoring)
+        )
+        self.delivery_mode = delivery_mode()
+        for stage, task in zip(TASK_STAGES, self.tasks):
+            func = self._task_stage(task)
+            if stage == "delivery" and self.delivery_mode == "outbox":
+                func = self._outbox_delivery(func)
+            self.dag.add_stage(
+                stage,
+                self._instrumented(stage, task.agent.role, func),
+                STAGE_DEPENDENCIES[stage]
+            )
+        self.stage_results = {}
+        self.stage_timings = {}
         logger.info("✅ Crew assembled and ready for execution")
     
     def execute(self) -> dict:
@@ -50,10 +117,56 @@ class FeedbackCrew:
         logger.info("="*70)
         logger.info("🎯 STARTING SURF CUSTOMER FEEDBACK AGENT PIPELINE")
         logger.info("="*70)
+        self.stage_results = {}
+        self.stage_timings = {}
+        
+        mode = "incremental" if self.incremental else "full"
+        started = time.perf_counter()
+        self._publish("pipeline_started", mode=mode)
+        if self.incremental:
+            result = self._execute_incremental()
+        else:
+            result = self._execute_full()
         
+        elapsed = time.perf_counter() - started
+        metrics.observe("surf_pipeline_duration_seconds", elapsed, mode=mode)
+        metrics.inc(
+            "surf_pipeline_runs_total",
+            mode=mode,
+            status="success" if result["success"] else "failed"
+        )
+        self._publish(
+            "pipeline_finished",
+            mode=mode,
+            success=result["success"],
+            seconds=round(elapsed, 3),
+            stages=result.get("stages", list(self.stage_timings))
+        )
+        return result
+    
+    @staticmethod
+    def _publish(event_type: str, **payload) -> None:
+        """Publish a dashboard progress event; never fails the pipeline."""
         try:
-            # Execute the crew
-            result = self.crew.kickoff()
+            FeedbackDatabase.publish_event(event_type, payload)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not publish {event_type} event: {e}")
+    
+    def _execute_full(self) -> dict:
+        """
+        Execute every stage of the pipeline.
+        
+        Returns:
+            dict: Results from the crew execution
+        """
+        try:
+            if self.scheduler == "sequential":
+                # Execute the crew
+                result = self._instrumented("crew", "all", lambda _: self.crew.kickoff())({})
+                report = {}
+            else:
+                report = self._run_stages(list(STAGE_DEPENDENCIES))
+                result = report["results"]["delivery"]
             
             logger.info("="*70)
             logger.info("✅ PIPELINE EXECUTION COMPLETE")
@@ -62,6 +175,8 @@ class FeedbackCrew:
             return {
                 "success": True,
                 "result": result,
+                "critical_path": report.get("critical_path", []),
+                "stage_timings": dict(self.stage_timings),
                 "message": "Feedback processing pipeline completed successfully"
             }
             
@@ -73,6 +188,169 @@ class FeedbackCrew:
                 "message": "Pipeline execution encountered an error"
             }
     
+    def _instrumented(self, stage: str, agent: str, func):
+        """Time a stage, label the LLM/tool metrics recorded inside it and publish its progress."""
+        def run(inputs: dict):
+            self._publish("stage_started", stage=stage, agent=agent)
+            started = time.perf_counter()
+            status = "failed"
+            try:
+                with stage_context(stage), metrics.timed(
+                    "surf_stage_duration_seconds", stage=stage, agent=agent
+                ):
+                    output = func(inputs)
+                status = "success"
+                return output
+            finally:
+                self._publish(
+                    "stage_finished",
+                    stage=stage,
+                    status=status,
+                    seconds=round(time.perf_counter() - started, 3)
+                )
+        return run
+    
+    def _run_rule_scoring(self, inputs: dict) -> str:
+        """Stage: score unprocessed feedback with the deterministic engine."""
+        return postgres_tool._run("score_unprocessed_feedback")
+    
+    def _task_stage(self, task):
+        """Wrap a CrewAI task as a DAG stage fed by its dependencies' outputs."""
+        def run(inputs: dict) -> str:
+            context = "\n\n".join(
+                f"[{name}]\n{output}" for name, output in inputs.items()
+                if output is not None
+            )
+            output = task.execute_sync(agent=task.agent, context=context or None)
+            return getattr(output, "raw", output)
+        return run
+    
+    def _outbox_delivery(self, inline_stage):
+        """
+        Delivery stage that commits the report and queues it for Slack.
+
+        Falls back to the DelivererAgent (inline delivery) if the risk
+        assessment output can't be parsed into prioritized items or the
+        database rejects them (e.g. a feedback_id that doesn't exist).
+        """
+        def run(inputs: dict) -> str:
+            try:
+                confirmation = enqueue_report(inputs.get("risk_assessment"))
+            except (ValueError, psycopg.Error) as e:
+                logger.warning(f"⚠️  Could not queue delivery ({e}); delivering inline")
+                return inline_stage(inputs)
+            logger.info(
+                f"📮 Queued Slack delivery of {len(confirmation['output_ids'])} items "
+                f"to {', '.join(confirmation['channels'])}"
+            )
+            return json.dumps(confirmation, default=str)
+        return run
+    
+    def _run_stages(self, stages: list) -> dict:
+        """
+        Run a subset of the stage graph and log its critical path.
+        
+        Args:
+            stages: Stage names to run; earlier results feed dependents
+        
+        Returns:
+            dict: DAG scheduler report
+        """
+        report = self.dag.run(stages=stages, results=self.stage_results)
+        self.stage_results.update(report["results"])
+        self.stage_timings.update(report["timings"])
+        logger.info(
+            f"🧭 Critical path: {' → '.join(report['critical_path'])} "
+            f"({report['critical_path_seconds']:.2f}s of "
+            f"{report['wall_seconds']:.2f}s wall, "
+            f"{report['sum_seconds']:.2f}s total stage time)"
+        )
+        return report
+    
+    def _execute_incremental(self) -> dict:
+        """
+        Execute only the stages whose input changed since the last run.
+        
+        Returns:
+            dict: Results from the crew execution, plus the stages run
+        """
+        last_run = FeedbackDatabase.get_last_pipeline_run(mode="incremental")
+        run_id = FeedbackDatabase.start_pipeline_run(mode="incremental")
+        stages = []
+        
+        try:
+            delta = FeedbackDatabase.count_feedback_delta(
+                last_run["watermark"] if last_run else None
+            )
+            logger.info(
+                f"📐 Delta since last run: {delta['pending']} pending "
+                f"({delta['new']} new, {delta['changed']} changed)"
+            )
+            
+            if last_run and delta["pending"] == 0:
+                FeedbackDatabase.finish_pipeline_run(
+                    run_id, "skipped",
+                    top_signature=last_run["top_signature"]
+                )
+                logger.info("⏭️  No new or changed feedback - skipping all stages")
+                return {
+                    "success": True,
+                    "result": None,
+                    "stages": stages,
+                    "message": "No new or changed feedback since last run"
+                }
+            
+            report = self._run_stages(ANALYSIS_STAGES)
+            result = report["results"]["analysis"]
+            stages.extend(ANALYSIS_STAGES)
+            
+            signature = FeedbackDatabase.get_top_candidate_signature(
+                limit=self.top_items_count
+            )
+            if last_run and signature == last_run["top_signature"]:
+                logger.info(
+                    f"⏭️  Top {self.top_items_count} unchanged - skipping "
+                    f"prioritization, risk assessment and delivery"
+                )
+                message = "Analysis updated; top priorities unchanged"
+            else:
+                report = self._run_stages(DELIVERY_STAGES)
+                result = report["results"]["delivery"]
+                stages.extend(DELIVERY_STAGES)
+                message = "Feedback processing pipeline completed successfully"
+            
+            FeedbackDatabase.finish_pipeline_run(
+                run_id, "completed",
+                delta_count=delta["pending"],
+                top_signature=signature,
+                stages=stages
+            )
+            
+            logger.info("="*70)
+            logger.info("✅ PIPELINE EXECUTION COMPLETE")
+            logger.info("="*70)
+            
+            return {
+                "success": True,
+                "result": result,
+                "stages": stages,
+                "stage_timings": dict(self.stage_timings),
+                "message": message
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Pipeline execution failed: {e}")
+            try:
+                FeedbackDatabase.finish_pipeline_run(run_id, "failed", stages=stages)
+            except Exception as record_error:
+                logger.warning(f"⚠️  Could not record failed run: {record_error}")
+            return {
+                "success": False,
+                "error": str(e),
+                "stages": stages,
+                "message": "Pipeline execution encountered an error"
+            }
+    
     def get_agent_info(self) -> dict:
         """
         Get information about all agents in the crew.
@@ -89,6 +367,15 @@ class FeedbackCrew:
             for agent_name, agent in self.agents.items()
         }
     
+    def get_stage_graph(self) -> dict:
+        """
+        Get the stage dependency graph.
+        
+        Returns:
+            dict: Stage name -> list of stages it depends on
+        """
+        return {name: self.dag.dependencies(name) for name in self.dag.stage_names}
+    
     def get_task_info(self) -> list:
         """
         Get information about all tasks in the crew.
@@ -106,12 +393,15 @@ class FeedbackCrew:
         ]
 
 
-def create_and_run_crew() -> dict:
+def create_and_run_crew(incremental: bool = False) -> dict:
     """
     Convenience function to create and run the crew.
     
+    Args:
+        incremental: Process only the delta since the last run
+    
     Returns:
         dict: Execution results
     """
-    crew = FeedbackCrew()
+    crew = FeedbackCrew(incremental=incremental)
     return crew.execute()
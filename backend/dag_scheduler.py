@@ -0,0 +1,219 @@
+"""
+SURF Customer Feedback Agent - DAG Stage Scheduler
+==================================================
+Runs pipeline stages as a dependency graph on a thread pool.
+
+Stages declare the stages they depend on; every stage whose dependencies
+have finished is started immediately, so independent stages overlap and
+end-to-end wall time approaches the longest dependency chain (the
+critical path) instead of the sum of all stages.
+"""
+
+import time
+import logging
+import concurrent.futures
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageFailedError(Exception):
+    """Raised when one or more pipeline stages fail."""
+
+    def __init__(self, failures: Dict[str, BaseException], report: Dict[str, Any]):
+        self.failures = failures
+        self.report = report
+        names = ", ".join(f"{name}: {error}" for name, error in failures.items())
+        super().__init__(f"Stage(s) failed - {names}")
+
+
+class DAGScheduler:
+    """
+    Dependency-graph executor for pipeline stages.
+
+    Each stage function receives a dict mapping its dependency names to
+    their results and returns its own result.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._stages: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._depends_on: Dict[str, List[str]] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = ()
+    ) -> "DAGScheduler":
+        """Register a stage and the stages it depends on."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = func
+        self._depends_on[name] = list(depends_on)
+        return self
+
+    @property
+    def stage_names(self) -> List[str]:
+        """Registered stage names in insertion order."""
+        return list(self._stages)
+
+    def dependencies(self, name: str) -> List[str]:
+        """Declared dependencies of a stage."""
+        return list(self._depends_on[name])
+
+    def _validate(self, selected: List[str]) -> None:
+        """Reject unknown stages and dependency cycles."""
+        for name in selected:
+            for dep in self._depends_on[name]:
+                if dep not in self._stages:
+                    raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage {name}")
+            visiting.add(name)
+            for dep in self._depends_on[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in selected:
+            visit(name)
+
+    def run(
+        self,
+        stages: Optional[Iterable[str]] = None,
+        results: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute stages as soon as their dependencies complete.
+
+        Args:
+            stages: Subset of stages to run (default: all). Dependencies
+                outside the subset are treated as already satisfied.
+            results: Results of stages completed earlier, passed to
+                dependents that are run now
+
+        Returns:
+            dict: results, timings, critical_path, critical_path_seconds,
+            wall_seconds and sum_seconds
+
+        Raises:
+            StageFailedError: If any stage raised; dependents are skipped
+        """
+        selected = list(stages) if stages is not None else self.stage_names
+        self._validate(selected)
+        results = dict(results or {})
+        pending = {
+            name: {dep for dep in self._depends_on[name] if dep in selected}
+            for name in selected
+        }
+        timings: Dict[str, Dict[str, float]] = {}
+        failures: Dict[str, BaseException] = {}
+        skipped: List[str] = []
+        run_started = time.perf_counter()
+
+        def execute(name):
+            inputs = {dep: results.get(dep) for dep in self._depends_on[name]}
+            started = time.perf_counter()
+            try:
+                return self._stages[name](inputs)
+            finally:
+                timings[name] = {
+                    "start": started - run_started,
+                    "end": time.perf_counter() - run_started,
+                }
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running: Dict[concurrent.futures.Future, str] = {}
+
+            def submit_ready():
+                for name in [n for n, deps in pending.items() if not deps]:
+                    del pending[name]
+                    logger.info(f"▶️  Stage started: {name}")
+                    running[pool.submit(execute, name)] = name
+
+            submit_ready()
+            while running:
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        duration = timings[name]["end"] - timings[name]["start"]
+                        logger.info(f"✅ Stage finished: {name} ({duration:.2f}s)")
+                        for deps in pending.values():
+                            deps.discard(name)
+                    except Exception as e:
+                        logger.error(f"❌ Stage failed: {name}: {e}")
+                        failures[name] = e
+                        skipped.extend(self._drop_dependents(name, pending))
+                submit_ready()
+
+        report = self._report(selected, results, timings, run_started)
+        report["skipped"] = skipped
+        if failures:
+            raise StageFailedError(failures, report)
+        return report
+
+    def _drop_dependents(self, failed: str, pending: Dict[str, set]) -> List[str]:
+        """Remove every pending stage that (transitively) depends on a failed one."""
+        dropped, frontier = [], [failed]
+        while frontier:
+            current = frontier.pop()
+            for name in [n for n in pending if current in self._depends_on[n]]:
+                del pending[name]
+                dropped.append(name)
+                frontier.append(name)
+        for name in dropped:
+            logger.warning(f"⏭️  Stage skipped: {name} (depends on failed {failed})")
+        return dropped
+
+    def _report(
+        self,
+        selected: List[str],
+        results: Dict[str, Any],
+        timings: Dict[str, Dict[str, float]],
+        run_started: float
+    ) -> Dict[str, Any]:
+        """Build the run report including the critical path."""
+        durations = {
+            name: t["end"] - t["start"] for name, t in timings.items()
+        }
+
+        # Longest chain of completed stages by summed duration
+        best: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+
+        def longest(name):
+            if name in best:
+                return best[name]
+            deps = [d for d in self._depends_on[name] if d in durations]
+            chain_dep = max(deps, key=longest, default=None)
+            prev[name] = chain_dep
+            best[name] = durations[name] + (longest(chain_dep) if chain_dep else 0.0)
+            return best[name]
+
+        path: List[str] = []
+        if durations:
+            node = max(durations, key=longest)
+            while node:
+                path.append(node)
+                node = prev[node]
+            path.reverse()
+
+        return {
+            "results": {name: results.get(name) for name in selected},
+            "timings": {name: round(d, 3) for name, d in durations.items()},
+            "critical_path": path,
+            "critical_path_seconds": round(sum(durations[n] for n in path), 3),
+            "wall_seconds": round(time.perf_counter() - run_started, 3),
+            "sum_seconds": round(sum(durations.values()), 3),
+        }
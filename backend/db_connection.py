@@ -1,63 +1,1166 @@
 """
-SURF Customer Feedback Agent - Database Connection Module (Mock)
-================================================================
-Mock database module for testing without PostgreSQL.
+SURF Customer Feedback Agent - Database Connection Module
+=========================================================
+Handles PostgreSQL database connections using a psycopg3 connection pool.
+
+Pool sizing is read from the environment:
+    DB_POOL_MIN_SIZE      - connections kept open at all times (default: 1)
+    DB_POOL_MAX_SIZE      - hard cap on open connections (default: 10)
+    DB_POOL_TIMEOUT       - seconds to wait for a free connection (default: 30)
+    DB_POOL_MAX_LIFETIME  - seconds before a connection is recycled (default: 3600)
+    DB_POOL_MAX_IDLE      - seconds an idle connection above min_size is kept (default: 600)
 """
 
 import os
+import json
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
 from contextlib import contextmanager
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
 from dotenv import load_dotenv
 
+from backend.metrics import metrics, pool_collector
+
+# Load environment variables
 load_dotenv()
+
+# Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# LISTEN/NOTIFY channel for dashboard events (see backend/events.py)
+EVENTS_CHANNEL = "surf_events"
+
+# LISTEN/NOTIFY channel that wakes the Slack delivery worker
+OUTBOX_CHANNEL = "surf_outbox"
+
+
+def get_db_config() -> Dict[str, Any]:
+    """Build psycopg connection keyword arguments from the environment."""
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "5432")),
+        "dbname": os.getenv("DB_NAME", "surf_feedback_db"),
+        "user": os.getenv("DB_USER", "surf_user"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        # Naive TIMESTAMP columns hold UTC, whether set by Python or by
+        # CURRENT_TIMESTAMP/LOCALTIMESTAMP defaults
+        "options": "-c timezone=UTC",
+    }
+
+
+# Scored feedback ranked within its near-duplicate cluster (rows without
+# a cluster are their own cluster)
+_TOP_CLUSTERS_SQL = """
+    WITH top_clusters AS (
+        SELECT id, raw_text, source, category,
+               severity_volume_score AS score, metadata,
+               COUNT(*) OVER cluster AS cluster_size,
+               ROW_NUMBER() OVER (
+                   cluster ORDER BY severity_volume_score DESC, id ASC
+               ) AS rank_in_cluster
+        FROM raw_feedback
+        WHERE processed = TRUE AND severity_volume_score > 0
+        WINDOW cluster AS (PARTITION BY COALESCE(cluster_id, id))
+    )
+"""
+
+
+class DatabaseConnection:
+    """
+    Manages PostgreSQL database connections with connection pooling.
+    """
+
+    _pool: Optional[ConnectionPool] = None
+    _lock = threading.Lock()
+
+    # Acquire latency counters (seconds), reported by get_pool_stats()
+    _acquire_count: int = 0
+    _acquire_total: float = 0.0
+    _acquire_max: float = 0.0
+
+    @classmethod
+    def initialize_pool(
+        cls,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Initialize the connection pool.
+
+        Args:
+            min_size: Minimum open connections (default: DB_POOL_MIN_SIZE)
+            max_size: Maximum open connections (default: DB_POOL_MAX_SIZE)
+            timeout: Seconds to wait for a connection (default: DB_POOL_TIMEOUT)
+        """
+        with cls._lock:
+            if cls._pool is not None:
+                return
+
+            min_size = min_size if min_size is not None else int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+            max_size = max_size if max_size is not None else int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+            timeout = timeout if timeout is not None else float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+            try:
+                pool = ConnectionPool(
+                    kwargs=get_db_config(),
+                    min_size=min_size,
+                    max_size=max(min_size, max_size),
+                    timeout=timeout,
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+                    max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+                    check=ConnectionPool.check_connection,
+                    name="surf",
+                    open=False
+                )
+                pool.open(wait=True, timeout=timeout)
+                cls._pool = pool
+                logger.info(
+                    f"✅ Database connection pool initialized "
+                    f"(min={min_size}, max={max(min_size, max_size)})"
+                )
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize database pool: {e}")
+                raise
+
+    @classmethod
+    @contextmanager
+    def get_connection(cls):
+        """
+        Context manager for database connections.
+        Commits on success, rolls back on error and returns the
+        connection to the pool afterwards.
+        """
+        if cls._pool is None:
+            cls.initialize_pool()
+
+        started = time.perf_counter()
+        with cls._pool.connection() as conn:
+            cls._record_acquire(time.perf_counter() - started)
+            yield conn
+
+    @classmethod
+    def _record_acquire(cls, elapsed: float) -> None:
+        """Record how long a caller waited for a pooled connection."""
+        with cls._lock:
+            cls._acquire_count += 1
+            cls._acquire_total += elapsed
+            cls._acquire_max = max(cls._acquire_max, elapsed)
+        metrics.observe("surf_db_pool_acquire_seconds", elapsed, pool="pipeline")
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for sizing under load.
+
+        Returns:
+            dict: Pool size, in-use/idle/waiting counts and acquire latency
+        """
+        if cls._pool is None:
+            return {"initialized": False}
+
+        stats = cls._pool.get_stats()
+        pool_size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+
+        with cls._lock:
+            count = cls._acquire_count
+            avg_ms = (cls._acquire_total / count * 1000) if count else 0.0
+            max_ms = cls._acquire_max * 1000
+
+        return {
+            "initialized": True,
+            "min_size": stats.get("pool_min", cls._pool.min_size),
+            "max_size": stats.get("pool_max", cls._pool.max_size),
+            "size": pool_size,
+            "in_use": pool_size - available,
+            "idle": available,
+            "waiting": stats.get("requests_waiting", 0),
+            "acquire_count": count,
+            "acquire_avg_ms": round(avg_ms, 3),
+            "acquire_max_ms": round(max_ms, 3),
+            "acquire_timeouts": stats.get("requests_errors", 0),
+            "connections_opened": stats.get("connections_num", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+        }
+
+    @classmethod
+    def close_pool(cls) -> None:
+        """Close all connections in the pool."""
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.close()
+                cls._pool = None
+                cls._acquire_count = 0
+                cls._acquire_total = 0.0
+                cls._acquire_max = 0.0
+                logger.info("Database connection pool closed")
+
+
+metrics.register_collector(pool_collector("pipeline", lambda: DatabaseConnection._pool))
+
 
 class FeedbackDatabase:
-    """Mock database for testing."""
-    
-    def __init__(self):
-        self.host = os.getenv("DB_HOST", "localhost")
-        self.port = os.getenv("DB_PORT", "5432")
-        self.database = os.getenv("DB_NAME", "surf_feedback_db")
-        self.user = os.getenv("DB_USER", "surf_user")
-        self.password = os.getenv("DB_PASSWORD", "")
-        self._conn = None
-        logger.info("✅ Mock database initialized")
-    
-    def connect(self):
-        """Mock connect."""
-        self._conn = True
-        logger.info("✅ Mock database connected")
+    """
+    High-level database operations for feedback management.
+    """
+
+    @staticmethod
+    def connect() -> bool:
+        """Initialize the shared connection pool."""
+        DatabaseConnection.initialize_pool()
         return True
-    
-    def disconnect(self):
-        """Mock disconnect."""
-        self._conn = None
-        logger.info("Database disconnected")
-    
+
+    @staticmethod
+    def disconnect() -> None:
+        """Close the shared connection pool."""
+        DatabaseConnection.close_pool()
+
+    @staticmethod
     @contextmanager
-    def get_cursor(self):
-        """Mock cursor."""
-        yield None
-    
-    def get_unprocessed_feedback(self, limit: int = 10):
-        """Mock get feedback."""
-        return []
-    
-    def update_priority_score(self, feedback_id, category, score):
-        """Mock update."""
-        return True
-    
-    def save_prioritized_output(self, *args, **kwargs):
-        """Mock save."""
+    def get_cursor():
+        """Context manager yielding a dict-row cursor on a pooled connection."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                yield cur
+
+    @staticmethod
+    def insert_raw_feedback(raw_text: str, source: str, metadata: Optional[Dict] = None) -> int:
+        """Insert raw feedback and return the ID."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO raw_feedback (raw_text, source, metadata)
+                    VALUES (%s, %s, %s)
+                    RETURNING id
+                    """,
+                    (raw_text, source, Jsonb(metadata or {}))
+                )
+                feedback_id = cur.fetchone()[0]
+                logger.info(f"✅ Inserted feedback ID: {feedback_id}")
+                return feedback_id
+
+    @staticmethod
+    def copy_raw_feedback(
+        rows: Iterable[Tuple],
+        watermark: Optional[Tuple[str, str, str]] = None
+    ) -> int:
+        """
+        Bulk-load feedback with COPY.
+
+        Args:
+            rows: (raw_text, source, metadata) or (raw_text, source,
+                  metadata, created_at) tuples; consumed lazily
+            watermark: (source, scope, value) saved in the same transaction,
+                  e.g. an importer's checkpoint
+
+        Returns:
+            int: Number of rows loaded
+        """
+        count = 0
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                # What the column defaults would have been for this transaction
+                cur.execute("SELECT LOCALTIMESTAMP")
+                now = cur.fetchone()[0]
+                with cur.copy(
+                    "COPY raw_feedback (raw_text, source, metadata, created_at, updated_at) FROM STDIN"
+                ) as copy:
+                    for row in rows:
+                        created_at = row[3] if len(row) > 3 else None
+                        copy.write_row((row[0], row[1], json.dumps(row[2] or {}), created_at or now, now))
+                        count += 1
+                if watermark is not None:
+                    FeedbackDatabase._save_watermark(cur, *watermark)
+        logger.info(f"✅ Bulk-loaded {count} feedback items")
+        return count
+
+    @staticmethod
+    def _save_watermark(cur, source: str, scope: str, value: str) -> None:
+        cur.execute(
+            """
+            INSERT INTO ingest_watermarks (source, scope, watermark)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (source, scope) DO UPDATE
+            SET watermark = EXCLUDED.watermark,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (source, scope, value)
+        )
+
+    @staticmethod
+    def upsert_external_feedback(
+        source: str,
+        rows: List[Dict[str, Any]],
+        watermark: Optional[Tuple[str, str]] = None
+    ) -> Dict[str, int]:
+        """
+        Insert or update feedback synced from an external source.
+
+        Rows are matched on (source, external_id). Changed rows get the new
+        text and metadata and are queued for analysis (and re-clustering if
+        the text changed); unchanged rows are left alone.
+
+        Args:
+            source: raw_feedback.source, e.g. 'Notion'
+            rows: dicts with external_id, raw_text, metadata and created_at
+            watermark: (scope, value) saved in the same transaction
+
+        Returns:
+            dict: inserted, updated and unchanged counts
+        """
+        # ON CONFLICT can't touch a row twice per statement; the last copy wins
+        latest = {row["external_id"]: row for row in rows}
+        rows = list(latest.values())
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                if rows:
+                    cur.execute(
+                        """
+                        INSERT INTO raw_feedback (source, external_id, raw_text, metadata, created_at)
+                        SELECT %s, external_id, raw_text, metadata, COALESCE(created_at, LOCALTIMESTAMP)
+                        FROM unnest(%s::text[], %s::text[], %s::jsonb[], %s::timestamp[])
+                             AS t(external_id, raw_text, metadata, created_at)
+                        ON CONFLICT (source, external_id) WHERE external_id IS NOT NULL DO UPDATE
+                        SET raw_text = EXCLUDED.raw_text,
+                            metadata = EXCLUDED.metadata,
+                            updated_at = CURRENT_TIMESTAMP,
+                            processed = FALSE,
+                            cluster_id = CASE
+                                WHEN raw_feedback.raw_text IS DISTINCT FROM EXCLUDED.raw_text THEN NULL
+                                ELSE raw_feedback.cluster_id
+                            END
+                        WHERE raw_feedback.raw_text IS DISTINCT FROM EXCLUDED.raw_text
+                           OR raw_feedback.metadata IS DISTINCT FROM EXCLUDED.metadata
+                        RETURNING (xmax = 0) AS inserted
+                        """,
+                        (
+                            source,
+                            [str(row["external_id"]) for row in rows],
+                            [row["raw_text"] for row in rows],
+                            [Jsonb(row.get("metadata") or {}) for row in rows],
+                            [row.get("created_at") for row in rows],
+                        )
+                    )
+                    for (inserted,) in cur.fetchall():
+                        counts["inserted" if inserted else "updated"] += 1
+                    counts["unchanged"] = len(rows) - counts["inserted"] - counts["updated"]
+                if watermark is not None:
+                    FeedbackDatabase._save_watermark(cur, source, *watermark)
+        return counts
+
+    @staticmethod
+    def get_ingest_watermark(source: str, scope: str) -> Optional[str]:
+        """Saved sync position of a connector scope, or None."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT watermark FROM ingest_watermarks WHERE source = %s AND scope = %s",
+                    (source, scope)
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
+
+    @staticmethod
+    def save_ingest_watermark(source: str, scope: str, watermark: str) -> None:
+        """Save the sync position of a connector scope."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                FeedbackDatabase._save_watermark(cur, source, scope, watermark)
+
+    @staticmethod
+    def get_ingest_watermarks(source: str, scope_prefix: str) -> Dict[str, str]:
+        """Saved sync positions of every scope starting with a prefix."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT scope, watermark FROM ingest_watermarks
+                    WHERE source = %s AND starts_with(scope, %s)
+                    """,
+                    (source, scope_prefix)
+                )
+                return dict(cur.fetchall())
+
+    @staticmethod
+    def delete_ingest_watermarks(source: str, scope_prefix: str) -> int:
+        """Forget the sync positions of every scope starting with a prefix."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM ingest_watermarks WHERE source = %s AND starts_with(scope, %s)",
+                    (source, scope_prefix)
+                )
+                return cur.rowcount
+
+    @staticmethod
+    def get_unprocessed_feedback(limit: int = 10) -> List[Dict[str, Any]]:
+        """Get unprocessed feedback items."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text, source, metadata, created_at, cluster_id
+                    FROM raw_feedback
+                    WHERE processed = FALSE
+                    ORDER BY created_at ASC
+                    LIMIT %s
+                    """,
+                    (limit,)
+                )
+                results = cur.fetchall()
+                logger.info(f"📥 Retrieved {len(results)} unprocessed feedback items")
+                return results
+
+    @staticmethod
+    def update_feedback_analysis(
+        feedback_id: int,
+        category: str,
+        score: float,
+        processed: bool = True
+    ) -> None:
+        """Update feedback with category and score."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE raw_feedback
+                    SET category = %s,
+                        severity_volume_score = %s,
+                        processed = %s,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                    """,
+                    (category, score, processed, feedback_id)
+                )
+                logger.info(f"✅ Updated feedback ID {feedback_id}: {category}, score={score}")
+
+    @staticmethod
+    def update_feedback_analysis_batch(
+        updates: List[Dict[str, Any]],
+        processed: bool = True
+    ) -> List[int]:
+        """
+        Update category and score for many feedback items in one statement.
+
+        Args:
+            updates: Dicts with feedback_id, category and score
+            processed: Value to set on the processed flag
+
+        Returns:
+            list: IDs of the rows that were updated
+        """
+        if not updates:
+            return []
+
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE raw_feedback AS rf
+                    SET category = v.category,
+                        severity_volume_score = v.score,
+                        processed = %s,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM unnest(%s::int[], %s::text[], %s::float8[])
+                         AS v(id, category, score)
+                    WHERE rf.id = v.id
+                    RETURNING rf.id
+                    """,
+                    (
+                        processed,
+                        [u["feedback_id"] for u in updates],
+                        [u["category"] for u in updates],
+                        [u["score"] for u in updates],
+                    )
+                )
+                updated = [row[0] for row in cur.fetchall()]
+                logger.info(f"✅ Updated {len(updated)}/{len(updates)} feedback items")
+                return updated
+
+    @staticmethod
+    def get_feedback_by_ids(feedback_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get raw feedback rows for a list of IDs."""
+        if not feedback_ids:
+            return []
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text, source, category, metadata, created_at
+                    FROM raw_feedback
+                    WHERE id = ANY(%s)
+                    """,
+                    (list(feedback_ids),)
+                )
+                return cur.fetchall()
+
+    @staticmethod
+    def update_priority_score(feedback_id: int, category: str, score: float) -> bool:
+        """Update feedback category and score, marking it processed."""
+        FeedbackDatabase.update_feedback_analysis(feedback_id, category, score)
         return True
-    
-    def get_top_priorities(self, limit: int = 10):
-        """Mock priorities."""
-        return []
 
+    @staticmethod
+    def get_top_feedback(limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get top feedback items by severity_volume_score.
+
+        Near-duplicates are collapsed: each cluster contributes its
+        highest-scored item, with cluster_size reports behind it.
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    f"""
+                    {_TOP_CLUSTERS_SQL}
+                    SELECT id, raw_text, source, category, score, metadata,
+                           cluster_size
+                    FROM top_clusters
+                    WHERE rank_in_cluster = 1
+                    ORDER BY score DESC, id ASC
+                    LIMIT %s
+                    """,
+                    (limit,)
+                )
+                results = cur.fetchall()
+                logger.info(f"🔝 Retrieved top {len(results)} feedback items")
+                return results
+
+    @staticmethod
+    def insert_prioritized_output(
+        feedback_id: int,
+        title: str,
+        pre_mortem_forecast: str,
+        score: float,
+        team: str,
+        action_plan: Dict[str, Any],
+        priority_rank: int
+    ) -> int:
+        """Insert prioritized output."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO prioritized_output
+                    (feedback_id, title, pre_mortem_forecast, score, team,
+                     action_plan, priority_rank)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING id
+                    """,
+                    (feedback_id, title, pre_mortem_forecast, score, team,
+                     Jsonb(action_plan), priority_rank)
+                )
+                output_id = cur.fetchone()[0]
+                logger.info(f"✅ Inserted prioritized output ID: {output_id}")
+                return output_id
+
+    @staticmethod
+    def save_prioritized_output(*args, **kwargs) -> int:
+        """Alias for insert_prioritized_output()."""
+        return FeedbackDatabase.insert_prioritized_output(*args, **kwargs)
+
+    @staticmethod
+    def save_prioritized_report(
+        items: List[Dict[str, Any]],
+        message: Dict[str, Any],
+        channels: List[str]
+    ) -> Dict[str, List[int]]:
+        """
+        Insert prioritized output and queue its Slack delivery atomically.
+
+        The prioritized_output rows and one slack_outbox row per channel are
+        written in a single transaction, so a report is never delivered
+        without being stored, or stored without being queued.
+
+        Args:
+            items: Prioritized items (feedback_id, title, pre_mortem_forecast,
+                score, team, action_plan, rank)
+            message: Delivery payload stored in the outbox
+            channels: Slack channels ('webhook' for the incoming webhook)
+
+        Returns:
+            dict: output_ids and outbox_ids
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO prioritized_output
+                    (feedback_id, title, pre_mortem_forecast, score, team,
+                     action_plan, priority_rank)
+                    SELECT feedback_id, title, forecast, score, team, action_plan, rank
+                    FROM unnest(%s::int[], %s::text[], %s::text[], %s::float8[],
+                                %s::text[], %s::jsonb[], %s::int[])
+                         WITH ORDINALITY
+                         AS t(feedback_id, title, forecast, score, team, action_plan, rank, position)
+                    ORDER BY position
+                    RETURNING id
+                    """,
+                    (
+                        [item.get("feedback_id") for item in items],
+                        [str(item.get("title") or "Untitled Feedback")[:500] for item in items],
+                        [item.get("pre_mortem_forecast") for item in items],
+                        [float(item.get("score") or 0.0) for item in items],
+                        [item.get("team") for item in items],
+                        [Jsonb(item.get("action_plan") or {}) for item in items],
+                        [item.get("rank") for item in items],
+                    )
+                )
+                output_ids = sorted(row[0] for row in cur.fetchall())
+                cur.execute(
+                    """
+                    INSERT INTO slack_outbox (output_ids, channel, payload)
+                    SELECT %s, channel, %s FROM unnest(%s::text[]) AS t(channel)
+                    RETURNING id
+                    """,
+                    (output_ids, Jsonb(message), list(channels))
+                )
+                outbox_ids = [row[0] for row in cur.fetchall()]
+                # Wake the delivery worker once this commits
+                cur.execute("SELECT pg_notify(%s, '')", (OUTBOX_CHANNEL,))
+        logger.info(
+            f"✅ Saved {len(output_ids)} prioritized items and queued "
+            f"{len(outbox_ids)} Slack deliveries"
+        )
+        return {"output_ids": output_ids, "outbox_ids": outbox_ids}
+
+    @staticmethod
+    def claim_outbox_batch(limit: int = 10, lease_seconds: float = 300) -> List[Dict[str, Any]]:
+        """
+        Claim due outbox rows for delivery.
+
+        Claiming pushes next_attempt_at out by the lease, so rows a crashed
+        worker claimed are retried after the lease, and concurrent workers
+        skip each other's rows.
+
+        Returns:
+            list: Dicts with id, output_ids, channel, payload and attempts
+            (including this one)
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    UPDATE slack_outbox
+                    SET attempts = attempts + 1,
+                        next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                    WHERE id IN (
+                        SELECT id FROM slack_outbox
+                        WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                        ORDER BY next_attempt_at, id
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, output_ids, channel, payload, attempts
+                    """,
+                    (lease_seconds, limit)
+                )
+                return sorted(cur.fetchall(), key=lambda row: row["id"])
+
+    @staticmethod
+    def finish_outbox_batch(
+        delivered: List[Dict[str, Any]],
+        failed: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Record the outcome of a claimed outbox batch in one transaction.
+
+        Args:
+            delivered: Dicts with id, status ('sent' or 'logged') and
+                output_ids; 'sent' also marks the outputs slack_delivered
+            failed: Dicts with id, error and retry_in (seconds, or None to
+                give up)
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                if delivered:
+                    cur.execute(
+                        """
+                        UPDATE slack_outbox o
+                        SET status = d.status, sent_at = CURRENT_TIMESTAMP, last_error = NULL
+                        FROM unnest(%s::int[], %s::text[]) AS d(id, status)
+                        WHERE o.id = d.id
+                        """,
+                        ([row["id"] for row in delivered], [row["status"] for row in delivered])
+                    )
+                    sent_outputs = sorted({
+                        output_id for row in delivered if row["status"] == "sent"
+                        for output_id in row["output_ids"]
+                    })
+                    if sent_outputs:
+                        cur.execute(
+                            """
+                            UPDATE prioritized_output
+                            SET slack_delivered = TRUE,
+                                slack_delivered_at = CURRENT_TIMESTAMP
+                            WHERE id = ANY(%s) AND NOT COALESCE(slack_delivered, FALSE)
+                            """,
+                            (sent_outputs,)
+                        )
+                if failed:
+                    cur.execute(
+                        """
+                        UPDATE slack_outbox o
+                        SET status = CASE WHEN f.retry_in IS NULL THEN 'failed' ELSE 'pending' END,
+                            next_attempt_at = CURRENT_TIMESTAMP
+                                + make_interval(secs => COALESCE(f.retry_in, 0)),
+                            last_error = f.error
+                        FROM unnest(%s::int[], %s::text[], %s::float8[]) AS f(id, error, retry_in)
+                        WHERE o.id = f.id
+                        """,
+                        (
+                            [row["id"] for row in failed],
+                            [row["error"] for row in failed],
+                            [row["retry_in"] for row in failed],
+                        )
+                    )
+
+    @staticmethod
+    def get_outbox_counts() -> Dict[str, int]:
+        """Count outbox rows per status."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT status, COUNT(*) FROM slack_outbox GROUP BY status")
+                return {status: count for status, count in cur.fetchall()}
+
+    @staticmethod
+    def get_top_priorities(limit: int = 10) -> List[Dict[str, Any]]:
+        """Get prioritized output rows ordered by rank."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, feedback_id, title, pre_mortem_forecast, score,
+                           team, action_plan, priority_rank, created_at
+                    FROM prioritized_output
+                    ORDER BY priority_rank ASC, score DESC
+                    LIMIT %s
+                    """,
+                    (limit,)
+                )
+                return cur.fetchall()
+
+    @staticmethod
+    def mark_slack_delivered(output_id: int) -> None:
+        """Mark output as delivered to Slack."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE prioritized_output
+                    SET slack_delivered = TRUE,
+                        slack_delivered_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                    """,
+                    (output_id,)
+                )
+                logger.info(f"✅ Marked output ID {output_id} as delivered to Slack")
+
+    @staticmethod
+    def get_all_raw_feedback() -> List[Dict[str, Any]]:
+        """Get all raw feedback for initial ingestion."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text, source, metadata, created_at
+                    FROM raw_feedback
+                    ORDER BY created_at ASC
+                    """
+                )
+                results = cur.fetchall()
+                logger.info(f"📥 Retrieved {len(results)} total feedback items")
+                return results
+
+    @staticmethod
+    def iter_raw_feedback(
+        after_id: int = 0,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream raw feedback in id order with constant memory.
+
+        Uses a named server-side cursor, so only one chunk is held in
+        memory at a time. The pooled connection is held until the
+        generator is exhausted or closed.
+
+        Args:
+            after_id: Only rows with id > after_id are returned
+            chunk_size: Rows fetched from the server per chunk
+
+        Yields:
+            list: Chunks of at most chunk_size rows
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(
+                name="surf_raw_feedback_stream",
+                row_factory=dict_row
+            ) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text, source, metadata, created_at
+                    FROM raw_feedback
+                    WHERE id > %s
+                    ORDER BY id ASC
+                    """,
+                    (after_id,)
+                )
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    @staticmethod
+    def get_raw_feedback_page(
+        after_id: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Get one keyset-paginated page of raw feedback.
+
+        Args:
+            after_id: Continuation token from the previous page (0 to start)
+            limit: Maximum rows in the page
+
+        Returns:
+            dict: items and next_after_id (None on the last page)
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text, source, metadata, created_at
+                    FROM raw_feedback
+                    WHERE id > %s
+                    ORDER BY id ASC
+                    LIMIT %s
+                    """,
+                    (after_id, limit + 1)
+                )
+                rows = cur.fetchall()
+
+        has_more = len(rows) > limit
+        items = rows[:limit]
+        logger.info(f"📥 Retrieved page of {len(items)} feedback items after ID {after_id}")
+        return {
+            "items": items,
+            "next_after_id": items[-1]["id"] if has_more else None
+        }
+
+    @staticmethod
+    def get_feedback_source_counts() -> Dict[str, int]:
+        """Count raw feedback rows per source."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT source, COUNT(*)
+                    FROM raw_feedback
+                    GROUP BY source
+                    ORDER BY COUNT(*) DESC
+                    """
+                )
+                return {row[0]: row[1] for row in cur.fetchall()}
+
+    @staticmethod
+    def get_last_pipeline_run(mode: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the most recent completed or skipped pipeline run."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, mode, status, started_at, finished_at,
+                           watermark, delta_count, top_signature, stages
+                    FROM pipeline_runs
+                    WHERE status IN ('completed', 'skipped')
+                      AND (%s::text IS NULL OR mode = %s::text)
+                    ORDER BY finished_at DESC
+                    LIMIT 1
+                    """,
+                    (mode, mode)
+                )
+                return cur.fetchone()
+
+    @staticmethod
+    def start_pipeline_run(mode: str = "full") -> int:
+        """Record the start of a pipeline run and return its ID."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO pipeline_runs (mode) VALUES (%s) RETURNING id",
+                    (mode,)
+                )
+                return cur.fetchone()[0]
+
+    @staticmethod
+    def finish_pipeline_run(
+        run_id: int,
+        status: str,
+        delta_count: int = 0,
+        top_signature: Optional[str] = None,
+        stages: Optional[List[str]] = None
+    ) -> None:
+        """
+        Record the outcome of a pipeline run.
+
+        The watermark is taken as max(raw_feedback.updated_at) at this
+        point, i.e. after the run's own writes.
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE pipeline_runs
+                    SET status = %s,
+                        finished_at = CURRENT_TIMESTAMP,
+                        watermark = (SELECT MAX(updated_at) FROM raw_feedback),
+                        delta_count = %s,
+                        top_signature = %s,
+                        stages = %s
+                    WHERE id = %s
+                    """,
+                    (status, delta_count, top_signature, Jsonb(stages or []), run_id)
+                )
+
+    @staticmethod
+    def publish_event(event_type: str, payload: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Publish a dashboard event on the surf_events channel.
+
+        Listeners receive it when the publishing transaction commits.
+        Payloads must stay under Postgres' 8000-byte NOTIFY limit.
+        """
+        message = json.dumps({"type": event_type, **(payload or {})}, default=str)
+        with DatabaseConnection.get_connection() as conn:
+            conn.execute("SELECT pg_notify(%s, %s)", (EVENTS_CHANNEL, message))
+
+    @staticmethod
+    def count_feedback_delta(watermark=None) -> Dict[str, int]:
+        """
+        Count feedback waiting for analysis.
+
+        Args:
+            watermark: Previous run's watermark; rows created after it are new
+
+        Returns:
+            dict: pending (unprocessed), new (created after the watermark)
+            and changed (pending rows that already existed)
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT COUNT(*),
+                           COUNT(*) FILTER (
+                               WHERE %s::timestamp IS NULL OR created_at > %s::timestamp
+                           )
+                    FROM raw_feedback
+                    WHERE processed = FALSE
+                    """,
+                    (watermark, watermark)
+                )
+                pending, new = cur.fetchone()
+        return {"pending": pending, "new": new, "changed": pending - new}
+
+    @staticmethod
+    def get_top_candidate_signature(limit: int = 3) -> str:
+        """
+        Hash the current top-N candidate set (id, category, score).
+
+        Two runs with the same signature would hand the Prioritizer
+        identical input.
+        """
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    {_TOP_CLUSTERS_SQL}
+                    SELECT id, category, ROUND(score::numeric, 2)
+                    FROM top_clusters
+                    WHERE rank_in_cluster = 1
+                    ORDER BY score DESC, id ASC
+                    LIMIT %s
+                    """,
+                    (limit,)
+                )
+                rows = cur.fetchall()
+        canonical = "|".join(f"{r[0]}:{r[1]}:{r[2]}" for r in rows)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_unclustered_feedback(limit: int = 5000) -> List[Dict[str, Any]]:
+        """Get feedback rows that have no near-duplicate cluster yet."""
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT id, raw_text
+                    FROM raw_feedback
+                    WHERE cluster_id IS NULL
+                    ORDER BY id ASC
+                    LIMIT %s
+                    """,
+                    (limit,)
+                )
+                return cur.fetchall()
+
+    @staticmethod
+    def get_lsh_candidates(bands: List[int], buckets: List[int]) -> List[Dict[str, Any]]:
+        """
+        Get clustered feedback sharing any of the given LSH buckets.
+
+        Args:
+            bands: Band number per bucket
+            buckets: Bucket hash per band (parallel to bands)
+
+        Returns:
+            list: Dicts with feedback_id, cluster_id and signature of each
+            cluster representative found in those buckets
+        """
+        if not buckets:
+            return []
+
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    """
+                    SELECT DISTINCT m.feedback_id, b.cluster_id, m.signature
+                    FROM feedback_lsh_buckets b
+                    JOIN unnest(%s::smallint[], %s::bigint[]) AS q(band, bucket)
+                      ON b.band = q.band AND b.bucket = q.bucket
+                    JOIN feedback_minhash m ON m.feedback_id = b.feedback_id
+                    """,
+                    (bands, buckets)
+                )
+                return cur.fetchall()
+
+    @staticmethod
+    def save_feedback_clusters(assignments: List[Dict[str, Any]]) -> int:
+        """
+        Store cluster ids, MinHash signatures and LSH buckets in one transaction.
+
+        Args:
+            assignments: Dicts with feedback_id, cluster_id, signature
+                (bytes or None) and band_hashes (the buckets this row
+                represents its cluster in)
+
+        Returns:
+            int: Number of feedback rows updated
+        """
+        if not assignments:
+            return 0
+
+        ids = [a["feedback_id"] for a in assignments]
+        signed = [a for a in assignments if a["signature"] is not None]
+        bucket_rows = [
+            (band, bucket, a["cluster_id"], a["feedback_id"])
+            for a in signed
+            for band, bucket in a["band_hashes"]
+        ]
+
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM feedback_lsh_buckets WHERE feedback_id = ANY(%s)",
+                    (ids,)
+                )
+                cur.execute(
+                    """
+                    INSERT INTO feedback_minhash (feedback_id, signature)
+                    SELECT * FROM unnest(%s::int[], %s::bytea[])
+                    ON CONFLICT (feedback_id) DO UPDATE
+                    SET signature = EXCLUDED.signature,
+                        created_at = CURRENT_TIMESTAMP
+                    """,
+                    ([a["feedback_id"] for a in signed], [a["signature"] for a in signed])
+                )
+                cur.execute(
+                    """
+                    INSERT INTO feedback_lsh_buckets (band, bucket, cluster_id, feedback_id)
+                    SELECT * FROM unnest(%s::smallint[], %s::bigint[], %s::int[], %s::int[])
+                    ON CONFLICT (band, bucket, cluster_id) DO NOTHING
+                    """,
+                    (
+                        [r[0] for r in bucket_rows],
+                        [r[1] for r in bucket_rows],
+                        [r[2] for r in bucket_rows],
+                        [r[3] for r in bucket_rows],
+                    )
+                )
+                cur.execute(
+                    """
+                    UPDATE raw_feedback AS rf
+                    SET cluster_id = v.cluster_id
+                    FROM unnest(%s::int[], %s::int[]) AS v(id, cluster_id)
+                    WHERE rf.id = v.id
+                    """,
+                    (ids, [a["cluster_id"] for a in assignments])
+                )
+                return cur.rowcount
+
+    @staticmethod
+    def get_cluster_sizes(cluster_ids: List[int]) -> Dict[int, int]:
+        """Count the feedback items in each of the given clusters."""
+        cluster_ids = [c for c in set(cluster_ids) if c is not None]
+        if not cluster_ids:
+            return {}
+
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT cluster_id, COUNT(*)
+                    FROM raw_feedback
+                    WHERE cluster_id = ANY(%s)
+                    GROUP BY cluster_id
+                    """,
+                    (cluster_ids,)
+                )
+                return dict(cur.fetchall())
+
+    @staticmethod
+    def propagate_cluster_analysis(feedback_ids: List[int]) -> int:
+        """
+        Copy category and score from reviewed items to the unprocessed
+        near-duplicates in their clusters.
+
+        Args:
+            feedback_ids: Reviewed (representative) feedback IDs
+
+        Returns:
+            int: Number of duplicates updated
+        """
+        if not feedback_ids:
+            return 0
 
-DatabaseConnection = FeedbackDatabase
+        with DatabaseConnection.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE raw_feedback AS dup
+                    SET category = rep.category,
+                        severity_volume_score = rep.severity_volume_score,
+                        processed = TRUE,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM raw_feedback AS rep
+                    WHERE rep.id = ANY(%s)
+                      AND rep.cluster_id IS NOT NULL
+                      AND dup.cluster_id = rep.cluster_id
+                      AND dup.id <> rep.id
+                      AND dup.processed = FALSE
+                    """,
+                    (list(feedback_ids),)
+                )
+                if cur.rowcount:
+                    logger.info(f"🧬 Applied review results to {cur.rowcount} near-duplicates")
+                return cur.rowcount
@@ -0,0 +1,240 @@
+"""
+SURF Customer Feedback Agent - Near-Duplicate Clustering
+========================================================
+MinHash/LSH index over raw_feedback.raw_text that groups reports of the
+same issue across Slack, Email, Notion and Survey sources.
+
+Each row gets a MinHash signature of its word shingles. Signatures are
+split into LSH bands; rows sharing a band bucket are candidates, and a
+candidate whose estimated Jaccard similarity reaches DEDUP_THRESHOLD
+puts the new row in its cluster. Otherwise the row starts a new cluster
+whose id is its own feedback id. Signatures and buckets are stored, so
+new rows are clustered incrementally against everything seen before.
+
+Configuration:
+    DEDUP_ENABLED       - cluster feedback before scoring (default: true)
+    DEDUP_NUM_PERM      - MinHash permutations (default: 64)
+    DEDUP_BANDS         - LSH bands; must divide DEDUP_NUM_PERM (default: 16)
+    DEDUP_THRESHOLD     - minimum estimated Jaccard similarity (default: 0.5)
+    DEDUP_SHINGLE_SIZE  - words per shingle (default: 3)
+"""
+
+import os
+import zlib
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+from backend.db_connection import FeedbackDatabase
+from backend.llm_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+# Fixed seed so signatures are comparable across processes and runs
+_MINHASH_SEED = 20240501
+_MERSENNE_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def dedup_enabled() -> bool:
+    """Whether near-duplicate clustering is enabled."""
+    return os.getenv("DEDUP_ENABLED", "true").lower() != "false"
+
+
+class MinHasher:
+    """
+    Vectorized MinHash signatures and LSH band hashes for feedback text.
+    """
+
+    def __init__(
+        self,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        shingle_size: Optional[int] = None
+    ):
+        self.num_perm = num_perm or int(os.getenv("DEDUP_NUM_PERM", "64"))
+        self.bands = bands or int(os.getenv("DEDUP_BANDS", "16"))
+        self.shingle_size = shingle_size or int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+        if self.num_perm % self.bands:
+            raise ValueError("DEDUP_BANDS must divide DEDUP_NUM_PERM")
+        self.rows_per_band = self.num_perm // self.bands
+
+        # a*x + b stays below 2**64 for 32-bit x with a, b < 2**31
+        rng = np.random.RandomState(_MINHASH_SEED)
+        self._a = rng.randint(1, 2**31, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 2**31, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+        self._band_mix = rng.randint(1, 2**62, size=self.rows_per_band, dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text: Optional[str]) -> List[int]:
+        """32-bit hashes of the word shingles of a normalized text."""
+        words = normalize_text(text).split()
+        if len(words) <= self.shingle_size:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = [
+                " ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            ]
+        return list({zlib.crc32(gram.encode("utf-8")) for gram in grams})
+
+    def signatures(self, texts: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute MinHash signatures.
+
+        Returns:
+            tuple: (uint32 signature matrix of shape (n, num_perm),
+            bool mask of rows that had any shingles)
+        """
+        signatures = np.full((len(texts), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        has_shingles = np.zeros(len(texts), dtype=bool)
+        for i, text in enumerate(texts):
+            shingles = self.shingles(text)
+            if not shingles:
+                continue
+            x = np.array(shingles, dtype=np.uint64)[:, None]
+            hashed = (x * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+            signatures[i] = hashed.min(axis=0)
+            has_shingles[i] = True
+        return signatures.astype(np.uint32), has_shingles
+
+    def band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        Hash each LSH band of each signature.
+
+        Returns:
+            np.ndarray: int64 matrix of shape (n, bands)
+        """
+        banded = signatures.astype(np.uint64).reshape(-1, self.bands, self.rows_per_band)
+        # uint64 arithmetic wraps, which is what we want for mixing
+        with np.errstate(over="ignore"):
+            mixed = (banded * self._band_mix).sum(axis=2, dtype=np.uint64)
+        return mixed.view(np.int64)
+
+
+def estimate_similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity between one signature and many."""
+    return (others == signature).mean(axis=1)
+
+
+def assign_clusters(
+    limit: int = 5000,
+    threshold: Optional[float] = None,
+    hasher: Optional[MinHasher] = None
+) -> Dict[str, Any]:
+    """
+    Assign cluster ids to feedback rows that don't have one yet.
+
+    Args:
+        limit: Maximum number of rows to cluster in this call
+        threshold: Minimum estimated Jaccard similarity to join a cluster
+        hasher: MinHasher to use (default: configured from the environment)
+
+    Returns:
+        dict: clustered (rows assigned), joined (rows that joined an
+        existing cluster) and new_clusters
+    """
+    threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+    hasher = hasher or MinHasher()
+
+    rows = FeedbackDatabase.get_unclustered_feedback(limit=limit)
+    if not rows:
+        return {"clustered": 0, "joined": 0, "new_clusters": 0}
+
+    signatures, has_shingles = hasher.signatures([row["raw_text"] for row in rows])
+    band_hashes = hasher.band_hashes(signatures)
+
+    # Previously clustered rows sharing any bucket with this batch
+    lookup = band_hashes[has_shingles]
+    candidates = FeedbackDatabase.get_lsh_candidates(
+        np.tile(np.arange(hasher.bands), len(lookup)).tolist(),
+        lookup.ravel().tolist()
+    )
+
+    # (band, bucket) -> {cluster_id: position}; each cluster keeps one
+    # representative per bucket so popular issues don't grow the candidate
+    # lists, and identical signatures skip the comparison entirely
+    buckets: Dict[Tuple[int, int], Dict[int, int]] = {}
+    exact: Dict[bytes, int] = {}
+    known_signatures: List[np.ndarray] = []
+    known_clusters: List[int] = []
+
+    def index(signature, cluster_id, hashes) -> List[Tuple[int, int]]:
+        """Add a signature; return the buckets it now represents its cluster in."""
+        position = len(known_signatures)
+        known_signatures.append(signature)
+        known_clusters.append(cluster_id)
+        exact.setdefault(signature.tobytes(), cluster_id)
+        represented = []
+        for band, bucket in enumerate(hashes.tolist()):
+            members = buckets.setdefault((band, bucket), {})
+            if cluster_id not in members:
+                members[cluster_id] = position
+                represented.append((band, bucket))
+        return represented
+
+    for candidate in candidates:
+        signature = np.frombuffer(candidate["signature"], dtype=np.uint32)
+        if signature.shape[0] != hasher.num_perm:
+            continue  # stored with a different DEDUP_NUM_PERM
+        index(signature, candidate["cluster_id"], hasher.band_hashes(signature[None, :])[0])
+
+    assignments = []
+    joined = 0
+    for row, signature, hashes, usable in zip(rows, signatures, band_hashes, has_shingles):
+        cluster_id = row["id"]
+        represented: List[Tuple[int, int]] = []
+        if usable:
+            if signature.tobytes() in exact:
+                cluster_id = exact[signature.tobytes()]
+                joined += 1
+            else:
+                positions = sorted({
+                    position
+                    for band, bucket in enumerate(hashes.tolist())
+                    for position in buckets.get((band, bucket), {}).values()
+                })
+                if positions:
+                    similarity = estimate_similarity(
+                        signature, np.stack([known_signatures[p] for p in positions])
+                    )
+                    best = int(similarity.argmax())
+                    if similarity[best] >= threshold:
+                        cluster_id = known_clusters[positions[best]]
+                        joined += 1
+                represented = index(signature, cluster_id, hashes)
+
+        assignments.append({
+            "feedback_id": row["id"],
+            "cluster_id": cluster_id,
+            "signature": signature.tobytes() if represented else None,
+            "band_hashes": represented,
+        })
+
+    FeedbackDatabase.save_feedback_clusters(assignments)
+    logger.info(
+        f"🧬 Clustered {len(assignments)} feedback items: "
+        f"{joined} near-duplicates, {len(assignments) - joined} new clusters"
+    )
+    return {
+        "clustered": len(assignments),
+        "joined": joined,
+        "new_clusters": len(assignments) - joined,
+    }
+
+
+def cluster_pending_feedback(batch_size: int = 5000) -> Dict[str, Any]:
+    """
+    Cluster every feedback row that has no cluster yet, in batches.
+
+    Returns:
+        dict: Totals of clustered, joined and new_clusters
+    """
+    hasher = MinHasher()
+    totals = {"clustered": 0, "joined": 0, "new_clusters": 0}
+    while True:
+        batch = assign_clusters(limit=batch_size, hasher=hasher)
+        for key in totals:
+            totals[key] += batch[key]
+        if batch["clustered"] < batch_size:
+            return totals
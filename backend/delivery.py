@@ -0,0 +1,335 @@
+"""
+SURF Customer Feedback Agent - Slack Delivery Outbox
+====================================================
+Decouples Slack delivery from the pipeline with a transactional outbox.
+
+The pipeline's delivery stage parses the RetentionCriticAgent's report and
+commits the prioritized output together with one slack_outbox row per
+channel, then finishes. OutboxWorker drains the outbox in batches through
+the shared rate-limited Slack client, retrying failures with jittered
+exponential backoff and marking delivered outputs slack_delivered.
+
+Run the worker on its own:
+    python -m backend.delivery            # long-running, wakes on NOTIFY
+    python -m backend.delivery --once     # drain what is due and exit
+
+Configuration:
+    SLACK_DELIVERY_MODE      - 'outbox' (default) or 'inline' (the
+                               DelivererAgent posts during the run)
+    SLACK_CHANNEL            - comma-separated channels (default: #customer-feedback)
+    DELIVERY_DRAIN_ON_EXIT   - main.py drains the outbox after the run has
+                               been reported (default: true)
+    DELIVERY_BATCH_SIZE      - outbox rows claimed per batch (default: 10)
+    DELIVERY_MAX_ATTEMPTS    - attempts before a row is marked failed (default: 8)
+    DELIVERY_BACKOFF_MAX     - maximum seconds between attempts (default: 600)
+    DELIVERY_LEASE_SECONDS   - claim lease before a crashed worker's rows
+                               are retried (default: 300)
+    DELIVERY_POLL_SECONDS    - idle wait between checks (default: 30)
+"""
+
+import os
+import re
+import sys
+import json
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import psycopg
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db_connection import DatabaseConnection, FeedbackDatabase, OUTBOX_CHANNEL, get_db_config
+from backend.metrics import metrics
+from backend.slack_client import run_with_client
+
+logger = logging.getLogger(__name__)
+
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def delivery_mode() -> str:
+    """Configured Slack delivery mode ('outbox' or 'inline')."""
+    mode = os.getenv("SLACK_DELIVERY_MODE", "outbox").lower()
+    if mode not in ("outbox", "inline"):
+        raise ValueError(f"SLACK_DELIVERY_MODE must be 'outbox' or 'inline', got {mode!r}")
+    return mode
+
+
+def delivery_channels() -> List[str]:
+    """Outbox channels: the webhook if configured, else SLACK_CHANNEL."""
+    if os.getenv("SLACK_WEBHOOK_URL"):
+        return ["webhook"]
+    channels = os.getenv("SLACK_CHANNEL", "#customer-feedback")
+    return [channel.strip() for channel in channels.split(",") if channel.strip()]
+
+
+def _feedback_id(value: Any) -> Optional[int]:
+    """raw_feedback id from an LLM item: an int or a string of digits."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"feedback_id is not an integer: {value!r}")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, str) and re.fullmatch(r"\s*#?\d+\s*", value):
+        value = int(value.strip().lstrip("#"))
+    if not isinstance(value, int) or not 0 < value < 2 ** 31:
+        raise ValueError(f"feedback_id is not an integer: {value!r}")
+    return value
+
+
+def _text(value: Any, limit: Optional[int] = None) -> Optional[str]:
+    """Text column value; structured LLM output is stored as JSON."""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value)
+    return value[:limit] if limit else value
+
+
+def _clean_item(item: Any, position: int) -> Dict[str, Any]:
+    """
+    Coerce one prioritized item to the prioritized_output column types.
+
+    Raises:
+        ValueError: If the item isn't an object or its feedback_id or
+            score can't be used
+    """
+    if not isinstance(item, dict):
+        raise ValueError("not a JSON object")
+    try:
+        score = float(item.get("score") or 0.0)
+    except (TypeError, ValueError):
+        raise ValueError(f"score is not a number: {item.get('score')!r}")
+    try:
+        rank = int(item.get("rank") or position)
+    except (TypeError, ValueError):
+        rank = position
+    action_plan = item.get("action_plan") or {}
+    if not isinstance(action_plan, dict):
+        action_plan = {"plan": action_plan}
+    return {
+        "rank": rank,
+        "feedback_id": _feedback_id(item.get("feedback_id") or item.get("id")),
+        "title": _text(item.get("title"), 500) or "Untitled Feedback",
+        "category": _text(item.get("category"), 50),
+        "score": score,
+        "team": _text(item.get("team"), 100),
+        "pre_mortem_forecast": _text(item.get("pre_mortem_forecast")),
+        "action_plan": action_plan,
+    }
+
+
+def parse_report(text: Any) -> Dict[str, Any]:
+    """
+    Parse the risk assessment stage's report into a delivery message.
+
+    Items whose fields can't be stored (e.g. a feedback_id like "FB-12")
+    are dropped with a warning.
+
+    Raises:
+        ValueError: If the report has no JSON object with valid prioritized
+            items
+
+    Returns:
+        dict: items (with rank), total_analyzed, total_risk_estimate and
+        generated_at, shaped like the DelivererAgent's Slack payload
+    """
+    if isinstance(text, dict):
+        data = text
+    else:
+        match = _JSON_OBJECT.search(str(text or ""))
+        if not match:
+            raise ValueError("no JSON object in risk assessment output")
+        data = json.loads(match.group(0))
+
+    items = data.get("items") or data.get("top_items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("risk assessment output has no items")
+
+    prioritized = []
+    for position, item in enumerate(items, 1):
+        try:
+            prioritized.append(_clean_item(item, position))
+        except ValueError as e:
+            logger.warning(f"⚠️  Dropping prioritized item {position}: {e}")
+    if not prioritized:
+        raise ValueError("risk assessment output has no valid items")
+    return {
+        "items": prioritized,
+        "total_analyzed": data.get("total_analyzed", len(prioritized)),
+        "total_risk_estimate": data.get("total_risk_estimate"),
+        "generated_at": datetime.now().isoformat(),
+    }
+
+
+def enqueue_report(report: Any, channels: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Commit a risk-assessed report and queue its Slack delivery.
+
+    Returns:
+        dict: Delivery confirmation for the stage output
+    """
+    message = parse_report(report)
+    channels = channels or delivery_channels()
+    saved = FeedbackDatabase.save_prioritized_report(message["items"], message, channels)
+    return {
+        "slack_delivery_status": "queued",
+        "channels": channels,
+        "output_ids": saved["output_ids"],
+        "outbox_ids": saved["outbox_ids"],
+        "delivery_timestamp": message["generated_at"],
+        "final_payload": message,
+    }
+
+
+class OutboxWorker:
+    """
+    Drains slack_outbox in batches with retries and backoff.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        backoff_max: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None
+    ):
+        self.batch_size = batch_size or int(os.getenv("DELIVERY_BATCH_SIZE", "10"))
+        self.max_attempts = max_attempts or int(os.getenv("DELIVERY_MAX_ATTEMPTS", "8"))
+        self.backoff_max = backoff_max or float(os.getenv("DELIVERY_BACKOFF_MAX", "600"))
+        self.lease_seconds = lease_seconds or float(os.getenv("DELIVERY_LEASE_SECONDS", "300"))
+        self.poll_seconds = poll_seconds or float(os.getenv("DELIVERY_POLL_SECONDS", "30"))
+
+    def backoff(self, attempts: int) -> float:
+        """Jittered exponential delay before the next attempt."""
+        ceiling = min(self.backoff_max, 5.0 * 2 ** (attempts - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def _send_batch(self, client, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from backend.tools.slack_tool import slack_tool
+
+        async def send(row):
+            payload = slack_tool._format_message(row["payload"])
+            if row["channel"] == "webhook":
+                return await client.post_webhook(payload)
+            return await client.post_message(row["channel"], payload)
+
+        return list(await asyncio.gather(*(send(row) for row in rows), return_exceptions=True))
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        Claim and deliver one batch.
+
+        Returns:
+            dict: claimed, sent, logged (no Slack credentials), retrying and
+            failed counts
+        """
+        from backend.tools.slack_tool import slack_tool
+
+        rows = FeedbackDatabase.claim_outbox_batch(self.batch_size, self.lease_seconds)
+        counts = {"claimed": len(rows), "sent": 0, "logged": 0, "retrying": 0, "failed": 0}
+        if not rows:
+            return counts
+
+        delivered: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        if not (os.getenv("SLACK_WEBHOOK_URL") or os.getenv("SLACK_BOT_TOKEN")):
+            for row in rows:
+                slack_tool._log_locally(json.dumps(row["payload"], default=str), row["channel"])
+                delivered.append({"id": row["id"], "status": "logged", "output_ids": row["output_ids"]})
+        else:
+            results = run_with_client(lambda client: self._send_batch(client, rows))
+            for row, result in zip(rows, results):
+                if isinstance(result, dict) and result.get("success"):
+                    delivered.append({"id": row["id"], "status": "sent", "output_ids": row["output_ids"]})
+                    continue
+                error = result.get("error") if isinstance(result, dict) else f"{type(result).__name__}: {result}"
+                retry_in = self.backoff(row["attempts"]) if row["attempts"] < self.max_attempts else None
+                failed.append({"id": row["id"], "error": str(error)[:1000], "retry_in": retry_in})
+                if retry_in is None:
+                    logger.error(
+                        f"❌ Giving up on outbox {row['id']} to {row['channel']} "
+                        f"after {row['attempts']} attempts: {error}"
+                    )
+                else:
+                    logger.warning(
+                        f"⚠️  Outbox {row['id']} to {row['channel']} failed ({error}); "
+                        f"retry in {retry_in:.0f}s"
+                    )
+
+        FeedbackDatabase.finish_outbox_batch(delivered, failed)
+        for row in delivered:
+            counts[row["status"]] += 1
+        for row in failed:
+            counts["retrying" if row["retry_in"] is not None else "failed"] += 1
+        for status in ("sent", "logged", "retrying", "failed"):
+            if counts[status]:
+                metrics.inc("surf_outbox_deliveries_total", counts[status], status=status)
+        logger.info(
+            f"📬 Outbox batch: {counts['sent']} sent, {counts['logged']} logged, "
+            f"{counts['retrying']} retrying, {counts['failed']} failed"
+        )
+        return counts
+
+    def drain(self) -> Dict[str, int]:
+        """Deliver batches until nothing is due."""
+        totals = {"claimed": 0, "sent": 0, "logged": 0, "retrying": 0, "failed": 0}
+        while True:
+            counts = self.run_once()
+            for key in totals:
+                totals[key] += counts[key]
+            if counts["claimed"] < self.batch_size:
+                return totals
+
+    def run_forever(self, stop: Optional[threading.Event] = None) -> None:
+        """Drain whenever the outbox is notified, and every poll interval."""
+        stop = stop or threading.Event()
+        logger.info(f"📮 Slack delivery worker started (batch size {self.batch_size})")
+        while not stop.is_set():
+            try:
+                with psycopg.connect(**get_db_config(), autocommit=True) as conn:
+                    conn.execute(f"LISTEN {OUTBOX_CHANNEL}")
+                    while not stop.is_set():
+                        self.drain()
+                        # Wake on the next NOTIFY, or poll for due retries
+                        for _ in conn.notifies(timeout=self.poll_seconds, stop_after=1):
+                            pass
+            except Exception as e:
+                logger.error(f"❌ Delivery worker error: {e}; restarting in 5s")
+                stop.wait(5)
+
+
+def main():
+    """Run the Slack delivery worker."""
+    parser = argparse.ArgumentParser(description="SURF Slack delivery worker")
+    parser.add_argument("--once", action="store_true", help="Drain due deliveries and exit")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    DatabaseConnection.initialize_pool()
+    try:
+        worker = OutboxWorker()
+        if args.once:
+            totals = worker.drain()
+            print(f"📬 {totals['sent']} sent, {totals['logged']} logged, "
+                  f"{totals['retrying']} retrying, {totals['failed']} failed")
+        else:
+            worker.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        DatabaseConnection.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+SURF Customer Feedback Agent - Dashboard Event Stream
+=====================================================
+Fans Postgres notifications out to Server-Sent Events clients.
+
+The pipeline publishes progress events and prioritized_output triggers
+publish change events on the surf_events channel (see
+FeedbackDatabase.publish_event and bump_data_version in the schema). Each
+API process holds ONE listening connection and copies every notification
+into a bounded queue per connected client, so dashboards no longer poll.
+
+Configuration:
+    EVENTS_CLIENT_QUEUE_SIZE  - events buffered per client before the oldest
+                                are dropped (default: 100)
+    EVENTS_HEARTBEAT_SECONDS  - keep-alive comment interval (default: 15)
+    EVENTS_RECONNECT_SECONDS  - maximum delay between listener reconnects
+                                (default: 30)
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import psycopg
+
+from backend.db_connection import EVENTS_CHANNEL
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBroadcaster:
+    """
+    One LISTEN connection per process, fanned out to per-client queues.
+    """
+
+    def __init__(
+        self,
+        conninfo: Dict[str, Any],
+        channel: str = EVENTS_CHANNEL,
+        queue_size: Optional[int] = None,
+        reconnect_seconds: Optional[float] = None
+    ):
+        self.conninfo = conninfo
+        self.channel = channel
+        self.queue_size = queue_size or int(os.getenv("EVENTS_CLIENT_QUEUE_SIZE", "100"))
+        self.reconnect_seconds = reconnect_seconds or float(os.getenv("EVENTS_RECONNECT_SECONDS", "30"))
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self.connected = False
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        """Start listening in the background (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen(), name="surf-events-listener")
+
+    async def stop(self) -> None:
+        """Stop listening and release every client."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            self._put(queue, None)  # end of stream
+        self._subscribers.clear()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client; events arrive on the returned queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def broadcast(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Send an event to every connected client."""
+        self._next_id += 1
+        message = format_sse(event_type, data, self._next_id)
+        for queue in list(self._subscribers):
+            self._put(queue, message)
+        metrics.inc("surf_events_published_total", type=event_type)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, message: Optional[str]) -> None:
+        # A slow client loses its oldest events rather than stalling the rest
+        while True:
+            try:
+                queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                try:
+                    queue.get_nowait()
+                    metrics.inc("surf_events_dropped_total")
+                except asyncio.QueueEmpty:
+                    pass
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"⚠️  Ignoring malformed event payload: {payload[:200]}")
+            return
+        event_type = event.pop("type", "message")
+        self.broadcast(event_type, event)
+
+    async def _listen(self) -> None:
+        """LISTEN on the channel, reconnecting with backoff on failure."""
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    **self.conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    self.connected = True
+                    delay = 1.0
+                    logger.info(f"📡 Listening for dashboard events on '{self.channel}'")
+                    # Clients refetch after a reconnect, since events sent
+                    # while we were away are lost
+                    self.broadcast("listener_connected", {"channel": self.channel})
+                    async for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️  Event listener disconnected: {e}; retrying in {delay:.0f}s")
+            finally:
+                self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_seconds)
+
+    async def stream(self, heartbeat: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        SSE messages for one client, with keep-alive comments while idle.
+
+        Yields:
+            str: Encoded SSE messages until the broadcaster stops
+        """
+        heartbeat = heartbeat or float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+        queue = self.subscribe()
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(queue)
+
+
+def events_collector(get_broadcaster):
+    """Gauge collector for the connected SSE clients and listener state."""
+    def collect():
+        broadcaster = get_broadcaster()
+        if broadcaster is None:
+            return
+        yield "surf_events_clients", {}, broadcaster.client_count
+        yield "surf_events_listener_connected", {}, 1 if broadcaster.connected else 0
+    return collect
@@ -0,0 +1,347 @@
+"""
+SURF Customer Feedback Agent - Feedback Ingestion
+=================================================
+Validation and parsing shared by the write paths into raw_feedback
+(the bulk NDJSON endpoint, the live feedback endpoint and the importers),
+and the group-commit writer behind the live endpoint.
+
+GroupCommitWriter queues live feedback in a bounded in-process queue and
+inserts it in batches: a batch is committed when it reaches
+INGEST_BATCH_SIZE items or INGEST_BATCH_WAIT_MS after its first item,
+whichever comes first, and each caller is answered only after the commit.
+A full queue is refused immediately instead of piling onto Postgres.
+
+A feedback item is a JSON object:
+    raw_text    - feedback text (required)
+    source      - origin, e.g. 'Slack', 'Email', 'Notion', 'Survey' (required)
+    metadata    - object with structured extras, e.g. user_tier, urgency
+    created_at  - ISO 8601 timestamp of the original report (default: now);
+                  offsets are converted to UTC, naive values are taken as UTC
+
+Configuration:
+    INGEST_MAX_TEXT_CHARS  - longest accepted raw_text (default: 20000)
+    INGEST_MAX_LINE_BYTES  - longest accepted NDJSON line (default: 1048576)
+    INGEST_QUEUE_SIZE      - live items waiting for a commit before new ones
+                             are refused (default: 1000)
+    INGEST_BATCH_SIZE      - items per group commit (default: 200)
+    INGEST_BATCH_WAIT_MS   - longest wait for a batch to fill (default: 20)
+    INGEST_ACK_TIMEOUT     - seconds a caller waits for its commit (default: 10)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from psycopg.types.json import Jsonb
+
+from backend.db_connection import EVENTS_CHANNEL
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# raw_feedback.source is VARCHAR(100)
+MAX_SOURCE_CHARS = 100
+
+MAX_TEXT_CHARS = int(os.getenv("INGEST_MAX_TEXT_CHARS", "20000"))
+MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(1024 * 1024)))
+
+# (raw_text, source, metadata, created_at or None)
+FeedbackRow = Tuple[str, str, Dict[str, Any], Optional[datetime]]
+
+
+class FeedbackValidationError(ValueError):
+    """Raised for a feedback item that can't be stored."""
+
+
+class IngestQueueFull(RuntimeError):
+    """Raised when the live ingestion queue has no room."""
+
+
+class IngestUnavailable(RuntimeError):
+    """Raised when live feedback can't be committed (writer stopped or database error)."""
+
+
+def _contains_nul(value: Any) -> bool:
+    """Whether a JSON value has a NUL character in any key or string."""
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_contains_nul(k) or _contains_nul(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_contains_nul(v) for v in value)
+    return False
+
+
+def validate_feedback(item: Any) -> FeedbackRow:
+    """
+    Validate one feedback item.
+
+    Raises:
+        FeedbackValidationError: With a message naming the bad field
+
+    Returns:
+        tuple: (raw_text, source, metadata, created_at or None)
+    """
+    if not isinstance(item, dict):
+        raise FeedbackValidationError("item must be a JSON object")
+
+    raw_text = item.get("raw_text")
+    if not isinstance(raw_text, str) or not raw_text.strip():
+        raise FeedbackValidationError("raw_text must be a non-empty string")
+    if len(raw_text) > MAX_TEXT_CHARS:
+        raise FeedbackValidationError(f"raw_text is longer than {MAX_TEXT_CHARS} characters")
+    if "\x00" in raw_text:
+        raise FeedbackValidationError("raw_text contains a NUL character")
+
+    source = item.get("source")
+    if not isinstance(source, str) or not source.strip():
+        raise FeedbackValidationError("source must be a non-empty string")
+    if len(source) > MAX_SOURCE_CHARS:
+        raise FeedbackValidationError(f"source is longer than {MAX_SOURCE_CHARS} characters")
+    if "\x00" in source:
+        raise FeedbackValidationError("source contains a NUL character")
+
+    metadata = item.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        raise FeedbackValidationError("metadata must be a JSON object")
+    # Postgres jsonb has no NaN/Infinity and no \u0000; catch them here
+    # rather than failing the COPY they would be part of
+    try:
+        encoded = json.dumps(metadata, allow_nan=False)
+    except (TypeError, ValueError) as e:
+        raise FeedbackValidationError(f"metadata is not valid JSON for storage: {e}")
+    if "\\u0000" in encoded and _contains_nul(metadata):
+        raise FeedbackValidationError("metadata contains a NUL character")
+
+    created_at = item.get("created_at")
+    if created_at is not None:
+        if not isinstance(created_at, str):
+            raise FeedbackValidationError("created_at must be an ISO 8601 string")
+        try:
+            created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            raise FeedbackValidationError(f"created_at is not ISO 8601: {created_at!r}")
+        if created_at.tzinfo is not None:
+            # raw_feedback stores naive UTC timestamps
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return raw_text, source.strip(), metadata, created_at
+
+
+def parse_ndjson_line(line: bytes) -> FeedbackRow:
+    """Parse and validate one NDJSON line."""
+    try:
+        item = json.loads(line)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise FeedbackValidationError(f"invalid JSON: {e}")
+    return validate_feedback(item)
+
+
+def _split_lines(buffer: bytearray, final: bool = False) -> Iterator[bytes]:
+    while True:
+        newline = buffer.find(b"\n")
+        if newline < 0:
+            break
+        line = bytes(buffer[:newline])
+        del buffer[:newline + 1]
+        yield line
+    if final and buffer:
+        yield bytes(buffer)
+        buffer.clear()
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a streamed body into NDJSON lines as it arrives.
+
+    Blank lines are skipped but still counted, so line numbers match the
+    file.
+
+    Raises:
+        FeedbackValidationError: If a line exceeds INGEST_MAX_LINE_BYTES
+
+    Yields:
+        tuple: (1-based line number, line bytes)
+    """
+    buffer = bytearray()
+    number = 0
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        for line in _split_lines(buffer):
+            number += 1
+            if line.strip():
+                yield number, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise FeedbackValidationError(
+                f"line {number + 1} is longer than {MAX_LINE_BYTES} bytes"
+            )
+    for line in _split_lines(buffer, final=True):
+        number += 1
+        if line.strip():
+            yield number, line
+
+
+class GroupCommitWriter:
+    """
+    Batches live feedback inserts into group commits.
+    """
+
+    def __init__(
+        self,
+        get_pool: Callable[[], Any],
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+        ack_timeout: Optional[float] = None
+    ):
+        self.get_pool = get_pool
+        self.queue_size = queue_size or int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+        self.batch_size = batch_size or int(os.getenv("INGEST_BATCH_SIZE", "200"))
+        self.batch_wait = (batch_wait_ms or float(os.getenv("INGEST_BATCH_WAIT_MS", "20"))) / 1000
+        self.ack_timeout = ack_timeout or float(os.getenv("INGEST_ACK_TIMEOUT", "10"))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._accepting and self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the batching task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="surf-ingest-writer")
+        self._accepting = True
+
+    async def stop(self) -> None:
+        """Refuse new items, commit the queued ones and stop."""
+        self._accepting = False
+        if self._task is None:
+            return
+        await self._queue.put(None)  # flush what is queued, then exit
+        try:
+            await asyncio.wait_for(self._task, timeout=self.ack_timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"⚠️  Ingest writer stopped with {self.depth} items uncommitted")
+        self._task = None
+
+    async def submit(self, row: FeedbackRow) -> int:
+        """
+        Queue a validated row and wait until it is committed.
+
+        Raises:
+            IngestQueueFull: If the queue is full
+            IngestUnavailable: If the writer is stopped, the commit failed
+                or it wasn't confirmed within INGEST_ACK_TIMEOUT
+
+        Returns:
+            int: The new raw_feedback id
+        """
+        if not self.running:
+            raise IngestUnavailable("feedback writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, future))
+        except asyncio.QueueFull:
+            raise IngestQueueFull(f"{self.queue_size} items already waiting")
+        try:
+            # shield: a timed-out caller doesn't take its row out of the batch
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.ack_timeout)
+        except asyncio.TimeoutError:
+            raise IngestUnavailable(f"commit not confirmed within {self.ack_timeout:.0f}s")
+
+    async def _next_batch(self) -> Tuple[List[Tuple[FeedbackRow, asyncio.Future]], bool]:
+        """Wait for a first item, then fill the batch until full or the wait expires."""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple[FeedbackRow, asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        started = time.perf_counter()
+        try:
+            pool = self.get_pool()
+            if pool is None:
+                raise IngestUnavailable("database pool not initialized")
+            async with pool.connection() as conn:
+                async with conn.transaction():
+                    cursor = await conn.execute(
+                        """
+                        INSERT INTO raw_feedback (raw_text, source, metadata, created_at)
+                        SELECT raw_text, source, metadata, COALESCE(created_at, LOCALTIMESTAMP)
+                        FROM unnest(%s::text[], %s::text[], %s::jsonb[], %s::timestamp[])
+                             WITH ORDINALITY AS t(raw_text, source, metadata, created_at, position)
+                        ORDER BY position
+                        RETURNING id
+                        """,
+                        (
+                            [row[0] for row in rows],
+                            [row[1] for row in rows],
+                            [Jsonb(row[2]) for row in rows],
+                            [row[3] for row in rows],
+                        )
+                    )
+                    # Ids come from one sequence in insert order
+                    ids = sorted(record[0] for record in await cursor.fetchall())
+                    await conn.execute(
+                        "SELECT pg_notify(%s, %s)",
+                        (EVENTS_CHANNEL, json.dumps({"type": "feedback_ingested", "count": len(ids)}))
+                    )
+        except Exception as e:
+            logger.error(f"❌ Failed to commit {len(batch)} live feedback items: {e}")
+            metrics.inc("surf_ingest_commits_total", status="failed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(IngestUnavailable(f"commit failed: {e}"))
+            return
+
+        metrics.observe("surf_ingest_commit_seconds", time.perf_counter() - started)
+        metrics.inc("surf_ingest_commits_total", status="success")
+        metrics.inc("surf_feedback_ingested_total", len(ids), path="live")
+        for (_, future), feedback_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(feedback_id)
+
+
+def ingest_collector(get_writer):
+    """Gauge collector for the live ingestion queue."""
+    def collect():
+        writer = get_writer()
+        if writer is None:
+            return
+        yield "surf_ingest_queue_depth", {}, writer.depth
+        yield "surf_ingest_queue_size", {}, writer.queue_size
+    return collect
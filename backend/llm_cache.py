@@ -0,0 +1,208 @@
+"""
+SURF Customer Feedback Agent - LLM Result Cache
+===============================================
+Persistent cache for per-item LLM results (category and score), stored in
+the llm_result_cache table.
+
+Keys are a SHA-256 of the normalized feedback text, its metadata, the model
+name and the task prompt version, so a cached result is reused only when
+every input that could change the answer is unchanged. Entries expire after
+LLM_CACHE_TTL_HOURS and the least recently used entries are evicted above
+LLM_CACHE_MAX_ENTRIES.
+
+The cache fails open: database errors are logged and treated as misses.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional
+from psycopg.types.json import Jsonb
+
+from backend.db_connection import DatabaseConnection
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def current_model_name() -> str:
+    """Model used by the agents (matches agent_definitions.llm)."""
+    return os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalize feedback text so whitespace/case changes don't miss the cache."""
+    return " ".join((text or "").split()).casefold()
+
+
+def make_cache_key(
+    raw_text: Optional[str],
+    metadata: Any,
+    model: str,
+    prompt_version: str
+) -> str:
+    """
+    Build the cache key for one feedback item.
+
+    Args:
+        raw_text: Feedback text
+        metadata: Feedback metadata (dict or JSON string)
+        model: LLM model name
+        prompt_version: Version of the task prompt that produced the result
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except json.JSONDecodeError:
+            pass
+    canonical = json.dumps(
+        [normalize_text(raw_text), metadata or {}, model, prompt_version],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """
+    Postgres-backed cache of per-item LLM results for one task.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        prompt_version: str,
+        model: Optional[str] = None,
+        ttl_hours: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.task = task
+        self.prompt_version = prompt_version
+        self.model = model or current_model_name()
+        self.ttl_hours = (
+            ttl_hours if ttl_hours is not None
+            else float(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+        )
+        self.max_entries = (
+            max_entries if max_entries is not None
+            else int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+        )
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+
+    def key_for(self, item: Dict[str, Any]) -> str:
+        """Cache key for a raw_feedback row."""
+        return make_cache_key(
+            item.get("raw_text"),
+            item.get("metadata"),
+            self.model,
+            f"{self.task}:{self.prompt_version}"
+        )
+
+    def get_many(self, items: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Look up cached results for many feedback rows in one query.
+
+        Hits are touched (last_used_at, hit_count) for LRU eviction. Rows
+        with the same text and metadata share a key and all get its result.
+
+        Args:
+            items: raw_feedback rows with id, raw_text and metadata
+
+        Returns:
+            dict: feedback id -> cached result for every hit
+        """
+        if not self.enabled or not items:
+            return {}
+
+        keys: Dict[str, List[Any]] = {}
+        for item in items:
+            keys.setdefault(self.key_for(item), []).append(item["id"])
+        try:
+            with DatabaseConnection.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        UPDATE llm_result_cache
+                        SET last_used_at = CURRENT_TIMESTAMP,
+                            hit_count = hit_count + 1
+                        WHERE cache_key = ANY(%s)
+                          AND expires_at > CURRENT_TIMESTAMP
+                        RETURNING cache_key, result
+                        """,
+                        (list(keys),)
+                    )
+                    rows = cur.fetchall()
+        except Exception as e:
+            logger.warning(f"⚠️ LLM cache lookup failed, treating as miss: {e}")
+            rows = []
+
+        hits = {
+            feedback_id: result
+            for key, result in rows
+            for feedback_id in keys[key]
+        }
+        metrics.inc("surf_llm_cache_lookups_total", len(hits), task=self.task, result="hit")
+        metrics.inc("surf_llm_cache_lookups_total", len(items) - len(hits), task=self.task, result="miss")
+        return hits
+
+    def put_many(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Store results for many feedback rows and evict old entries.
+
+        Args:
+            entries: Dicts with raw_text, metadata and result
+
+        Returns:
+            int: Number of entries written
+        """
+        if not self.enabled or not entries:
+            return 0
+
+        keys = [self.key_for(entry) for entry in entries]
+        try:
+            with DatabaseConnection.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        """
+                        INSERT INTO llm_result_cache
+                            (cache_key, task, model, result, expires_at)
+                        VALUES (%s, %s, %s, %s,
+                                CURRENT_TIMESTAMP + %s * INTERVAL '1 hour')
+                        ON CONFLICT (cache_key) DO UPDATE
+                        SET result = EXCLUDED.result,
+                            expires_at = EXCLUDED.expires_at,
+                            last_used_at = CURRENT_TIMESTAMP
+                        """,
+                        [
+                            (key, self.task, self.model, Jsonb(entry["result"]), self.ttl_hours)
+                            for key, entry in zip(keys, entries)
+                        ]
+                    )
+                    self._evict(cur)
+            return len(entries)
+        except Exception as e:
+            logger.warning(f"⚠️ LLM cache write failed: {e}")
+            return 0
+
+    def _evict(self, cur) -> None:
+        """Remove expired entries and the least recently used overflow."""
+        cur.execute("DELETE FROM llm_result_cache WHERE expires_at <= CURRENT_TIMESTAMP")
+        cur.execute(
+            """
+            DELETE FROM llm_result_cache
+            WHERE cache_key IN (
+                SELECT cache_key FROM llm_result_cache
+                ORDER BY last_used_at DESC
+                OFFSET %s
+            )
+            """,
+            (self.max_entries,)
+        )
+        if cur.rowcount:
+            logger.info(f"🧹 Evicted {cur.rowcount} LLM cache entries")
+
@@ -0,0 +1,310 @@
+"""
+SURF Customer Feedback Agent - Record/Replay LLM Transport
+==========================================================
+httpx transports that sit under the agents' ChatOpenAI client and either
+record every model request/response pair to a local SQLite cassette or
+serve them back without touching the network.
+
+Modes (LLM_TRANSPORT_MODE):
+    live    - normal network calls (default)
+    record  - network calls, and every exchange is stored in the cassette
+    replay  - exchanges are served from the cassette; a request that was
+              never recorded raises ReplayMissError
+
+Requests are matched on method, path and the canonical JSON body, so the
+same prompt always gets the same answer. Identical requests recorded
+several times are replayed in the order they were recorded.
+
+Configuration:
+    LLM_CASSETTE_PATH     - cassette file (default: .llm_cassettes/surf.sqlite)
+    LLM_REPLAY_LATENCY    - simulated seconds per replayed call, or
+                            "recorded" to reuse the recorded latency (default: 0)
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+MODES = ("live", "record", "replay")
+
+# Headers that describe the wire encoding of the original body; replayed
+# bodies are stored decoded
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode for a request that is not in the cassette."""
+
+
+def transport_mode() -> str:
+    """Configured LLM transport mode."""
+    mode = os.getenv("LLM_TRANSPORT_MODE", "live").lower()
+    if mode not in MODES:
+        raise ValueError(f"LLM_TRANSPORT_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    return mode
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """
+    Match key for a request: method, path and canonical JSON body.
+
+    Non-JSON bodies are hashed as-is.
+    """
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except (ValueError, UnicodeDecodeError):
+        canonical = body.decode("latin-1")
+    digest = hashlib.sha256(f"{method.upper()} {path}\n{canonical}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Cassette:
+    """
+    SQLite store of recorded exchanges, with zlib-compressed bodies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS exchanges (
+                request_key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                request_body BLOB,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                response_body BLOB,
+                latency REAL NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (request_key, seq)
+            )
+            """
+        )
+        self._conn.commit()
+        # Per-key call counters for this process (record and replay order)
+        self._counters: Dict[str, int] = {}
+
+    def next_seq(self, key: str) -> int:
+        """Position of the next call with this key in this process."""
+        with self._lock:
+            seq = self._counters.get(key, 0)
+            self._counters[key] = seq + 1
+            return seq
+
+    def save(
+        self,
+        key: str,
+        seq: int,
+        request: httpx.Request,
+        response: httpx.Response,
+        body: bytes,
+        latency: float
+    ) -> None:
+        """Store one exchange (overwriting an earlier recording at the same position)."""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO exchanges
+                    (request_key, seq, method, url, request_body, status_code,
+                     headers, response_body, latency, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key, seq, request.method, str(request.url),
+                    zlib.compress(request.content or b""),
+                    response.status_code, json.dumps(headers),
+                    zlib.compress(body), latency, time.time(),
+                )
+            )
+            self._conn.commit()
+
+    def load(self, key: str, seq: int) -> Optional[Tuple[int, Dict[str, str], bytes, float]]:
+        """
+        Get a recorded exchange; calls beyond the recorded count cycle.
+
+        Returns:
+            tuple: (status_code, headers, body, latency) or None if the
+            request was never recorded
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT status_code, headers, response_body, latency
+                FROM exchanges
+                WHERE request_key = ?
+                ORDER BY seq
+                """,
+                (key,)
+            ).fetchall()
+        if not rows:
+            return None
+        status_code, headers, body, latency = rows[seq % len(rows)]
+        return status_code, json.loads(headers), zlib.decompress(body), latency
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of recorded exchanges and distinct requests."""
+        with self._lock:
+            total, distinct = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT request_key) FROM exchanges"
+            ).fetchone()
+        return {"path": self.path, "exchanges": total, "distinct_requests": distinct}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _RecordReplayBase:
+    """Shared logic of the sync and async transports."""
+
+    def __init__(
+        self,
+        mode: str,
+        cassette: Cassette,
+        replay_latency: Optional[str] = None
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported record/replay mode: {mode}")
+        self.mode = mode
+        self.cassette = cassette
+        self.replay_latency = (
+            replay_latency if replay_latency is not None
+            else os.getenv("LLM_REPLAY_LATENCY", "0")
+        )
+
+    def _key(self, request: httpx.Request) -> Tuple[str, int]:
+        key = request_key(request.method, request.url.path, request.content or b"")
+        return key, self.cassette.next_seq(key)
+
+    def _replayed(self, request: httpx.Request, key: str, seq: int) -> Tuple[httpx.Response, float]:
+        recorded = self.cassette.load(key, seq)
+        if recorded is None:
+            raise ReplayMissError(
+                f"No recorded response for {request.method} {request.url.path} "
+                f"(key {key[:12]}) in {self.cassette.path}; "
+                f"run once with LLM_TRANSPORT_MODE=record"
+            )
+        status_code, headers, body, latency = recorded
+        delay = latency if self.replay_latency == "recorded" else float(self.replay_latency or 0)
+        response = httpx.Response(status_code, headers=headers, content=body, request=request)
+        return response, delay
+
+
+class RecordReplayTransport(_RecordReplayBase, httpx.BaseTransport):
+    """Synchronous record/replay transport."""
+
+    def __init__(self, mode: str, cassette: Cassette, replay_latency: Optional[str] = None):
+        super().__init__(mode, cassette, replay_latency)
+        self._live = httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key, seq = self._key(request)
+        if self.mode == "replay":
+            response, delay = self._replayed(request, key, seq)
+            if delay:
+                time.sleep(delay)
+            return response
+
+        started = time.perf_counter()
+        response = self._live.handle_request(request)
+        body = response.read()
+        latency = time.perf_counter() - started
+        self.cassette.save(key, seq, request, response, body, latency)
+        return httpx.Response(
+            response.status_code,
+            headers=[(k, v) for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS],
+            content=body,
+            request=request
+        )
+
+    def close(self) -> None:
+        self._live.close()
+
+
+class AsyncRecordReplayTransport(_RecordReplayBase, httpx.AsyncBaseTransport):
+    """Asynchronous record/replay transport."""
+
+    def __init__(self, mode: str, cassette: Cassette, replay_latency: Optional[str] = None):
+        super().__init__(mode, cassette, replay_latency)
+        self._live = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key, seq = self._key(request)
+        if self.mode == "replay":
+            response, delay = self._replayed(request, key, seq)
+            if delay:
+                await asyncio.sleep(delay)
+            return response
+
+        started = time.perf_counter()
+        response = await self._live.handle_async_request(request)
+        body = await response.aread()
+        latency = time.perf_counter() - started
+        self.cassette.save(key, seq, request, response, body, latency)
+        return httpx.Response(
+            response.status_code,
+            headers=[(k, v) for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS],
+            content=body,
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        await self._live.aclose()
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Optional[str] = None) -> Cassette:
+    """Shared cassette for a path (default: LLM_CASSETTE_PATH)."""
+    path = path or os.getenv("LLM_CASSETTE_PATH", os.path.join(".llm_cassettes", "surf.sqlite"))
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def llm_client_kwargs(mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extra ChatOpenAI keyword arguments for the configured transport mode.
+
+    Returns:
+        dict: Empty in live mode; otherwise http_client/http_async_client
+        using the record/replay transports (and a placeholder API key in
+        replay mode if none is configured)
+    """
+    mode = mode or transport_mode()
+    if mode == "live":
+        return {}
+
+    cassette = get_cassette()
+    logger.info(f"🎞️  LLM transport in {mode} mode ({cassette.path})")
+    kwargs: Dict[str, Any] = {
+        "http_client": httpx.Client(transport=RecordReplayTransport(mode, cassette)),
+        "http_async_client": httpx.AsyncClient(transport=AsyncRecordReplayTransport(mode, cassette)),
+    }
+    if mode == "replay" and not os.getenv("OPENAI_API_KEY"):
+        kwargs["api_key"] = "replay"
+    return kwargs
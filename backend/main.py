@@ -8,6 +8,20 @@ Usage:
     
     # Or with custom configuration:
     python backend/main.py --verbose --log-level DEBUG
+    
+    # Only process feedback that is new or changed since the last run:
+    python backend/main.py --incremental
+    
+    # Write per-stage metrics (Prometheus text, or JSON for *.json):
+    python backend/main.py --metrics-file logs/metrics.prom
+    
+    # Record model traffic once, then rerun offline from the cassette:
+    LLM_TRANSPORT_MODE=record python backend/main.py
+    LLM_TRANSPORT_MODE=replay python backend/main.py
+    
+    # Queue Slack delivery for a separate worker instead of draining on exit:
+    DELIVERY_DRAIN_ON_EXIT=false python backend/main.py
+    python -m backend.delivery
 """
 
 import os
@@ -23,6 +37,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.crew_orchestrator import FeedbackCrew
 from backend.db_connection import DatabaseConnection
+from backend.delivery import OutboxWorker
+from backend.metrics import dump_metrics, summarize_stages
 
 # Load environment variables
 load_dotenv()
@@ -58,6 +74,9 @@ def check_environment() -> bool:
         "DB_USER",
         "DB_PASSWORD"
     ]
+    if os.getenv("LLM_TRANSPORT_MODE", "live").lower() == "replay":
+        # Replayed runs never reach the model API
+        required_vars.remove("OPENAI_API_KEY")
     
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
@@ -109,6 +128,17 @@ def main():
         action="store_true",
         help="Enable verbose output"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process feedback that is new or changed since the last run"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("METRICS_FILE"),
+        help="Write pipeline metrics to this file when the run ends "
+             "(Prometheus text format, or JSON if it ends in .json)"
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -147,12 +177,15 @@ def main():
         logger.info("\n📋 Task Information:")
         for idx, task_info in enumerate(crew.get_task_info(), 1):
             logger.info(f"   Task {idx}: {task_info['agent']}")
+        logger.info("\n📋 Stage Graph:")
+        for stage, deps in crew.get_stage_graph().items():
+            logger.info(f"   {stage} ← {', '.join(deps) or '(start)'}")
         sys.exit(0)
     
     # Execute the pipeline
     try:
         logger.info("🚀 Initializing SURF Feedback Crew...")
-        crew = FeedbackCrew()
+        crew = FeedbackCrew(incremental=args.incremental)
         
         logger.info("▶️  Starting pipeline execution...")
         start_time = datetime.now()
@@ -169,13 +202,39 @@ def main():
         logger.info(f"Status: {'✅ SUCCESS' if result['success'] else '❌ FAILED'}")
         logger.info(f"Duration: {duration:.2f} seconds")
         logger.info(f"Timestamp: {end_time.isoformat()}")
+        if args.incremental:
+            logger.info(f"Stages run: {', '.join(result.get('stages', [])) or 'none'}")
+        if result.get('critical_path'):
+            logger.info(f"Critical path: {' → '.join(result['critical_path'])}")
+        for stage, stats in summarize_stages().items():
+            logger.info(
+                f"   {stage}: {stats['seconds']:.2f}s, "
+                f"{stats['llm_calls']:.0f} LLM calls "
+                f"({stats['prompt_tokens']:.0f} prompt / "
+                f"{stats['completion_tokens']:.0f} completion tokens), "
+                f"{stats['tool_calls']:.0f} tool calls ({stats['tool_seconds']:.2f}s)"
+            )
         
         if result['success']:
             logger.info("\n📦 Final Output:")
             logger.info(json.dumps(result.get('result', {}), indent=2, default=str))
             
             logger.info("\n✅ Pipeline executed successfully!")
-            logger.info("📨 Check Slack for the prioritized feedback report")
+            if "delivery" not in result.get("stages", ["delivery"]):
+                logger.info(f"ℹ️  {result.get('message')}")
+            elif crew.delivery_mode == "outbox" and crew.scheduler != "sequential":
+                # The run is already committed and reported; Slack latency
+                # and retries happen after it
+                if os.getenv("DELIVERY_DRAIN_ON_EXIT", "true").lower() != "false":
+                    totals = OutboxWorker().drain()
+                    logger.info(
+                        f"📨 Slack delivery: {totals['sent']} sent, {totals['logged']} logged, "
+                        f"{totals['retrying']} retrying, {totals['failed']} failed"
+                    )
+                else:
+                    logger.info("📮 Report queued; the delivery worker will post it to Slack")
+            else:
+                logger.info("📨 Check Slack for the prioritized feedback report")
         else:
             logger.error(f"\n❌ Pipeline failed: {result.get('error', 'Unknown error')}")
             sys.exit(1)
@@ -188,6 +247,11 @@ def main():
         sys.exit(1)
     finally:
         # Cleanup
+        if args.metrics_file:
+            try:
+                dump_metrics(args.metrics_file)
+            except Exception as e:
+                logger.warning(f"⚠️  Failed to write metrics: {e}")
         try:
             DatabaseConnection.close_pool()
             logger.info("🔒 Database connection pool closed")
@@ -0,0 +1,411 @@
+"""
+SURF Customer Feedback Agent - Pipeline Metrics
+===============================================
+In-process counters, gauges and histograms for the pipeline, rendered in
+the Prometheus text exposition format.
+
+Collected metrics:
+    surf_stage_duration_seconds      - per-stage/agent wall time
+    surf_pipeline_duration_seconds   - end-to-end run time
+    surf_pipeline_runs_total         - runs by mode and status
+    surf_llm_calls_total             - LLM calls by model, stage and status
+    surf_llm_call_duration_seconds   - LLM call latency
+    surf_llm_tokens_total            - prompt/completion tokens
+    surf_tool_call_duration_seconds  - PostgresTool/PostToSlackTool/... latency
+    surf_llm_cache_lookups_total     - LLM result cache lookups by task and hit/miss
+    surf_db_pool_acquire_seconds     - wait for a pooled connection
+    surf_db_pool_*                   - pool gauges from registered collectors
+    surf_http_request_duration_seconds - API request latency by route
+
+The API server exposes them on /metrics; CLI runs dump them once at exit
+with dump_metrics().
+"""
+
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    BaseCallbackHandler = object
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+_HELP = {
+    "surf_stage_duration_seconds": "Pipeline stage wall time",
+    "surf_pipeline_duration_seconds": "End-to-end pipeline run time",
+    "surf_pipeline_runs_total": "Pipeline runs by mode and status",
+    "surf_llm_calls_total": "LLM calls by model, stage and status",
+    "surf_llm_call_duration_seconds": "LLM call latency",
+    "surf_llm_tokens_total": "LLM tokens by kind (prompt/completion)",
+    "surf_tool_call_duration_seconds": "Agent tool call latency",
+    "surf_llm_cache_lookups_total": "LLM result cache lookups by task and result (hit/miss)",
+    "surf_db_pool_acquire_seconds": "Time spent waiting for a pooled connection",
+    "surf_http_request_duration_seconds": "API request latency by route",
+    "surf_db_pool_size": "Open connections in the pool",
+    "surf_db_pool_max_size": "Maximum pool size",
+    "surf_db_pool_in_use": "Connections checked out of the pool",
+    "surf_db_pool_idle": "Idle connections in the pool",
+    "surf_db_pool_waiting": "Callers waiting for a connection",
+    "surf_db_pool_acquire_timeouts": "Connection requests that timed out or failed",
+    "surf_slack_delivery_seconds": "Slack message delivery time including retries",
+    "surf_slack_retries_total": "Slack delivery retries by reason",
+    "surf_outbox_deliveries_total": "Slack outbox rows processed by outcome",
+    "surf_feedback_ingested_total": "Feedback items stored through the API by path",
+    "surf_feedback_rejected_total": "Feedback items rejected by validation by path",
+    "surf_feedback_throttled_total": "Live feedback refused by reason (queue_full/unavailable)",
+    "surf_ingest_commits_total": "Live feedback group commits by status",
+    "surf_ingest_commit_seconds": "Live feedback group commit time",
+    "surf_ingest_queue_depth": "Live feedback items waiting for a commit",
+    "surf_ingest_queue_size": "Live feedback queue capacity",
+    "surf_connector_request_seconds": "Source connector API request latency by status",
+    "surf_connector_retries_total": "Source connector API retries by reason",
+    "surf_connector_rows_total": "Feedback rows written by source connectors by result",
+    "surf_events_published_total": "Dashboard events sent to SSE clients by type",
+    "surf_events_dropped_total": "Dashboard events dropped for slow SSE clients",
+    "surf_events_clients": "Connected SSE clients",
+    "surf_events_listener_connected": "Whether the LISTEN connection is up",
+}
+
+# Stage whose work is currently running on this thread/task; used to
+# label LLM and tool metrics
+current_stage: contextvars.ContextVar = contextvars.ContextVar(
+    "surf_current_stage", default="none"
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and histograms plus gauge collectors.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Dict[str, Any]]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """Increment a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a histogram observation."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["count"] += 1
+            entry["sum"] += value
+
+    @contextmanager
+    def timed(self, name: str, **labels):
+        """Observe the duration of a block, labelled status=ok|error."""
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, status=status, **labels)
+
+    def register_collector(
+        self,
+        collector: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]
+    ) -> None:
+        """Register a callable yielding (gauge name, labels, value) at render time."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def _collect_gauges(self) -> Dict[str, Dict[LabelKey, float]]:
+        gauges: Dict[str, Dict[LabelKey, float]] = {}
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, {})[_label_key(labels)] = float(value)
+            except Exception as e:
+                logger.debug(f"Metrics collector {collector} failed: {e}")
+        return gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all metrics as plain data.
+
+        Returns:
+            dict: counters, gauges and histograms (count, sum, avg and
+            cumulative bucket counts) keyed by metric name
+        """
+        gauges = self._collect_gauges()
+        with self._lock:
+            return {
+                "counters": {
+                    name: [dict(labels=dict(key), value=value) for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: [dict(labels=dict(key), value=value) for key, value in series.items()]
+                    for name, series in gauges.items()
+                },
+                "histograms": {
+                    name: [
+                        dict(
+                            labels=dict(key),
+                            count=entry["count"],
+                            sum=round(entry["sum"], 6),
+                            avg=round(entry["sum"] / entry["count"], 6) if entry["count"] else 0.0,
+                            buckets=dict(zip(map(str, self.buckets), entry["counts"])),
+                        )
+                        for key, entry in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        gauges = self._collect_gauges()
+        lines: List[str] = []
+
+        def header(name, kind):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(gauges.items()):
+                header(name, "gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                header(name, "histogram")
+                for key, entry in series.items():
+                    for bound, count in zip(self.buckets, entry["counts"]):
+                        le = key + (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(le)} {count}")
+                    inf = key + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(inf)} {entry['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(entry['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all counters and histograms (collectors stay registered)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def stage_context(stage: str):
+    """Label LLM and tool metrics recorded inside the block with a stage."""
+    token = current_stage.set(stage)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+
+
+@contextmanager
+def track_tool_call(tool: str, operation: str = "run"):
+    """Time a tool call into surf_tool_call_duration_seconds."""
+    with metrics.timed(
+        "surf_tool_call_duration_seconds",
+        tool=tool,
+        operation=operation,
+        stage=current_stage.get()
+    ):
+        yield
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback handler counting LLM calls, latency and tokens.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        super().__init__()
+        self.registry = registry or metrics
+        self._started: Dict[Any, Tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, serialized: Optional[Dict[str, Any]], run_id, kwargs) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or (
+            (serialized or {}).get("kwargs", {}).get("model_name", "unknown")
+        )
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), str(model), current_stage.get())
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def _finish(self, run_id, status: str):
+        with self._lock:
+            started, model, stage = self._started.pop(
+                run_id, (time.perf_counter(), "unknown", current_stage.get())
+            )
+        self.registry.inc("surf_llm_calls_total", model=model, stage=stage, status=status)
+        self.registry.observe(
+            "surf_llm_call_duration_seconds",
+            time.perf_counter() - started,
+            model=model,
+            stage=stage
+        )
+        return model, stage
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        model, stage = self._finish(run_id, "ok")
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens:
+            self.registry.inc("surf_llm_tokens_total", prompt_tokens, model=model, stage=stage, kind="prompt")
+        if completion_tokens:
+            self.registry.inc("surf_llm_tokens_total", completion_tokens, model=model, stage=stage, kind="completion")
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs):
+        self._finish(run_id, "error")
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """Extract (prompt, completion) token counts from an LLMResult."""
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+
+    prompt_tokens = completion_tokens = 0
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens += int(metadata.get("input_tokens", 0))
+            completion_tokens += int(metadata.get("output_tokens", 0))
+    return prompt_tokens, completion_tokens
+
+
+def summarize_stages(snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Per-stage totals: seconds, LLM calls, tokens and tool seconds.
+
+    Returns:
+        dict: stage -> seconds, llm_calls, prompt_tokens,
+        completion_tokens, tool_calls, tool_seconds
+    """
+    snapshot = snapshot or metrics.snapshot()
+    summary: Dict[str, Dict[str, float]] = {}
+
+    def entry(stage):
+        return summary.setdefault(stage, {
+            "seconds": 0.0, "llm_calls": 0, "prompt_tokens": 0,
+            "completion_tokens": 0, "tool_calls": 0, "tool_seconds": 0.0,
+        })
+
+    histograms = snapshot["histograms"]
+    counters = snapshot["counters"]
+    for sample in histograms.get("surf_stage_duration_seconds", []):
+        entry(sample["labels"]["stage"])["seconds"] += sample["sum"]
+    for sample in histograms.get("surf_tool_call_duration_seconds", []):
+        stage = entry(sample["labels"].get("stage", "none"))
+        stage["tool_calls"] += sample["count"]
+        stage["tool_seconds"] += sample["sum"]
+    for sample in counters.get("surf_llm_calls_total", []):
+        entry(sample["labels"].get("stage", "none"))["llm_calls"] += sample["value"]
+    for sample in counters.get("surf_llm_tokens_total", []):
+        kind = sample["labels"].get("kind")
+        entry(sample["labels"].get("stage", "none"))[f"{kind}_tokens"] += sample["value"]
+    return summary
+
+
+def pool_collector(name: str, get_pool: Callable[[], Any]):
+    """
+    Gauge collector for a psycopg_pool ConnectionPool/AsyncConnectionPool.
+
+    Args:
+        name: Value of the pool label
+        get_pool: Returns the pool, or None while it is not open
+    """
+    def collect():
+        pool = get_pool()
+        if pool is None:
+            return
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+        labels = {"pool": name}
+        yield "surf_db_pool_size", labels, size
+        yield "surf_db_pool_max_size", labels, stats.get("pool_max", pool.max_size)
+        yield "surf_db_pool_in_use", labels, size - available
+        yield "surf_db_pool_idle", labels, available
+        yield "surf_db_pool_waiting", labels, stats.get("requests_waiting", 0)
+        yield "surf_db_pool_acquire_timeouts", labels, stats.get("requests_errors", 0)
+    return collect
+
+
+def dump_metrics(path: str) -> None:
+    """Write all metrics to a file (JSON if the path ends in .json)."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            json.dump(metrics.snapshot(), f, indent=2)
+        else:
+            f.write(metrics.render())
+    logger.info(f"📈 Metrics written to {path}")
+
+
+# Shared callback instance for the agents' LLM
+llm_metrics_callback = LLMMetricsCallback()
@@ -0,0 +1,206 @@
+"""
+SURF Customer Feedback Agent - Concurrent Pre-Mortem Risk Assessment
+===================================================================
+Runs the RetentionCriticAgent's 90-day pre-mortem as one LLM call per
+prioritized item, fanned out concurrently under a concurrency cap, then
+merges the forecasts into a single total_risk_estimate.
+
+Latency is that of the slowest item rather than the sum, and a bad
+response only retries its own item.
+
+The synchronous entry point runs every fan-out on one long-lived
+background event loop: the shared agent LLM keeps an async HTTP
+connection pool that belongs to the loop it was first used on, so a
+fresh loop per call would strand it after the first pipeline run.
+
+Configuration:
+    RISK_MAX_CONCURRENCY  - concurrent LLM calls (default: 4)
+    RISK_MAX_RETRIES      - retries per item on error/unparseable output (default: 2)
+"""
+
+import os
+import re
+import json
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+ITEM_PROMPT = (
+    "You are a CFO-level pre-mortem analyst for a SaaS company. Assess this "
+    "single prioritized customer feedback item: what happens if we IGNORE it "
+    "for 90 days?\n\n"
+    "Item:\n{item}\n\n"
+    "Estimate conservatively using Enterprise LTV $100K-$500K, Pro LTV "
+    "$10K-$50K, and cover:\n"
+    "1. Customer churn risk (% of customers and $ ARR loss)\n"
+    "2. Revenue impact from lost new deals\n"
+    "3. Support cost increases\n"
+    "4. Brand/reputation damage in $\n\n"
+    "Respond with ONLY a JSON object:\n"
+    '{{"pre_mortem_forecast": "Estimated 90-day impact if ignored:\\n'
+    '- Churn: ...\\n- Lost deals: ...\\n- Support costs: ...\\n'
+    '- Total estimated loss: $X-$Y over 90 days", '
+    '"worst_case_loss_usd": <number>}}'
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def _default_llm():
+    """Shared agent LLM (imported lazily to avoid an import cycle)."""
+    from backend.agents.agent_definitions import llm
+    return llm
+
+
+def parse_risk_response(text: str) -> Dict[str, Any]:
+    """
+    Parse a per-item risk response.
+
+    Raises:
+        ValueError: If the response has no usable JSON object
+    """
+    match = _JSON_OBJECT.search(text or "")
+    if not match:
+        raise ValueError("no JSON object in response")
+    data = json.loads(match.group(0))
+    forecast = data.get("pre_mortem_forecast")
+    if not isinstance(forecast, str) or not forecast.strip():
+        raise ValueError("missing pre_mortem_forecast")
+    try:
+        worst_case = float(data.get("worst_case_loss_usd") or 0.0)
+    except (TypeError, ValueError):
+        worst_case = 0.0
+    return {"pre_mortem_forecast": forecast, "worst_case_loss_usd": worst_case}
+
+
+def format_usd(amount: float) -> str:
+    """Format a dollar amount as $950K / $1.3M."""
+    if amount >= 1_000_000:
+        return f"${amount / 1_000_000:.1f}M"
+    if amount >= 1_000:
+        return f"${amount / 1_000:.0f}K"
+    return f"${amount:.0f}"
+
+
+async def assess_item_risk(
+    item: Dict[str, Any],
+    llm=None,
+    max_retries: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run the pre-mortem for one item, retrying only this item on failure.
+
+    Returns:
+        dict: The item with pre_mortem_forecast and worst_case_loss_usd
+        added, plus risk_assessment_error if every attempt failed
+    """
+    llm = llm or _default_llm()
+    max_retries = (
+        max_retries if max_retries is not None
+        else int(os.getenv("RISK_MAX_RETRIES", "2"))
+    )
+    prompt = ITEM_PROMPT.format(item=json.dumps(item, default=str))
+
+    last_error = None
+    for attempt in range(max_retries + 1):
+        try:
+            response = await llm.ainvoke(prompt)
+            content = getattr(response, "content", response)
+            return {**item, **parse_risk_response(content)}
+        except Exception as e:
+            last_error = e
+            logger.warning(
+                f"⚠️ Risk assessment failed for item "
+                f"{item.get('feedback_id', item.get('id'))} "
+                f"(attempt {attempt + 1}/{max_retries + 1}): {e}"
+            )
+            if attempt < max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    return {
+        **item,
+        "pre_mortem_forecast": "Risk assessment unavailable",
+        "worst_case_loss_usd": 0.0,
+        "risk_assessment_error": str(last_error),
+    }
+
+
+async def assess_risks_async(
+    items: List[Dict[str, Any]],
+    llm=None,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Assess all items concurrently and merge the results.
+
+    Args:
+        items: Prioritized items (with action plans)
+        llm: LangChain chat model (default: the shared agent LLM)
+        max_concurrency: Maximum concurrent LLM calls
+
+    Returns:
+        dict: items with forecasts, total_risk_estimate and status
+    """
+    llm = llm or _default_llm()
+    max_concurrency = max(1, (
+        max_concurrency if max_concurrency is not None
+        else int(os.getenv("RISK_MAX_CONCURRENCY", "4"))
+    ))
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(item):
+        async with semaphore:
+            return await assess_item_risk(item, llm=llm)
+
+    assessed = await asyncio.gather(*(bounded(item) for item in items))
+    total = sum(item["worst_case_loss_usd"] for item in assessed)
+    failed = sum(1 for item in assessed if "risk_assessment_error" in item)
+
+    logger.info(
+        f"💰 Assessed {len(assessed)} items "
+        f"(concurrency={max_concurrency}, failed={failed}), "
+        f"worst case {format_usd(total)}"
+    )
+    return {
+        "items": assessed,
+        "total_risk_estimate": f"{format_usd(total)} worst case over 90 days",
+        "total_risk_usd": total,
+        "failed_items": failed,
+        "status": "ready_for_delivery",
+    }
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread shared by every assess_risks() call."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="risk-assessment", daemon=True).start()
+        return _loop
+
+
+def assess_risks(
+    items: List[Dict[str, Any]],
+    llm=None,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around assess_risks_async().
+
+    Runs on the shared background loop, so it is also safe to call from
+    code that is already running an event loop (e.g. a tool invoked by
+    an async agent). Context variables such as the metrics stage label
+    are carried over to the loop.
+    """
+    loop = _background_loop()
+    coroutine = assess_risks_async(items, llm=llm, max_concurrency=max_concurrency)
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
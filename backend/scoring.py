@@ -0,0 +1,326 @@
+"""
+SURF Customer Feedback Agent - Severity-Volume Scoring Engine
+=============================================================
+Deterministic, vectorized implementation of the AnalyzerAgent rubric.
+
+Severity comes from the category (or keyword-detected severity band) and
+volume from the metadata bonuses:
+    user_tier: Enterprise (+2), Pro (+1), Free (+0)
+    urgency:   critical (+2), high (+1), medium (+0.5), low (+0)
+plus, when near-duplicate cluster sizes are known, a report-count bonus
+that grows logarithmically and reaches 10 at CLUSTER_VOLUME_SATURATION
+reports (a single report adds nothing).
+
+    score = (SEVERITY_WEIGHT * severity + VOLUME_WEIGHT * volume)
+            / (SEVERITY_WEIGHT + VOLUME_WEIGHT)
+
+Both components are on a 0-10 scale, so the score is too. Rows the rules
+can't classify with confidence are flagged so only those go to the LLM.
+"""
+
+import os
+import json
+import string
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Output categories, as stored in raw_feedback.category
+CATEGORIES = ["Bug", "Feature", "UX", "Other"]
+_CATEGORY_CODES = {name.lower(): code for code, name in enumerate(CATEGORIES)}
+
+# Severity bands, ordered from most to least severe
+BANDS = ["security", "performance", "bug", "feature", "ux", "other"]
+BAND_SEVERITY = np.array([9.5, 8.0, 7.5, 5.5, 5.0, 4.0])
+BAND_CATEGORY = np.array([0, 0, 0, 1, 2, 3])
+_BAND_CATEGORY_LIST = BAND_CATEGORY.tolist()
+
+# Default band used when a category is known but no keyword matched
+CATEGORY_DEFAULT_BAND = np.array([2, 3, 4, 5])
+
+TIER_BONUS = {"enterprise": 2.0, "pro": 1.0, "free": 0.0}
+URGENCY_BONUS = {"critical": 2.0, "high": 1.0, "medium": 0.5, "low": 0.0}
+MAX_VOLUME_BONUS = max(TIER_BONUS.values()) + max(URGENCY_BONUS.values())
+
+# Keyword lexicon per band. Entries ending in "*" match as prefixes and
+# multi-word entries match as phrases.
+_BAND_KEYWORDS = {
+    "security": [
+        "security", "password", "passwords", "vulnerab*", "breach", "leak*",
+        "exploit*", "xss", "csrf", "injection", "plaintext", "plain text",
+        "unauthorized", "unauthorised", "credential*",
+    ],
+    "performance": [
+        "slow*", "latency", "timeout", "timeouts", "time out", "response time",
+        "response times", "performance", "lag*", "load time", "load times",
+        "memory", "cpu", "takes forever",
+    ],
+    "bug": [
+        "crash*", "error", "errors", "bug", "bugs", "broken", "fail", "fails",
+        "failing", "failure", "not working", "doesnt work", "doesn't work",
+        "exception", "exceptions", "freez*", "unresponsive", "blank",
+    ],
+    "feature": [
+        "feature", "would love", "please add", "support for", "integration",
+        "integrations", "wish", "missing", "request*", "export", "dark mode",
+    ],
+    "ux": [
+        "confus*", "ux", "ui", "design", "layout", "hard to", "difficult",
+        "onboarding", "tutorial", "dropdown", "overlap", "overlaps",
+        "navigation", "cluttered",
+    ],
+}
+_BAND_CODES = {band: code for code, band in enumerate(BANDS)}
+
+_WORD_BANDS: Dict[str, int] = {}
+_STEM_BANDS: List[Tuple[str, int]] = []
+_PHRASES_BY_FIRST_WORD: Dict[str, List[Tuple[str, int]]] = {}
+for _band, _terms in _BAND_KEYWORDS.items():
+    for _term in _terms:
+        _code = _BAND_CODES[_band]
+        if _term.endswith("*"):
+            _STEM_BANDS.append((_term[:-1], _code))
+        elif " " in _term:
+            _PHRASES_BY_FIRST_WORD.setdefault(_term.split(" ", 1)[0], []).append((_term, _code))
+        else:
+            _WORD_BANDS[_term] = _code
+_STEM_PREFIXES = tuple(stem for stem, _ in _STEM_BANDS)
+_PHRASE_FIRST_WORDS = frozenset(_PHRASES_BY_FIRST_WORD)
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation if c != "'"})
+
+# Word -> band cache so each distinct word is classified once; text
+# matching then reduces to set intersections. score_batch runs on DAG
+# worker threads and the API thread pool, so the cache is only read or
+# extended while holding _WORDS_LOCK.
+_WORDS_LOCK = threading.Lock()
+_KNOWN_WORDS = set(_WORD_BANDS)
+_KEYWORD_WORDS = set(_WORD_BANDS)
+_MAX_KNOWN_WORDS = 500_000
+
+# Lookup tables for the vectorized metadata bonuses; the last slot is
+# used for missing/unknown values.
+_TIER_NAMES = list(TIER_BONUS)
+_URGENCY_NAMES = list(URGENCY_BONUS)
+_TIER_CODES = {name: code for code, name in enumerate(_TIER_NAMES)}
+_URGENCY_CODES = {name: code for code, name in enumerate(_URGENCY_NAMES)}
+_TIER_BONUS_TABLE = np.array([TIER_BONUS[name] for name in _TIER_NAMES] + [0.0])
+_URGENCY_BONUS_TABLE = np.array([URGENCY_BONUS[name] for name in _URGENCY_NAMES] + [0.0])
+
+
+def _parse_metadata(metadata: Any) -> Dict[str, Any]:
+    """Return the metadata JSONB value as a dict."""
+    if isinstance(metadata, dict):
+        return metadata
+    if isinstance(metadata, str) and metadata:
+        try:
+            parsed = json.loads(metadata)
+            return parsed if isinstance(parsed, dict) else {}
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+def _learn_words(words: set) -> None:
+    """Classify words not seen before and add them to the cache (caller holds _WORDS_LOCK)."""
+    if len(_KNOWN_WORDS) > _MAX_KNOWN_WORDS:
+        _KNOWN_WORDS.intersection_update(_KEYWORD_WORDS)
+    for word in words:
+        _KNOWN_WORDS.add(word)
+        if word.startswith(_STEM_PREFIXES):
+            stem_code = min(code for stem, code in _STEM_BANDS if word.startswith(stem))
+            _WORD_BANDS[word] = min(stem_code, _WORD_BANDS.get(word, stem_code))
+            _KEYWORD_WORDS.add(word)
+
+
+def _detect_lowered(lowered: str) -> Tuple[int, bool]:
+    """detect_band for lowercased text (caller holds _WORDS_LOCK)."""
+    words = set(lowered.translate(_PUNCTUATION).split())
+
+    unseen = words - _KNOWN_WORDS
+    if unseen:
+        _learn_words(unseen)
+
+    found = {_WORD_BANDS[word] for word in words & _KEYWORD_WORDS}
+    for first in words & _PHRASE_FIRST_WORDS:
+        for phrase, code in _PHRASES_BY_FIRST_WORD[first]:
+            if phrase in lowered:
+                found.add(code)
+
+    if not found:
+        return -1, False
+    categories = {_BAND_CATEGORY_LIST[code] for code in found}
+    return min(found), len(categories) > 1
+
+
+def detect_band(text: str) -> Tuple[int, bool]:
+    """
+    Detect the most severe keyword band in a feedback text.
+
+    Returns:
+        tuple: (band code or -1 if nothing matched, ambiguous flag).
+        Ambiguous means keywords from more than one category matched.
+    """
+    with _WORDS_LOCK:
+        return _detect_lowered((text or "").lower())
+
+
+def _code_array(values: Sequence[Any], codes: Dict[str, int], unknown: int) -> np.ndarray:
+    """Map metadata values to lookup codes, normalizing each distinct value once."""
+    seen: Dict[Any, int] = {}
+
+    def code(value: Any) -> int:
+        try:
+            return seen[value]
+        except KeyError:
+            seen[value] = result = codes.get(str(value).lower(), unknown)
+            return result
+        except TypeError:  # unhashable, e.g. a list
+            return codes.get(str(value).lower(), unknown)
+
+    return np.fromiter(map(code, values), dtype=np.int64, count=len(values))
+
+
+class SeverityVolumeScorer:
+    """
+    Batch scorer for raw_feedback rows.
+    """
+
+    def __init__(
+        self,
+        severity_weight: Optional[float] = None,
+        volume_weight: Optional[float] = None
+    ):
+        self.severity_weight = (
+            severity_weight if severity_weight is not None
+            else float(os.getenv("SEVERITY_WEIGHT", "0.6"))
+        )
+        self.volume_weight = (
+            volume_weight if volume_weight is not None
+            else float(os.getenv("VOLUME_WEIGHT", "0.4"))
+        )
+        if self.severity_weight + self.volume_weight <= 0:
+            raise ValueError("SEVERITY_WEIGHT + VOLUME_WEIGHT must be positive")
+        self.cluster_saturation = max(
+            float(os.getenv("CLUSTER_VOLUME_SATURATION", "50")), 2.0
+        )
+
+    def report_volume(self, cluster_sizes: np.ndarray) -> np.ndarray:
+        """Volume (0-10) from the number of near-duplicate reports."""
+        sizes = np.maximum(np.asarray(cluster_sizes, dtype=np.float64), 1.0)
+        return np.minimum(10.0 * np.log(sizes) / np.log(self.cluster_saturation), 10.0)
+
+    def score_arrays(
+        self,
+        bands: np.ndarray,
+        tier_bonus: np.ndarray,
+        urgency_bonus: np.ndarray,
+        cluster_sizes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Compute Severity-Volume scores from pre-extracted arrays.
+
+        Args:
+            bands: Severity band code per row (index into BANDS)
+            tier_bonus: user_tier bonus per row
+            urgency_bonus: urgency bonus per row
+            cluster_sizes: Optional near-duplicate report count per row
+
+        Returns:
+            np.ndarray: Scores in the 0.0-10.0 range
+        """
+        severity = BAND_SEVERITY[bands]
+        volume = (tier_bonus + urgency_bonus) * (10.0 / MAX_VOLUME_BONUS)
+        if cluster_sizes is not None:
+            volume = np.minimum(volume + self.report_volume(cluster_sizes), 10.0)
+        total_weight = self.severity_weight + self.volume_weight
+        scores = (self.severity_weight * severity + self.volume_weight * volume) / total_weight
+        return np.clip(np.round(scores, 2), 0.0, 10.0)
+
+    def score_batch(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        categories: Optional[Sequence[Optional[str]]] = None,
+        cluster_sizes: Optional[Sequence[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score a batch of raw_feedback rows.
+
+        Args:
+            rows: Rows with id, raw_text, metadata and optionally category
+            categories: Optional category per row, overriding row['category']
+            cluster_sizes: Optional near-duplicate report count per row
+
+        Returns:
+            list: One dict per row with feedback_id, category, score and
+            confident (False when the row should be reviewed by the LLM)
+        """
+        n = len(rows)
+        if n == 0:
+            return []
+
+        unknown_tier, unknown_urgency = len(_TIER_NAMES), len(_URGENCY_NAMES)
+        metadata = [_parse_metadata(row.get("metadata")) for row in rows]
+        tier_codes = _code_array([m.get("user_tier", "") for m in metadata], _TIER_CODES, unknown_tier)
+        urgency_codes = _code_array([m.get("urgency", "") for m in metadata], _URGENCY_CODES, unknown_urgency)
+        if categories is None:
+            categories = [row.get("category") for row in rows]
+        category_codes = _code_array([category or "" for category in categories], _CATEGORY_CODES, -1)
+
+        # Reworded and repeated reports share text, so bands are detected
+        # once per distinct lowercased text and gathered back by index
+        text_index: Dict[str, int] = {}
+        positions = np.fromiter(
+            (text_index.setdefault((row.get("raw_text") or "").lower(), len(text_index)) for row in rows),
+            dtype=np.int64, count=n
+        )
+        with _WORDS_LOCK:
+            distinct = [_detect_lowered(text) for text in text_index]
+        detected = np.fromiter((band for band, _ in distinct), dtype=np.int64, count=len(distinct))[positions]
+        ambiguous = np.fromiter((flag for _, flag in distinct), dtype=bool, count=len(distinct))[positions]
+
+        has_category = category_codes >= 0
+        has_band = detected >= 0
+        detected_category = np.where(has_band, BAND_CATEGORY[np.maximum(detected, 0)], -1)
+
+        # Known category: keep the keyword band only if it agrees with it.
+        # Unknown category: use the keyword band, falling back to "other".
+        category_band = CATEGORY_DEFAULT_BAND[np.maximum(category_codes, 0)]
+        bands = np.where(
+            has_category,
+            np.where(detected_category == category_codes, detected, category_band),
+            np.where(has_band, detected, _BAND_CODES["other"])
+        )
+        confident = (
+            (has_category | (has_band & ~ambiguous))
+            & (tier_codes != unknown_tier)
+            & (urgency_codes != unknown_urgency)
+        )
+        tier_bonus = _TIER_BONUS_TABLE[tier_codes]
+        urgency_bonus = _URGENCY_BONUS_TABLE[urgency_codes]
+
+        scores = self.score_arrays(
+            bands, tier_bonus, urgency_bonus,
+            np.asarray(cluster_sizes) if cluster_sizes is not None else None
+        )
+        category_names = [CATEGORIES[code] for code in BAND_CATEGORY[bands].tolist()]
+
+        return [
+            {
+                "feedback_id": row.get("id"),
+                "category": category,
+                "score": score,
+                "confident": is_confident,
+            }
+            for row, category, score, is_confident in zip(
+                rows, category_names, scores.tolist(), confident.tolist()
+            )
+        ]
+
+
+def score_feedback(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score rows with weights taken from the environment."""
+    return SeverityVolumeScorer().score_batch(rows)
@@ -0,0 +1,338 @@
+"""
+SURF Customer Feedback Agent - Slack Delivery Client
+====================================================
+Async Slack client with one persistent HTTP session, token-bucket rate
+limiting per workspace and per channel, Retry-After handling and jittered
+retries. Messages to several channels are posted concurrently.
+
+Sync callers (the CrewAI tool, the outbox worker) go through
+deliver_sync() or run_with_client(), which run the shared client on a
+background event loop so connections are reused across calls.
+
+Configuration:
+    SLACK_BOT_TOKEN        - bot token for chat.postMessage
+    SLACK_WEBHOOK_URL      - incoming webhook (used instead of the bot token)
+    SLACK_API_URL          - Web API base URL (default: https://slack.com/api/);
+                             point it at a fake server for testing
+    SLACK_CHANNEL_RATE     - messages per second per channel (default: 1)
+    SLACK_WORKSPACE_RATE   - messages per second per workspace (default: 5)
+    SLACK_WORKSPACE_BURST  - workspace bucket size (default: 10)
+    SLACK_MAX_RETRIES      - retries on 429/5xx/network errors (default: 3)
+    SLACK_TIMEOUT          - HTTP timeout in seconds (default: 10)
+"""
+
+import os
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+import httpx
+
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_API_URL = "https://slack.com/api/"
+
+# Web API errors worth another attempt; everything else is permanent
+RETRYABLE_ERRORS = {
+    "ratelimited", "internal_error", "fatal_error",
+    "service_unavailable", "request_timeout",
+    "invalid_response",  # a 200 that isn't Slack JSON, e.g. a proxy page
+}
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """
+    Seconds to wait from a Retry-After header.
+
+    Accepts delta-seconds or an HTTP-date; a missing or unparseable
+    value gives default.
+    """
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        seconds = (moment - datetime.now(timezone.utc)).total_seconds()
+    if seconds != seconds:  # NaN
+        return default
+    return min(max(seconds, 0.0), 3600.0)
+
+
+class TokenBucket:
+    """
+    Async token bucket; acquire() waits until a token is available.
+
+    pause() empties the bucket until a deadline, so a 429 for one message
+    holds back every message sharing the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token; returns the seconds spent waiting."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+
+class SlackDeliveryClient:
+    """
+    Posts Slack messages over a persistent async HTTP session.
+    """
+
+    def __init__(
+        self,
+        bot_token: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+        api_url: Optional[str] = None,
+        channel_rate: Optional[float] = None,
+        workspace_rate: Optional[float] = None,
+        workspace_burst: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.bot_token = bot_token if bot_token is not None else os.getenv("SLACK_BOT_TOKEN")
+        self.webhook_url = webhook_url if webhook_url is not None else os.getenv("SLACK_WEBHOOK_URL")
+        self.api_url = (api_url or os.getenv("SLACK_API_URL", DEFAULT_API_URL)).rstrip("/") + "/"
+        self.channel_rate = channel_rate or float(os.getenv("SLACK_CHANNEL_RATE", "1"))
+        self.workspace_rate = workspace_rate or float(os.getenv("SLACK_WORKSPACE_RATE", "5"))
+        self.workspace_burst = workspace_burst or float(os.getenv("SLACK_WORKSPACE_BURST", "10"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("SLACK_MAX_RETRIES", "3"))
+        self._client = httpx.AsyncClient(
+            timeout=timeout or float(os.getenv("SLACK_TIMEOUT", "10")),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            transport=transport
+        )
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.webhook_url or self.bot_token)
+
+    def _bucket(self, key: str, rate: float, capacity: float) -> TokenBucket:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(rate, capacity)
+        return self._buckets[key]
+
+    def _workspace_key(self, credential: str) -> str:
+        return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16]
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        payload: Dict[str, Any],
+        workspace: str,
+        channel: str,
+        headers: Optional[Dict[str, str]] = None,
+        web_api: bool = True
+    ) -> Dict[str, Any]:
+        """POST with rate limiting and retries; returns a delivery result dict."""
+        workspace_bucket = self._bucket(f"ws:{workspace}", self.workspace_rate, self.workspace_burst)
+        channel_bucket = self._bucket(f"ch:{workspace}:{channel}", self.channel_rate, 1)
+        started = time.perf_counter()
+        error = "unknown"
+        for attempt in range(self.max_retries + 1):
+            await channel_bucket.acquire()
+            await workspace_bucket.acquire()
+            retry_after: Optional[float] = None
+            try:
+                response = await self._client.post(url, json=payload, headers=headers)
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    error = "ratelimited"
+                    # Slack's limit applies to everyone posting to this channel
+                    channel_bucket.pause(retry_after)
+                elif response.status_code >= 500:
+                    error = f"http_{response.status_code}"
+                elif response.status_code >= 400:
+                    error = f"http_{response.status_code}: {response.text[:200]}"
+                    break
+                else:
+                    try:
+                        data = response.json() if web_api else {"ok": True}
+                    except ValueError:
+                        data = None
+                    if not isinstance(data, dict):
+                        data = {"ok": False, "error": "invalid_response"}
+                    if data.get("ok"):
+                        metrics.observe(
+                            "surf_slack_delivery_seconds", time.perf_counter() - started,
+                            method=method, status="success"
+                        )
+                        return {
+                            "success": True,
+                            "method": method,
+                            "channel": channel,
+                            "timestamp": data.get("ts", ""),
+                            "attempts": attempt + 1,
+                        }
+                    error = data.get("error", "unknown")
+                    if error not in RETRYABLE_ERRORS:
+                        break
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                # Full jitter, at least as long as Slack asked for
+                delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                metrics.inc("surf_slack_retries_total", method=method, reason=error.split(":")[0])
+                logger.warning(
+                    f"⚠️  Slack {method} to {channel} failed ({error}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+        metrics.observe(
+            "surf_slack_delivery_seconds", time.perf_counter() - started,
+            method=method, status="failed"
+        )
+        logger.error(f"❌ Slack {method} to {channel} failed: {error}")
+        return {"success": False, "method": method, "channel": channel, "error": error}
+
+    async def post_message(self, channel: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Post to a channel with chat.postMessage."""
+        if not self.bot_token:
+            raise ValueError("SLACK_BOT_TOKEN is not configured")
+        return await self._send(
+            "bot_token",
+            self.api_url + "chat.postMessage",
+            {"channel": channel, **payload},
+            workspace=self._workspace_key(self.bot_token),
+            channel=channel,
+            headers={"Authorization": f"Bearer {self.bot_token}"}
+        )
+
+    async def post_webhook(self, payload: Dict[str, Any], webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """Post to an incoming webhook (its channel is fixed by the webhook)."""
+        url = webhook_url or self.webhook_url
+        if not url:
+            raise ValueError("SLACK_WEBHOOK_URL is not configured")
+        return await self._send(
+            "webhook", url, payload,
+            workspace=self._workspace_key(url),
+            channel="webhook",
+            web_api=False
+        )
+
+    async def deliver(self, payload: Dict[str, Any], channels: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Deliver a message to every channel concurrently.
+
+        Uses the webhook when one is configured (once, whatever the
+        channels), otherwise the bot token per channel.
+        """
+        if self.webhook_url:
+            return [await self.post_webhook(payload)]
+        return list(await asyncio.gather(*(self.post_message(channel, payload) for channel in channels)))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "SlackDeliveryClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+class _BackgroundLoop:
+    """Event loop on a daemon thread that keeps the shared client alive."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="slack-delivery", daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+
+_background: Optional[_BackgroundLoop] = None
+_shared_client: Optional[SlackDeliveryClient] = None
+_shared_lock = threading.Lock()
+
+
+def _shared() -> _BackgroundLoop:
+    global _background, _shared_client
+    with _shared_lock:
+        if _background is None:
+            _background = _BackgroundLoop()
+        if _shared_client is None:
+            # The client's connection pool belongs to the background loop
+            _shared_client = _background.run(_create_client())
+        return _background
+
+
+async def _create_client() -> SlackDeliveryClient:
+    return SlackDeliveryClient()
+
+
+def get_slack_client() -> SlackDeliveryClient:
+    """Shared client configured from the environment."""
+    _shared()
+    return _shared_client
+
+
+def run_with_client(func: Callable[[SlackDeliveryClient], Awaitable[Any]]) -> Any:
+    """Run func(client) on the shared client's loop and wait for the result."""
+    background = _shared()
+    return background.run(func(_shared_client))
+
+
+def deliver_sync(payload: Dict[str, Any], channels: Sequence[str]) -> List[Dict[str, Any]]:
+    """Blocking deliver() on the shared client, for sync callers."""
+    return run_with_client(lambda client: client.deliver(payload, channels))
+
+
+def close_slack_client() -> None:
+    """Close the shared client (e.g. at process exit)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None and _background is not None:
+            _background.run(_shared_client.aclose())
+        _shared_client = None
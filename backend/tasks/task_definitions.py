@@ -4,8 +4,19 @@ SURF Customer Feedback Agent - Task Definitions
 Defines specific tasks for each agent in the pipeline.
 """
 
+import os
+from typing import Optional
 from crewai import Task
 
+# Bump when the analysis prompt or scoring rubric changes; cached per-item
+# LLM results from older versions are then ignored.
+ANALYSIS_PROMPT_VERSION = "3"
+
+
+def _top_items_count(top_n: Optional[int]) -> int:
+    """Resolve the top-N size (default: TOP_ITEMS_COUNT, 3)."""
+    return top_n if top_n is not None else int(os.getenv("TOP_ITEMS_COUNT", "3"))
+
 
 def create_ingestion_task(agent) -> Task:
     """
@@ -16,9 +27,11 @@ def create_ingestion_task(agent) -> Task:
         description=(
             "Retrieve all raw customer feedback from the PostgreSQL database "
             "using the PostgresTool. Your objectives:\n"
-            "1. Use get_all_feedback operation to retrieve all feedback items\n"
+            "1. Use get_all_feedback operation to retrieve the first page of "
+            "feedback; it includes total_items and per-source counts. Follow "
+            "next_after_id only if you need more items to verify\n"
             "2. Verify data integrity (non-empty text, valid source)\n"
-            "3. Count total items retrieved\n"
+            "3. Report total items from total_items\n"
             "4. Log a summary of feedback sources (Slack, Email, Notion, etc.)\n"
             "5. Prepare data for the next agent (AnalyzerAgent)\n\n"
             "Expected output: A JSON report containing:\n"
@@ -42,11 +55,17 @@ def create_analysis_task(agent, context_task=None) -> Task:
     """
     return Task(
         description=(
-            "Analyze all unprocessed feedback and calculate precise scores. "
-            "For EACH feedback item:\n\n"
-            "1. Read unprocessed feedback using PostgresTool "
-            "get_unprocessed_feedback operation\n"
-            "2. Categorize into: Bug, Feature, UX, or Other\n"
+            "Analyze all unprocessed feedback and calculate precise scores.\n\n"
+            "1. Get the rule engine's results. If your context has a "
+            "[rule_scoring] section, the rule engine has already run: use "
+            "that output and do NOT run score_unprocessed_feedback again. "
+            "Otherwise run PostgresTool score_unprocessed_feedback operation "
+            "first. The deterministic rule engine scores and saves every item "
+            "it is confident about and returns the rest under 'needs_review'. "
+            "Near-duplicate reports are collapsed: each needs_review item "
+            "represents cluster_size reports of the same issue\n"
+            "2. For EACH item in 'needs_review' only, categorize into: "
+            "Bug, Feature, UX, or Other (suggested_category is a hint)\n"
             "3. Calculate Severity-Volume Score (0.0-10.0 FLOAT) based on:\n"
             "   - Severity factors:\n"
             "     * Security issues: 9-10\n"
@@ -55,10 +74,13 @@ def create_analysis_task(agent, context_task=None) -> Task:
             "     * Critical bugs: 7-9\n"
             "     * UX problems: 4-6\n"
             "     * Feature requests: 3-8\n"
-            "   - Volume factors (from metadata):\n"
+            "   - Volume factors (metadata and report count):\n"
             "     * user_tier: Enterprise (+2), Pro (+1), Free (+0)\n"
             "     * urgency: critical (+2), high (+1), medium (+0.5), low (+0)\n"
-            "4. Update each item using update_item_score operation\n"
+            "     * cluster_size: more reports of the same issue mean higher "
+            "volume (suggested_score already accounts for it)\n"
+            "4. Save all reviewed items in ONE call using the update_item_scores "
+            "operation with items=[{feedback_id, category, score}, ...]\n"
             "5. Log statistics: avg score, highest score, category distribution\n\n"
             "Expected output: Analysis report with:\n"
             "- total_analyzed: count\n"
@@ -76,16 +98,17 @@ def create_analysis_task(agent, context_task=None) -> Task:
     )
 
 
-def create_prioritization_task(agent, context_task=None) -> Task:
+def create_prioritization_task(agent, context_task=None, top_n: Optional[int] = None) -> Task:
     """
     Task 3: Strategic Prioritization
     Agent: PrioritizerAgent
     """
+    top_n = _top_items_count(top_n)
     return Task(
         description=(
-            "Select and prioritize the top 3 feedback items. Steps:\n\n"
-            "1. Use PostgresTool read_top_items operation (limit=3)\n"
-            "2. For EACH of the top 3 items, create an action plan JSON:\n"
+            f"Select and prioritize the top {top_n} feedback items. Steps:\n\n"
+            f"1. Use PostgresTool read_top_items operation (limit={top_n})\n"
+            f"2. For EACH of the top {top_n} items, create an action plan JSON:\n"
             "   {\n"
             "     'feedback_id': int,\n"
             "     'title': 'Clear, concise title (max 100 chars)',\n"
@@ -99,15 +122,15 @@ def create_prioritization_task(agent, context_task=None) -> Task:
             "       'dependencies': 'Required resources/teams'\n"
             "     }\n"
             "   }\n"
-            "3. Rank items 1-3 by priority\n"
+            f"3. Rank items 1-{top_n} by priority\n"
             "4. Pass to RetentionCriticAgent for financial analysis\n\n"
             "Expected output: JSON with:\n"
             "- total_analyzed: total feedback count from previous step\n"
-            "- top_3_items: array of 3 prioritized items with action plans\n"
+            f"- top_items: array of {top_n} prioritized items with action plans\n"
             "- status: 'ready_for_risk_assessment'"
         ),
         expected_output=(
-            "JSON containing total_analyzed count, top_3_items array with "
+            "JSON containing total_analyzed count, top_items array with "
             "detailed action plans, and status='ready_for_risk_assessment'"
         ),
         agent=agent,
@@ -115,41 +138,41 @@ def create_prioritization_task(agent, context_task=None) -> Task:
     )
 
 
-def create_risk_assessment_task(agent, context_task=None) -> Task:
+def create_risk_assessment_task(agent, context_task=None, top_n: Optional[int] = None) -> Task:
     """
     Task 4: Pre-Mortem Financial Risk Assessment
     Agent: RetentionCriticAgent
     """
+    top_n = _top_items_count(top_n)
     return Task(
         description=(
-            "Conduct pre-mortem financial analysis on the top 3 items. "
+            f"Conduct pre-mortem financial analysis on the top {top_n} items. "
             "For EACH item, answer: What happens if we IGNORE this for 90 days?\n\n"
-            "Calculate and document:\n"
-            "1. Customer churn risk:\n"
-            "   - % of customers likely to churn\n"
-            "   - $ ARR loss (use Enterprise=$100K-500K, Pro=$10K-50K)\n"
-            "2. Revenue impact from lost new deals\n"
-            "3. Support cost increases\n"
-            "4. Brand/reputation damage in $$\n\n"
-            "For EACH of the top 3 items, add a 'pre_mortem_forecast' field:\n"
-            "{\n"
-            "  'pre_mortem_forecast': 'STRING with specific $ estimates. Example:\n"
+            "1. Call the Pre-Mortem Risk Assessment Tool ONCE with ALL "
+            "top_items from the previous step (items=[...]). It assesses "
+            "every item concurrently and calculates:\n"
+            "   - Customer churn risk (% and $ ARR loss)\n"
+            "   - Revenue impact from lost new deals\n"
+            "   - Support cost increases\n"
+            "   - Brand/reputation damage in $$\n"
+            "2. Review the returned 'pre_mortem_forecast' for each item. "
+            "Items with 'risk_assessment_error' may be assessed manually "
+            "using Enterprise=$100K-500K and Pro=$10K-50K LTV\n"
+            "3. Keep the tool's 'total_risk_estimate'\n\n"
+            "Each 'pre_mortem_forecast' is a STRING with specific $ estimates. Example:\n"
             "    Estimated 90-day impact if ignored:\n"
             "    - Churn: 15-20% of Enterprise customers (~$750K-$1.5M ARR loss)\n"
             "    - Lost deals: 10 prospects, ~$500K pipeline impact\n"
             "    - Support costs: +30% ticket volume, ~$50K additional costs\n"
-            "    - Total estimated loss: $1.3M-$2.0M over 90 days'\n"
-            "}\n\n"
-            "BE SPECIFIC with dollar amounts and percentages. Use conservative "
-            "estimates based on issue severity and customer tier.\n\n"
+            "    - Total estimated loss: $1.3M-$2.0M over 90 days\n\n"
             "Expected output: Enhanced JSON with pre_mortem_forecast added to "
-            "each of the top 3 items, plus:\n"
+            f"each of the top {top_n} items, plus:\n"
             "- total_risk_estimate: sum of worst-case scenarios\n"
             "- status: 'ready_for_delivery'"
         ),
         expected_output=(
             "Enhanced JSON with pre_mortem_forecast strings containing specific "
-            "dollar amounts for each top 3 item, total_risk_estimate, "
+            f"dollar amounts for each of the top {top_n} items, total_risk_estimate, "
             "and status='ready_for_delivery'"
         ),
         agent=agent,
@@ -5,10 +5,13 @@ SURF Customer Feedback Agent - Tools Package
 
 from backend.tools.postgres_tool import postgres_tool, PostgresTool
 from backend.tools.slack_tool import slack_tool, PostToSlackTool
+from backend.tools.risk_tool import risk_tool, RiskAssessmentTool
 
 __all__ = [
     'postgres_tool',
     'PostgresTool',
     'slack_tool',
     'PostToSlackTool',
+    'risk_tool',
+    'RiskAssessmentTool',
 ]
@@ -4,7 +4,8 @@ SURF Customer Feedback Agent - PostgreSQL Tool
 Custom CrewAI tool for database operations.
 """
 
-from typing import Type, List, Dict, Any
+import json
+from typing import Type, List, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field
 try:
     from crewai_tools import BaseTool
@@ -14,6 +15,12 @@ except ImportError:
 import logging
 
 from backend.db_connection import FeedbackDatabase
+from backend.scoring import SeverityVolumeScorer, CATEGORIES
+from backend.dedup import cluster_pending_feedback, dedup_enabled
+from backend.llm_cache import LLMResultCache
+from backend.tasks.task_definitions import ANALYSIS_PROMPT_VERSION
+from backend.tools.serializer import serialize_result, serialize_error
+from backend.metrics import track_tool_call
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +46,16 @@ class UpdateItemScoreInput(BaseModel):
     )
 
 
+class UpdateItemScoresInput(BaseModel):
+    """Input schema for update_item_scores."""
+    items: List[Dict[str, Any]] = Field(
+        description=(
+            "List of {feedback_id, category, score} objects to update "
+            "in a single database call"
+        )
+    )
+
+
 class GetUnprocessedFeedbackInput(BaseModel):
     """Input schema for get_unprocessed_feedback."""
     limit: int = Field(
@@ -47,6 +64,26 @@ class GetUnprocessedFeedbackInput(BaseModel):
     )
 
 
+class ScoreUnprocessedFeedbackInput(BaseModel):
+    """Input schema for score_unprocessed_feedback."""
+    limit: int = Field(
+        default=1000,
+        description="Number of unprocessed items to score with the rule engine"
+    )
+
+
+class GetAllFeedbackInput(BaseModel):
+    """Input schema for get_all_feedback."""
+    after_id: int = Field(
+        default=0,
+        description="Continuation token (next_after_id from the previous page)"
+    )
+    page_size: int = Field(
+        default=100,
+        description="Maximum number of feedback items per page"
+    )
+
+
 class PostgresTool(BaseTool):
     """
     Custom CrewAI tool for PostgreSQL database operations.
@@ -60,7 +97,13 @@ class PostgresTool(BaseTool):
         "and retrieve unprocessed feedback. "
         "Operations: read_top_items(limit=3), "
         "update_item_score(feedback_id, category, score), "
-        "get_unprocessed_feedback(limit=10)"
+        "update_item_scores(items=[{feedback_id, category, score}, ...]), "
+        "get_unprocessed_feedback(limit=10), "
+        "score_unprocessed_feedback(limit=1000), "
+        "get_all_feedback(after_id=0, page_size=100). "
+        "Read operations accept optional fields=[...] and max_text_chars "
+        "to control the size of the result. Row lists are returned as "
+        "{columns: [...], rows: [[...], ...]}."
     )
     
     def _run(self, operation: str, **kwargs) -> str:
@@ -69,38 +112,69 @@ class PostgresTool(BaseTool):
         
         Args:
             operation: The operation to perform
-            **kwargs: Operation-specific parameters
+            **kwargs: Operation-specific parameters, plus optional
+                fields/max_text_chars output overrides for read operations
         
         Returns:
-            JSON string with operation results
+            Compact JSON string with operation results
         """
+        with track_tool_call("postgres", operation):
+            return self._dispatch(operation, **kwargs)
+    
+    def _dispatch(self, operation: str, **kwargs) -> str:
+        """Route an operation to its implementation."""
+        output_options = {
+            key: kwargs[key]
+            for key in ("fields", "max_text_chars")
+            if kwargs.get(key) is not None
+        }
         try:
             if operation == "read_top_items":
-                return self._read_top_items(kwargs.get("limit", 3))
+                return self._read_top_items(
+                    kwargs.get("limit", 3),
+                    output_options=output_options
+                )
             elif operation == "update_item_score":
                 return self._update_item_score(
                     kwargs.get("feedback_id"),
                     kwargs.get("category"),
                     kwargs.get("score")
                 )
+            elif operation == "update_item_scores":
+                return self._update_item_scores(kwargs.get("items", []))
             elif operation == "get_unprocessed_feedback":
                 return self._get_unprocessed_feedback(
-                    kwargs.get("limit", 10)
+                    kwargs.get("limit", 10),
+                    output_options=output_options
+                )
+            elif operation == "score_unprocessed_feedback":
+                return self._score_unprocessed_feedback(
+                    kwargs.get("limit", 1000),
+                    output_options=output_options
                 )
             elif operation == "get_all_feedback":
-                return self._get_all_feedback()
+                return self._get_all_feedback(
+                    kwargs.get("after_id", 0),
+                    kwargs.get("page_size", 100),
+                    output_options=output_options
+                )
             else:
                 return f"Unknown operation: {operation}"
         except Exception as e:
             logger.error(f"PostgresTool error: {e}")
             return f"Error: {str(e)}"
     
-    def _read_top_items(self, limit: int = 3) -> str:
+    def _read_top_items(
+        self,
+        limit: int = 3,
+        output_options: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Read top feedback items by score.
         
         Args:
             limit: Number of items to retrieve (default: 3)
+            output_options: Optional fields/max_text_chars overrides
         
         Returns:
             JSON string with top items
@@ -115,11 +189,10 @@ class PostgresTool(BaseTool):
                 "items": items
             }
             
-            import json
-            return json.dumps(result, indent=2, default=str)
+            return serialize_result("read_top_items", result, **(output_options or {}))
         except Exception as e:
             logger.error(f"Error reading top items: {e}")
-            return f'{{"success": false, "error": "{str(e)}"}}'
+            return serialize_error("read_top_items", e)
     
     def _update_item_score(
         self,
@@ -145,27 +218,123 @@ class PostgresTool(BaseTool):
                 score=score,
                 processed=True
             )
+            self._cache_llm_scores([
+                {"feedback_id": feedback_id, "category": category, "score": score}
+            ])
+            duplicates = FeedbackDatabase.propagate_cluster_analysis([feedback_id])
             
             result = {
                 "success": True,
                 "feedback_id": feedback_id,
                 "category": category,
                 "score": score,
+                "duplicates_updated": duplicates,
                 "message": f"Updated feedback {feedback_id} successfully"
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return serialize_result("update_item_score", result)
         except Exception as e:
             logger.error(f"Error updating item score: {e}")
-            return f'{{"success": false, "error": "{str(e)}"}}'
+            return serialize_error("update_item_score", e)
     
-    def _get_unprocessed_feedback(self, limit: int = 10) -> str:
+    def _update_item_scores(
+        self,
+        items: Union[str, List[Dict[str, Any]]]
+    ) -> str:
+        """
+        Update many feedback items with category and score in one statement.
+        
+        Args:
+            items: List (or JSON array string) of
+                {feedback_id, category, score} objects
+        
+        Returns:
+            JSON string with updated count and per-row failures
+        """
+        try:
+            if isinstance(items, str):
+                items = json.loads(items)
+            
+            valid = {}
+            failed = []
+            for item in items or []:
+                feedback_id = item.get("feedback_id") if isinstance(item, dict) else None
+                try:
+                    feedback_id = int(feedback_id)
+                    category = str(item.get("category", "")).strip().title()
+                    if category.upper() == "UX":
+                        category = "UX"
+                    if category not in CATEGORIES:
+                        raise ValueError(f"invalid category {item.get('category')!r}")
+                    score = float(item.get("score"))
+                    if not 0.0 <= score <= 10.0:
+                        raise ValueError(f"score {score} outside 0.0-10.0")
+                except (TypeError, ValueError) as e:
+                    failed.append({"feedback_id": feedback_id, "error": str(e)})
+                    continue
+                # Last entry wins when an ID is repeated
+                valid[feedback_id] = {
+                    "feedback_id": feedback_id,
+                    "category": category,
+                    "score": score
+                }
+            
+            updated = set(
+                FeedbackDatabase.update_feedback_analysis_batch(list(valid.values()))
+            )
+            self._cache_llm_scores(
+                [valid[feedback_id] for feedback_id in valid if feedback_id in updated]
+            )
+            failed.extend(
+                {"feedback_id": feedback_id, "error": "feedback item not found"}
+                for feedback_id in valid
+                if feedback_id not in updated
+            )
+            duplicates = FeedbackDatabase.propagate_cluster_analysis(list(updated))
+            
+            result = {
+                "success": not failed,
+                "requested": len(items or []),
+                "updated": len(updated),
+                "duplicates_updated": duplicates,
+                "failed": failed,
+                "message": f"Updated {len(updated)} feedback items"
+            }
+            
+            return serialize_result("update_item_scores", result)
+        except Exception as e:
+            logger.error(f"Error updating item scores: {e}")
+            return serialize_error("update_item_scores", e)
+    
+    def _cache_llm_scores(self, updates: List[Dict[str, Any]]) -> None:
+        """Store LLM-assigned categories and scores in the result cache."""
+        if not updates:
+            return
+        by_id = {u["feedback_id"]: u for u in updates}
+        rows = FeedbackDatabase.get_feedback_by_ids(list(by_id))
+        _analysis_cache().put_many([
+            {
+                "raw_text": row["raw_text"],
+                "metadata": row["metadata"],
+                "result": {
+                    "category": by_id[row["id"]]["category"],
+                    "score": by_id[row["id"]]["score"]
+                }
+            }
+            for row in rows
+        ])
+    
+    def _get_unprocessed_feedback(
+        self,
+        limit: int = 10,
+        output_options: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Get unprocessed feedback items.
         
         Args:
             limit: Number of items to retrieve
+            output_options: Optional fields/max_text_chars overrides
         
         Returns:
             JSON string with unprocessed items
@@ -179,33 +348,153 @@ class PostgresTool(BaseTool):
                 "items": items
             }
             
-            import json
-            return json.dumps(result, indent=2, default=str)
+            return serialize_result("get_unprocessed_feedback", result, **(output_options or {}))
         except Exception as e:
             logger.error(f"Error getting unprocessed feedback: {e}")
-            return f'{{"success": false, "error": "{str(e)}"}}'
+            return serialize_error("get_unprocessed_feedback", e)
     
-    def _get_all_feedback(self) -> str:
+    def _score_unprocessed_feedback(
+        self,
+        limit: int = 1000,
+        output_options: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
-        Get all raw feedback from database.
+        Score unprocessed feedback with the deterministic rule engine.
+        
+        Confidently scored items are written back immediately; items the
+        rules are unsure about are returned for LLM review.
+        
+        Args:
+            limit: Number of items to score
+            output_options: Optional fields/max_text_chars overrides
         
         Returns:
-            JSON string with all feedback items
+            JSON string with scoring summary and items needing review
         """
         try:
-            items = FeedbackDatabase.get_all_raw_feedback()
+            if dedup_enabled():
+                try:
+                    cluster_pending_feedback()
+                except Exception as e:
+                    logger.warning(f"⚠️ Near-duplicate clustering failed, scoring without it: {e}")
             
+            items = FeedbackDatabase.get_unprocessed_feedback(limit=limit)
+            sizes = FeedbackDatabase.get_cluster_sizes([item.get("cluster_id") for item in items])
+            cluster_sizes = [sizes.get(item.get("cluster_id"), 1) for item in items]
+            results = SeverityVolumeScorer().score_batch(items, cluster_sizes=cluster_sizes)
+            
+            unsure = [
+                item for item, scored_item in zip(items, results)
+                if not scored_item["confident"]
+            ]
+            cached = _analysis_cache().get_many(unsure)
+            
+            confident = []
+            needs_review = []
+            reviewed_clusters = set()
+            duplicates_skipped = 0
+            for item, scored_item, cluster_size in zip(items, results, cluster_sizes):
+                if scored_item["confident"]:
+                    confident.append(scored_item)
+                elif item["id"] in cached:
+                    confident.append({
+                        "feedback_id": item["id"],
+                        "category": cached[item["id"]]["category"],
+                        "score": cached[item["id"]]["score"]
+                    })
+                    if item.get("cluster_id") is not None:
+                        # Its cached result stands in for the cluster's review
+                        reviewed_clusters.add(item["cluster_id"])
+                elif item.get("cluster_id") in reviewed_clusters:
+                    # One representative per cluster; its review result is
+                    # applied to the rest by update_item_scores
+                    duplicates_skipped += 1
+                else:
+                    if item.get("cluster_id") is not None:
+                        reviewed_clusters.add(item["cluster_id"])
+                    needs_review.append({
+                        "id": item["id"],
+                        "raw_text": item["raw_text"],
+                        "metadata": item.get("metadata"),
+                        "cluster_size": cluster_size,
+                        "suggested_category": scored_item["category"],
+                        "suggested_score": scored_item["score"]
+                    })
+            scored = len(FeedbackDatabase.update_feedback_analysis_batch(confident))
+            duplicates = FeedbackDatabase.propagate_cluster_analysis([
+                item["id"] for item in items
+                if item["id"] in cached and item.get("cluster_id") is not None
+            ])
+            
+            logger.info(
+                f"🧮 Rule engine scored {scored} items "
+                f"({len(cached)} from LLM cache), {len(needs_review)} need review, "
+                f"{duplicates_skipped} near-duplicates deferred"
+            )
             result = {
                 "success": True,
-                "count": len(items),
-                "items": items
+                "scored": scored,
+                "cache_hits": len(cached),
+                "duplicates_skipped": duplicates_skipped,
+                "duplicates_updated": duplicates,
+                "needs_review_count": len(needs_review),
+                "needs_review": needs_review
+            }
+            
+            return serialize_result("score_unprocessed_feedback", result, **(output_options or {}))
+        except Exception as e:
+            logger.error(f"Error scoring unprocessed feedback: {e}")
+            return serialize_error("score_unprocessed_feedback", e)
+    
+    def _get_all_feedback(
+        self,
+        after_id: int = 0,
+        page_size: int = 100,
+        output_options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Get one page of raw feedback from database.
+        
+        Pages are keyset-paginated on id. The first page (after_id=0)
+        also includes total counts per source.
+        
+        Args:
+            after_id: Continuation token from the previous page
+            page_size: Maximum number of items per page (capped at 1000)
+            output_options: Optional fields/max_text_chars overrides
+        
+        Returns:
+            JSON string with the page of feedback items and next_after_id
+        """
+        try:
+            after_id = int(after_id or 0)
+            page_size = max(1, min(int(page_size or 100), 1000))
+            page = FeedbackDatabase.get_raw_feedback_page(
+                after_id=after_id,
+                limit=page_size
+            )
+            
+            result = {
+                "success": True,
+                "count": len(page["items"]),
+                "items": page["items"],
+                "next_after_id": page["next_after_id"],
+                "has_more": page["next_after_id"] is not None
             }
+            if after_id == 0:
+                sources = FeedbackDatabase.get_feedback_source_counts()
+                result["total_items"] = sum(sources.values())
+                result["sources"] = sources
             
-            import json
-            return json.dumps(result, indent=2, default=str)
+            return serialize_result("get_all_feedback", result, **(output_options or {}))
         except Exception as e:
             logger.error(f"Error getting all feedback: {e}")
-            return f'{{"success": false, "error": "{str(e)}"}}'
+            return serialize_error("get_all_feedback", e)
+
+
+def _analysis_cache() -> LLMResultCache:
+    """Result cache for AnalyzerAgent category/score decisions."""
+    return LLMResultCache(task="analysis", prompt_version=ANALYSIS_PROMPT_VERSION)
 
 
 # Create singleton instance for easy import
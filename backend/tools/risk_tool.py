@@ -0,0 +1,73 @@
+"""
+SURF Customer Feedback Agent - Pre-Mortem Risk Assessment Tool
+=============================================================
+Custom CrewAI tool that fans out per-item risk assessments concurrently.
+"""
+
+import json
+import logging
+from typing import List, Dict, Any, Union
+from pydantic import BaseModel, Field
+try:
+    from crewai_tools import BaseTool
+except ImportError:
+    # Fallback for newer CrewAI versions
+    from crewai.tools import BaseTool
+
+from backend.risk_assessment import assess_risks
+from backend.tools.serializer import dumps
+from backend.metrics import track_tool_call
+
+logger = logging.getLogger(__name__)
+
+
+class AssessRisksInput(BaseModel):
+    """Input schema for assess_risks."""
+    items: List[Dict[str, Any]] = Field(
+        description=(
+            "Prioritized items to assess, each with feedback_id, title, "
+            "category, score, team and action_plan"
+        )
+    )
+
+
+class RiskAssessmentTool(BaseTool):
+    """
+    Custom CrewAI tool for concurrent 90-day pre-mortem analysis.
+    Runs one LLM call per item and merges the results.
+    """
+
+    name: str = "Pre-Mortem Risk Assessment Tool"
+    description: str = (
+        "A tool that runs the 90-day pre-mortem financial risk assessment "
+        "for every prioritized item concurrently. Pass ALL items in one call. "
+        "Returns each item with a 'pre_mortem_forecast' added, plus "
+        "'total_risk_estimate'. Usage: assess_risks(items=[{...}, ...])"
+    )
+
+    def _run(self, items: Union[str, List[Dict[str, Any]]]) -> str:
+        """
+        Assess all prioritized items concurrently.
+
+        Args:
+            items: List (or JSON string) of prioritized items
+
+        Returns:
+            JSON string with assessed items and total_risk_estimate
+        """
+        try:
+            if isinstance(items, str):
+                items = json.loads(items)
+            if isinstance(items, dict):
+                items = items.get("items") or items.get("top_items") or [items]
+
+            with track_tool_call("risk_assessment", "assess_risks"):
+                result = assess_risks(list(items))
+            return dumps({"success": True, **result})
+        except Exception as e:
+            logger.error(f"Error assessing risks: {e}")
+            return dumps({"success": False, "error": str(e)})
+
+
+# Create singleton instance for easy import
+risk_tool = RiskAssessmentTool()
@@ -0,0 +1,195 @@
+"""
+SURF Customer Feedback Agent - Tool Output Serializer
+=====================================================
+Compact JSON encoding for LLM-facing tool results.
+
+Every tool result ends up in the agent's prompt, so rows are projected to
+the fields the agent needs, long text is truncated, and row lists are
+encoded as {"columns": [...], "rows": [[...], ...]} instead of repeating
+every key. Token usage is measured per operation so profiles can be tuned.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+logger = logging.getLogger(__name__)
+
+
+# Per-operation output profiles:
+#   rows_key        - result key holding the list of rows (default: "items")
+#   fields          - columns to keep, in order (None keeps all)
+#   max_text_chars  - truncate string values longer than this (None = no limit)
+TOOL_OUTPUT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "read_top_items": {
+        "fields": [
+            "id", "category", "score", "cluster_size",
+            "source", "raw_text", "metadata",
+        ],
+        "max_text_chars": 400,
+    },
+    "get_unprocessed_feedback": {
+        "fields": ["id", "source", "raw_text", "metadata"],
+        "max_text_chars": 500,
+    },
+    "get_all_feedback": {
+        "fields": ["id", "source", "raw_text"],
+        "max_text_chars": 160,
+    },
+    "score_unprocessed_feedback": {
+        "rows_key": "needs_review",
+        "fields": [
+            "id", "raw_text", "metadata", "cluster_size",
+            "suggested_category", "suggested_score",
+        ],
+        "max_text_chars": 500,
+    },
+}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    """Count prompt tokens (tiktoken if available, else ~4 chars/token)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_text(value: Any, max_chars: Optional[int]) -> Any:
+    """Truncate long strings, marking the cut with an ellipsis."""
+    if max_chars is None or not isinstance(value, str) or len(value) <= max_chars:
+        return value
+    return value[:max(max_chars - 1, 0)] + "…"
+
+
+def encode_rows(
+    rows: Sequence[Dict[str, Any]],
+    fields: Optional[Sequence[str]] = None,
+    max_text_chars: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Project and truncate rows, then encode them column-wise.
+
+    Args:
+        rows: List of row dicts
+        fields: Columns to keep (None keeps every key of the first row)
+        max_text_chars: Maximum length of string values
+
+    Returns:
+        dict: {"columns": [...], "rows": [[...], ...]}
+    """
+    if fields is None:
+        fields = list(rows[0].keys()) if rows else []
+    return {
+        "columns": list(fields),
+        "rows": [
+            [truncate_text(row.get(field), max_text_chars) for field in fields]
+            for row in rows
+        ],
+    }
+
+
+def serialize_result(
+    operation: str,
+    result: Dict[str, Any],
+    fields: Optional[Sequence[str]] = None,
+    max_text_chars: Optional[int] = None
+) -> str:
+    """
+    Serialize a tool result using the operation's output profile.
+
+    Args:
+        operation: Tool operation name (selects the profile and stats bucket)
+        result: Result dict; the profile's rows_key is row-encoded
+        fields: Override the profile's projected fields
+        max_text_chars: Override the profile's text truncation limit
+
+    Returns:
+        Compact JSON string
+    """
+    profile = TOOL_OUTPUT_PROFILES.get(operation, {})
+    rows_key = profile.get("rows_key", "items")
+    payload = dict(result)
+
+    rows = payload.get(rows_key)
+    if isinstance(rows, list) and (not rows or isinstance(rows[0], dict)):
+        payload[rows_key] = encode_rows(
+            rows,
+            fields=fields if fields is not None else profile.get("fields"),
+            max_text_chars=(
+                max_text_chars if max_text_chars is not None
+                else profile.get("max_text_chars")
+            )
+        )
+
+    text = dumps(payload)
+    _record(operation, text)
+    return text
+
+
+def serialize_error(operation: str, error: Exception) -> str:
+    """Serialize a failed tool result."""
+    text = dumps({"success": False, "error": str(error)})
+    _record(operation, text)
+    return text
+
+
+def _record(operation: str, text: str) -> None:
+    """Record output size for an operation."""
+    tokens = estimate_tokens(text)
+    with _stats_lock:
+        entry = _stats.setdefault(
+            operation,
+            {"calls": 0, "chars": 0, "tokens": 0, "max_tokens": 0}
+        )
+        entry["calls"] += 1
+        entry["chars"] += len(text)
+        entry["tokens"] += tokens
+        entry["max_tokens"] = max(entry["max_tokens"], tokens)
+    logger.debug(f"🔢 {operation} result: {len(text)} chars, ~{tokens} tokens")
+
+
+def get_serializer_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get per-operation output size statistics.
+
+    Returns:
+        dict: operation -> calls, chars, tokens, avg_tokens, max_tokens
+    """
+    with _stats_lock:
+        return {
+            operation: dict(
+                entry,
+                avg_tokens=round(entry["tokens"] / entry["calls"], 1) if entry["calls"] else 0.0
+            )
+            for operation, entry in _stats.items()
+        }
+
+
+def reset_serializer_stats() -> None:
+    """Clear per-operation output statistics."""
+    with _stats_lock:
+        _stats.clear()
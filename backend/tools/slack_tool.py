@@ -14,9 +14,8 @@ try:
 except ImportError:
     # Fallback for newer CrewAI versions
     from crewai.tools import BaseTool
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-import requests
+from backend.metrics import track_tool_call
+from backend.slack_client import deliver_sync
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +27,15 @@ class PostToSlackInput(BaseModel):
     )
     channel: str = Field(
         default="#customer-feedback",
-        description="Slack channel to post to"
+        description="Slack channel to post to (comma-separate several channels)"
     )
 
 
 class PostToSlackTool(BaseTool):
     """
     Custom CrewAI tool for posting messages to Slack.
-    Supports both webhook and bot token methods.
+    Supports both webhook and bot token methods; delivery goes through the
+    shared rate-limited client in backend.slack_client.
     """
     
     name: str = "Post to Slack Tool"
@@ -59,18 +59,19 @@ class PostToSlackTool(BaseTool):
         """
         try:
             # Try webhook method first
-            webhook_url = os.getenv("SLACK_WEBHOOK_URL")
-            if webhook_url:
-                return self._post_via_webhook(message, webhook_url)
+            if os.getenv("SLACK_WEBHOOK_URL"):
+                with track_tool_call("slack", "webhook"):
+                    return self._post_via_webhook(message)
             
             # Fall back to bot token method
-            bot_token = os.getenv("SLACK_BOT_TOKEN")
-            if bot_token:
-                return self._post_via_bot(message, channel, bot_token)
+            if os.getenv("SLACK_BOT_TOKEN"):
+                with track_tool_call("slack", "bot"):
+                    return self._post_via_bot(message, channel)
             
             # No credentials configured
             logger.warning("⚠️ No Slack credentials found. Logging locally.")
-            return self._log_locally(message, channel)
+            with track_tool_call("slack", "local"):
+                return self._log_locally(message, channel)
             
         except Exception as e:
             logger.error(f"Error posting to Slack: {e}")
@@ -80,64 +81,62 @@ class PostToSlackTool(BaseTool):
                 "fallback": "Message logged locally"
             }, indent=2)
     
-    def _post_via_webhook(self, message: str, webhook_url: str) -> str:
-        """Post message using Slack webhook."""
+    def _post_via_webhook(self, message: str) -> str:
+        """Post message using the shared client's Slack webhook (SLACK_WEBHOOK_URL)."""
         try:
             # Format message for Slack
             payload = self._format_message(message)
+            result = deliver_sync(payload, ["webhook"])[0]
             
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
+            if result["success"]:
                 logger.info("✅ Message posted to Slack via webhook")
                 return json.dumps({
                     "success": True,
                     "method": "webhook",
+                    "attempts": result["attempts"],
                     "message": "Posted to Slack successfully"
                 }, indent=2)
             else:
-                logger.error(f"Slack webhook error: {response.text}")
+                logger.error(f"Slack webhook error: {result['error']}")
                 return self._log_locally(message, "webhook-fallback")
                 
         except Exception as e:
             logger.error(f"Webhook post error: {e}")
             return self._log_locally(message, "webhook-fallback")
     
-    def _post_via_bot(
-        self,
-        message: str,
-        channel: str,
-        bot_token: str
-    ) -> str:
-        """Post message using Slack bot token."""
+    def _post_via_bot(self, message: str, channel: str) -> str:
+        """
+        Post message using the shared client's bot token (SLACK_BOT_TOKEN),
+        to one or more channels concurrently.
+        """
+        channels = [name.strip() for name in channel.split(",") if name.strip()]
+        # Format message
+        payload = self._format_message(message)
         try:
-            client = WebClient(token=bot_token)
-            
-            # Format message
-            payload = self._format_message(message)
-            
-            response = client.chat_postMessage(
-                channel=channel,
-                text=payload.get("text", message),
-                blocks=payload.get("blocks", None)
-            )
-            
-            logger.info(f"✅ Message posted to Slack channel: {channel}")
+            results = deliver_sync(payload, channels)
+        except Exception as e:
+            logger.error(f"Slack API error: {e}")
+            return self._log_locally(message, channel)
+        
+        failed = [result for result in results if not result["success"]]
+        for result in failed:
+            logger.error(f"Slack API error in {result['channel']}: {result['error']}")
+        if len(failed) == len(results):
+            return self._log_locally(message, channel)
+        
+        logger.info(f"✅ Message posted to Slack channel: {channel}")
+        if len(results) == 1:
             return json.dumps({
                 "success": True,
                 "method": "bot_token",
-                "channel": channel,
-                "timestamp": response.get("ts", "")
+                "channel": results[0]["channel"],
+                "timestamp": results[0]["timestamp"]
             }, indent=2)
-            
-        except SlackApiError as e:
-            logger.error(f"Slack API error: {e.response['error']}")
-            return self._log_locally(message, channel)
+        return json.dumps({
+            "success": True,
+            "method": "bot_token",
+            "channels": results
+        }, indent=2)
     
     def _format_message(self, message: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,5 @@
+"""
+SURF Customer Feedback Agent - Benchmarks
+=========================================
+Synthetic-scale benchmark harness for the feedback pipeline.
+"""
@@ -0,0 +1,252 @@
+"""
+SURF Customer Feedback Agent - Fake Notion Server
+=================================================
+Local stand-in for the Notion API's database query and block children
+endpoints, for exercising backend.connectors.notion without a workspace.
+
+Pages carry a title, select properties and paragraph blocks; the database
+query honours the last_edited_time filter, sorts and cursor pagination.
+Can enforce a request rate with 429 + Retry-After and add latency, and
+counts requests and the highest number served concurrently.
+
+Usage:
+    python -m benchmarks.fake_notion --port 8098 --pages 500
+    NOTION_API_URL=http://127.0.0.1:8098/v1/ NOTION_API_KEY=fake \\
+        NOTION_DATABASE_ID=feedback python -m backend.connectors.notion
+"""
+
+import json
+import time
+import uuid
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def _iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _rich_text(text: str) -> List[Dict[str, Any]]:
+    return [{"type": "text", "text": {"content": text}, "plain_text": text}]
+
+
+class FakeNotion:
+    """
+    Fake Notion state and HTTP server.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        database_id: str = "feedback",
+        rate: float = 0.0,
+        latency: float = 0.0
+    ):
+        self.database_id = database_id
+        self.rate = rate
+        self.latency = latency
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.blocks: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests = 0
+        self.block_requests = 0
+        self.rate_limited = 0
+        self.active = 0
+        self.max_active = 0
+        self._last_request = 0.0
+        self._clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1/"
+
+    def start(self) -> "FakeNotion":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeNotion":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _tick(self) -> str:
+        # Notion reports edit times to the minute
+        self._clock += timedelta(minutes=1)
+        return _iso(self._clock)
+
+    def add_page(self, title: str, body: str = "", **properties: str) -> str:
+        """Add a page; keyword properties become select properties."""
+        with self._lock:
+            page_id = str(uuid.uuid4())
+            edited = self._tick()
+            props: Dict[str, Any] = {"Name": {"type": "title", "title": _rich_text(title)}}
+            for name, value in properties.items():
+                props[name.replace("_", " ").title()] = {"type": "select", "select": {"name": value}}
+            self.pages[page_id] = {
+                "object": "page",
+                "id": page_id,
+                "created_time": edited,
+                "last_edited_time": edited,
+                "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+                "properties": props,
+            }
+            self.blocks[page_id] = [
+                {"object": "block", "id": str(uuid.uuid4()), "type": "paragraph",
+                 "has_children": False, "paragraph": {"rich_text": _rich_text(line)}}
+                for line in body.splitlines() if line
+            ]
+            return page_id
+
+    def edit_page(self, page_id: str, body: str) -> None:
+        """Replace a page's body and bump its last_edited_time."""
+        with self._lock:
+            self.pages[page_id]["last_edited_time"] = self._tick()
+            self.blocks[page_id] = [
+                {"object": "block", "id": str(uuid.uuid4()), "type": "paragraph",
+                 "has_children": False, "paragraph": {"rich_text": _rich_text(line)}}
+                for line in body.splitlines() if line
+            ]
+
+    @staticmethod
+    def _paginate(items: List[Any], cursor: Optional[str], page_size: int) -> Dict[str, Any]:
+        start = int(cursor or 0)
+        end = start + min(page_size or 100, 100)
+        return {
+            "object": "list",
+            "results": items[start:end],
+            "has_more": end < len(items),
+            "next_cursor": str(end) if end < len(items) else None,
+        }
+
+    def query(self, database_id: str, body: Dict[str, Any]):
+        if database_id != self.database_id:
+            return 404, {"object": "error", "code": "object_not_found"}
+        with self._lock:
+            pages = list(self.pages.values())
+        since = ((body.get("filter") or {}).get("last_edited_time") or {}).get("on_or_after")
+        if since:
+            pages = [page for page in pages if page["last_edited_time"] >= since]
+        pages.sort(key=lambda page: page["last_edited_time"])
+        return 200, self._paginate(pages, body.get("start_cursor"), body.get("page_size", 100))
+
+    def children(self, block_id: str, query: Dict[str, List[str]]):
+        with self._lock:
+            self.block_requests += 1
+            blocks = self.blocks.get(block_id)
+        if blocks is None:
+            return 404, {"object": "error", "code": "object_not_found"}
+        cursor = (query.get("start_cursor") or [None])[0]
+        page_size = int((query.get("page_size") or ["100"])[0])
+        return 200, self._paginate(blocks, cursor, page_size)
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: Dict[str, Any]):
+        """Return (status, headers, body) for one request."""
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if not headers.get("authorization", "").startswith("Bearer "):
+                return 401, {}, {"object": "error", "code": "unauthorized"}
+            if self.rate:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._last_request + 1.0 / self.rate - now
+                    if wait > 0:
+                        self.rate_limited += 1
+                        return 429, {"Retry-After": f"{wait:.3f}"}, {"object": "error", "code": "rate_limited"}
+                    self._last_request = now
+
+            url = urlparse(path)
+            parts = url.path.strip("/").split("/")
+            if method == "POST" and len(parts) == 4 and parts[1] == "databases" and parts[3] == "query":
+                status, payload = self.query(parts[2], body)
+            elif method == "GET" and len(parts) == 4 and parts[1] == "blocks" and parts[3] == "children":
+                status, payload = self.children(parts[2], parse_qs(url.query))
+            else:
+                status, payload = 404, {"object": "error", "code": "invalid_request_url"}
+            return status, {}, payload
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so clients can reuse connections
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length", "0"))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                status, headers, payload = fake.handle(
+                    method, self.path, {k.lower(): v for k, v in self.headers.items()}, body
+                )
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    """Run a fake Notion server with generated feedback pages."""
+    from benchmarks.synthetic import generate_feedback
+
+    parser = argparse.ArgumentParser(description="Fake Notion API server")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--database-id", default="feedback")
+    parser.add_argument("--pages", type=int, default=200, help="Generated feedback pages")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Accepted requests per second (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    args = parser.parse_args()
+
+    fake = FakeNotion(args.port, args.database_id, args.rate, args.latency)
+    for raw_text, _, metadata in generate_feedback(args.pages):
+        title, _, body = raw_text.partition(". ")
+        fake.add_page(title, body, **{k: str(v) for k, v in metadata.items()})
+    print(f"🧪 Fake Notion API at {fake.api_url} (database '{args.database_id}', {args.pages} pages)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"   {fake.requests} requests, {fake.rate_limited} rate-limited")
+
+
+if __name__ == "__main__":
+    main()
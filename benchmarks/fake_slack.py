@@ -0,0 +1,244 @@
+"""
+SURF Customer Feedback Agent - Fake Slack Server
+================================================
+Local stand-in for the Slack Web API and incoming webhooks, for exercising
+backend.slack_client and backend.connectors.slack_history without a
+workspace.
+
+Enforces a per-channel posting rate limit and a workspace-wide
+conversations.history rate limit with 429 + Retry-After like Slack does,
+can inject 5xx errors and latency, and records every accepted message.
+Channel history is seeded with add_history() and served newest first
+with cursor pagination.
+
+Usage:
+    python -m benchmarks.fake_slack --port 8099
+    SLACK_API_URL=http://127.0.0.1:8099/api/ SLACK_BOT_TOKEN=xoxb-fake python main.py
+
+    python -m benchmarks.fake_slack --port 8099 --history 500
+    SLACK_API_URL=http://127.0.0.1:8099/api/ SLACK_BOT_TOKEN=xoxb-fake \
+        SLACK_HISTORY_CHANNELS=C0FEEDBACK python -m backend.connectors.slack_history
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeSlack:
+    """
+    Fake Slack state and HTTP server.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        channel_rate: float = 1.0,
+        error_rate: float = 0.0,
+        latency: float = 0.0,
+        seed: int = 42,
+        history_rate: float = 0.0
+    ):
+        self.channel_rate = channel_rate
+        self.error_rate = error_rate
+        self.latency = latency
+        self.history_rate = history_rate
+        self.messages: List[Dict[str, Any]] = []
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+        self.history_requests = 0
+        self._last_history = -1e9
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._last_post: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api/"
+
+    @property
+    def webhook_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+
+    def start(self) -> "FakeSlack":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeSlack":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def add_history(self, channel: str, text: str, ts: Optional[float] = None, **fields: Any) -> str:
+        """Add a message to a channel's history; returns its ts."""
+        with self._lock:
+            messages = self.history.setdefault(channel, [])
+            if ts is None:
+                ts = max(time.time(), float(messages[-1]["ts"]) + 0.000001 if messages else 0.0)
+            message = {"type": "message", "ts": f"{ts:.6f}", "text": text, **fields}
+            messages.append(message)
+            messages.sort(key=lambda m: float(m["ts"]))
+            return message["ts"]
+
+    def conversations_history(self, headers: Dict[str, str], query: Dict[str, List[str]]):
+        """Return (status, headers, body) for conversations.history."""
+        def param(name, default=None):
+            return (query.get(name) or [default])[0]
+
+        with self._lock:
+            self.history_requests += 1
+            if not headers.get("authorization", "").startswith("Bearer "):
+                return 200, {}, {"ok": False, "error": "not_authed"}
+            if self.history_rate:
+                now = time.monotonic()
+                wait = self._last_history + 1.0 / self.history_rate - now
+                if wait > 0:
+                    self.rate_limited += 1
+                    return 429, {"Retry-After": str(max(1, int(wait + 0.999)))}, {"ok": False, "error": "ratelimited"}
+                self._last_history = now
+            channel = param("channel")
+            if channel not in self.history:
+                return 200, {}, {"ok": False, "error": "channel_not_found"}
+            oldest = float(param("oldest", "0"))
+            latest = float(param("latest", "inf"))
+            newest_first = [
+                m for m in reversed(self.history[channel])
+                if oldest < float(m["ts"]) < latest
+            ]
+        start = int(param("cursor") or 0)
+        limit = min(int(param("limit", "100")), 999)
+        page = newest_first[start:start + limit]
+        has_more = start + limit < len(newest_first)
+        return 200, {}, {
+            "ok": True,
+            "messages": page,
+            "has_more": has_more,
+            "response_metadata": {"next_cursor": str(start + limit) if has_more else ""},
+        }
+
+    def handle(self, path: str, headers: Dict[str, str], body: Dict[str, Any]):
+        """Return (status, headers, body) for one request."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors += 1
+                return 500, {}, {"ok": False, "error": "internal_error"}
+
+            if path == "/webhook":
+                channel = "webhook"
+            elif path == "/api/chat.postMessage":
+                if not headers.get("authorization", "").startswith("Bearer "):
+                    return 200, {}, {"ok": False, "error": "not_authed"}
+                channel = body.get("channel")
+                if not channel:
+                    return 200, {}, {"ok": False, "error": "channel_not_found"}
+            else:
+                return 404, {}, {"ok": False, "error": "unknown_method"}
+
+            now = time.monotonic()
+            wait = self._last_post.get(channel, -1e9) + 1.0 / self.channel_rate - now
+            if wait > 0:
+                self.rate_limited += 1
+                return 429, {"Retry-After": str(max(1, int(wait + 0.999)))}, {"ok": False, "error": "ratelimited"}
+            self._last_post[channel] = now
+            ts = f"{time.time():.6f}"
+            self.messages.append({"channel": channel, "ts": ts, "payload": body})
+
+        if path == "/webhook":
+            return 200, {}, "ok"
+        return 200, {}, {"ok": True, "channel": channel, "ts": ts}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so clients can reuse connections
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/api/conversations.history":
+                    response = fake.conversations_history(
+                        {k.lower(): v for k, v in self.headers.items()}, parse_qs(url.query)
+                    )
+                else:
+                    response = 404, {}, {"ok": False, "error": "unknown_method"}
+                self._respond(*response)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                self._respond(*fake.handle(
+                    self.path, {k.lower(): v for k, v in self.headers.items()}, body
+                ))
+
+            def _respond(self, status, headers, payload):
+                data = payload.encode("utf-8") if isinstance(payload, str) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "text/plain" if isinstance(payload, str) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    """Run a fake Slack server in the foreground."""
+    parser = argparse.ArgumentParser(description="Fake Slack API server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--channel-rate", type=float, default=1.0,
+                        help="Accepted messages per second per channel")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with HTTP 500")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--history", type=int, default=0,
+                        help="Generated messages in channel C0FEEDBACK's history")
+    parser.add_argument("--history-rate", type=float, default=0.8,
+                        help="conversations.history calls accepted per second")
+    args = parser.parse_args()
+
+    fake = FakeSlack(args.port, args.channel_rate, args.error_rate, args.latency,
+                     history_rate=args.history_rate)
+    if args.history:
+        from benchmarks.synthetic import generate_feedback
+        start = time.time() - 86400
+        for i, (raw_text, _, metadata) in enumerate(generate_feedback(args.history)):
+            fake.add_history("C0FEEDBACK", raw_text, start + i, user=f"U{i % 50:04d}")
+    print(f"🧪 Fake Slack API at {fake.api_url} (webhook: {fake.webhook_url})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"   {len(fake.messages)} messages, {fake.rate_limited} rate-limited, {fake.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
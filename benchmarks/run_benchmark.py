@@ -0,0 +1,340 @@
+"""
+SURF Customer Feedback Agent - Pipeline Benchmark
+=================================================
+Times the SURF pipeline's own work at synthetic scale, with a local stub
+LLM standing in for the model API, and writes a machine-readable report.
+
+Steps timed per dataset size:
+    load              - COPY synthetic feedback into raw_feedback
+    ingestion_read    - stream every row (IngestorAgent read path)
+    ingestion_page    - PostgresTool get_all_feedback first page
+    clustering        - MinHash/LSH near-duplicate clustering
+    scoring           - PostgresTool score_unprocessed_feedback
+    review_writeback  - update_item_scores for items needing LLM review
+    top_n             - PostgresTool read_top_items (repeated)
+    risk_assessment   - concurrent pre-mortem fan-out on the stub LLM
+    api_priorities    - GET /api/priorities (repeated)
+    api_priorities_304 - conditional GET /api/priorities with a current ETag
+    api_stats         - GET /api/stats (repeated)
+    api_search        - GET /api/search for a common term (repeated)
+    slack_format      - Slack Block Kit formatting of the delivery message
+    slack_delivery    - concurrent delivery to several channels of a local
+                        fake Slack server (rate limits off)
+
+The benchmark TRUNCATES the SURF tables, so point DB_NAME at a scratch
+database and pass --reset to confirm.
+
+Usage:
+    python -m benchmarks.run_benchmark --reset --rows 10000,100000
+    python -m benchmarks.run_benchmark --reset --baseline benchmarks/results/main.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db_connection import DatabaseConnection, FeedbackDatabase
+from backend.dedup import cluster_pending_feedback
+from backend.risk_assessment import assess_risks
+from backend.tools import postgres_tool, slack_tool
+from benchmarks.synthetic import generate_feedback, sample_prioritized_items
+from benchmarks.stub_llm import StubLLM
+from benchmarks.fake_slack import FakeSlack
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+SURF_TABLES = [
+    "slack_outbox", "feedback_lsh_buckets", "feedback_minhash", "prioritized_output",
+    "llm_result_cache", "pipeline_runs", "raw_feedback",
+]
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit, if the benchmark runs inside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def reset_tables() -> None:
+    """Empty every SURF table."""
+    with DatabaseConnection.get_connection() as conn:
+        conn.execute(f"TRUNCATE {', '.join(SURF_TABLES)} RESTART IDENTITY CASCADE")
+
+
+def timed(func: Callable[[], Any], rows: Optional[int] = None) -> Dict[str, Any]:
+    """Run a step once and report its duration (and throughput)."""
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    report = {"seconds": round(seconds, 4)}
+    if rows:
+        report["rows"] = rows
+        report["rows_per_second"] = round(rows / seconds, 1) if seconds else None
+    if isinstance(result, dict):
+        report.update({k: v for k, v in result.items() if isinstance(v, (int, float))})
+    return report
+
+
+def repeated(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run a step several times and report latency percentiles."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {
+        "seconds": round(statistics.median(durations), 5),
+        "runs": repeat,
+        "p50": round(statistics.median(durations), 5),
+        "p95": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 5),
+        "max": round(durations[-1], 5),
+    }
+
+
+def run_size(rows: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every benchmark step against a fresh dataset of `rows` rows."""
+    results: Dict[str, Any] = {}
+    reset_tables()
+
+    results["load"] = timed(
+        lambda: FeedbackDatabase.copy_raw_feedback(generate_feedback(rows, seed=args.seed)),
+        rows
+    )
+    results["ingestion_read"] = timed(
+        lambda: sum(len(chunk) for chunk in FeedbackDatabase.iter_raw_feedback()),
+        rows
+    )
+    results["ingestion_page"] = repeated(
+        lambda: postgres_tool._run("get_all_feedback", after_id=0, page_size=100),
+        args.repeat
+    )
+    results["clustering"] = timed(cluster_pending_feedback, rows)
+
+    scoring_output: Dict[str, Any] = {}
+
+    def score():
+        scoring_output.update(json.loads(
+            postgres_tool._run("score_unprocessed_feedback", limit=rows)
+        ))
+        return {"needs_review": scoring_output.get("needs_review_count", 0)}
+
+    results["scoring"] = timed(score, rows)
+
+    # Stand in for the AnalyzerAgent: accept the rule engine's suggestions
+    review = scoring_output.get("needs_review") or {"columns": [], "rows": []}
+    columns = review["columns"]
+    reviewed = [
+        {
+            "feedback_id": row[columns.index("id")],
+            "category": row[columns.index("suggested_category")],
+            "score": row[columns.index("suggested_score")],
+        }
+        for row in review["rows"]
+    ]
+    results["review_writeback"] = timed(
+        lambda: json.loads(postgres_tool._run("update_item_scores", items=reviewed)),
+        len(reviewed) or None
+    )
+    results["top_n"] = repeated(
+        lambda: postgres_tool._run("read_top_items", limit=args.top_n),
+        args.repeat
+    )
+
+    top_items = FeedbackDatabase.get_top_feedback(limit=args.top_n)
+    llm = StubLLM(latency=args.llm_latency)
+    results["risk_assessment"] = timed(
+        lambda: {"items": len(assess_risks(
+            [{"feedback_id": item["id"], "title": item["raw_text"][:100],
+              "category": item["category"], "score": item["score"]}
+             for item in top_items],
+            llm=llm
+        )["items"])}
+    )
+
+    prioritized = sample_prioritized_items(args.prioritized_items, seed=args.seed)
+    for item in prioritized:
+        FeedbackDatabase.insert_prioritized_output(
+            feedback_id=top_items[0]["id"] if top_items else None,
+            title=item["title"],
+            pre_mortem_forecast=item["pre_mortem_forecast"],
+            score=item["score"],
+            team=item["team"],
+            action_plan=item["action_plan"],
+            priority_rank=item["rank"]
+        )
+    results.update(benchmark_api(args.repeat))
+
+    message = json.dumps({"items": prioritized[:args.top_n], "total_analyzed": rows})
+    results["slack_format"] = repeated(lambda: slack_tool._format_message(message), args.repeat)
+    results["slack_delivery"] = benchmark_slack(slack_tool._format_message(message), args.repeat)
+    return results
+
+
+def benchmark_slack(payload: Dict[str, Any], repeat: int, channels: int = 5) -> Dict[str, Any]:
+    """Time concurrent multi-channel delivery against a fake Slack server."""
+    from backend.slack_client import SlackDeliveryClient
+
+    async def deliver_all(client):
+        for _ in range(repeat):
+            await client.deliver(payload, [f"#bench-{i}" for i in range(channels)])
+
+    with FakeSlack(channel_rate=1e6) as fake:
+        async def run():
+            async with SlackDeliveryClient(
+                bot_token="xoxb-benchmark", webhook_url="", api_url=fake.api_url,
+                channel_rate=1e6, workspace_rate=1e6, workspace_burst=1e6
+            ) as client:
+                await deliver_all(client)
+
+        result = timed(lambda: asyncio.run(run()), repeat * channels)
+    result["messages"] = len(fake.messages)
+    return result
+
+
+def benchmark_api(repeat: int) -> Dict[str, Any]:
+    """Time the dashboard API endpoints in-process."""
+    from fastapi.testclient import TestClient
+    from backend.api_server import app
+
+    results = {}
+    with TestClient(app) as client:
+        for name, path in (
+            ("api_priorities", "/api/priorities"),
+            ("api_stats", "/api/stats"),
+            ("api_search", "/api/search?q=dashboard"),
+        ):
+            client.get(path).raise_for_status()  # warm the pool
+            results[name] = repeated(lambda: client.get(path).raise_for_status(), repeat)
+        etag = client.get("/api/priorities").headers["ETag"]
+        results["api_priorities_304"] = repeated(
+            lambda: client.get("/api/priorities", headers={"If-None-Match": etag}), repeat
+        )
+    return results
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    List steps that got slower than the baseline by more than `tolerance`.
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for size, steps in report["results"].items():
+        for step, result in steps.items():
+            before = baseline.get("results", {}).get(size, {}).get(step, {}).get("seconds")
+            after = result.get("seconds")
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(
+                    f"{size} rows / {step}: {before:.4f}s → {after:.4f}s "
+                    f"(+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description="SURF pipeline benchmark")
+    parser.add_argument("--rows", default="10000",
+                        help="Comma-separated dataset sizes (e.g. 10000,100000,1000000)")
+    parser.add_argument("--reset", action="store_true",
+                        help="Confirm that the SURF tables in DB_NAME may be truncated")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Repetitions for latency steps")
+    parser.add_argument("--top-n", type=int, default=int(os.getenv("TOP_ITEMS_COUNT", "3")))
+    parser.add_argument("--prioritized-items", type=int, default=50,
+                        help="Rows in prioritized_output for the API steps")
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="Simulated stub LLM latency per call in seconds")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown vs. the baseline before failing (0.2 = 20%%)")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    if not args.reset:
+        parser.error(
+            "the benchmark truncates the SURF tables; point DB_NAME at a "
+            "scratch database and pass --reset"
+        )
+
+    sizes = [int(size) for size in args.rows.split(",") if size.strip()]
+    commit = git_commit()
+    report = {
+        "benchmark": "surf-pipeline",
+        "version": REPORT_VERSION,
+        "git_commit": commit,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "top_n": args.top_n,
+            "llm_latency": args.llm_latency,
+            "db_name": os.getenv("DB_NAME", "surf_feedback_db"),
+        },
+        "results": {},
+    }
+
+    DatabaseConnection.initialize_pool()
+    try:
+        for size in sizes:
+            print(f"⏱️  Benchmarking {size:,} rows...")
+            report["results"][str(size)] = run_size(size, args)
+            for step, result in report["results"][str(size)].items():
+                throughput = result.get("rows_per_second")
+                print(
+                    f"   {step:<18} {result['seconds']:>10.4f}s"
+                    + (f"  {throughput:>12,.0f} rows/s" if throughput else "")
+                    + (f"  p95 {result['p95']:.4f}s" if "p95" in result else "")
+                )
+    finally:
+        DatabaseConnection.close_pool()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results", f"{commit or 'benchmark'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) vs. {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions vs. {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+SURF Customer Feedback Agent - Stub LLM
+=======================================
+Deterministic local stand-in for the agents' chat model, with simulated
+latency, so benchmarks measure SURF's own code and not the model API.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+
+class StubLLM:
+    """
+    Minimal chat model exposing invoke()/ainvoke().
+
+    Responses are derived from a hash of the prompt, so the same prompt
+    always yields the same answer.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.model_name = "stub"
+
+    def respond(self, prompt: str) -> str:
+        """Build the response text for a prompt."""
+        digest = int(hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()[:8], 16)
+        if "pre-mortem" in str(prompt).lower():
+            loss = 50_000 + digest % 900_000
+            return json.dumps({
+                "pre_mortem_forecast": (
+                    "Estimated 90-day impact if ignored:\n"
+                    f"- Churn: {1 + digest % 9}% of affected accounts\n"
+                    f"- Total estimated loss: ${loss // 1000}K over 90 days"
+                ),
+                "worst_case_loss_usd": loss,
+            })
+        return json.dumps({"status": "ok", "digest": digest})
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(content=self.respond(prompt))
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(content=self.respond(prompt))
@@ -0,0 +1,159 @@
+"""
+SURF Customer Feedback Agent - Synthetic Feedback Generator
+===========================================================
+Generates realistic raw_feedback rows at any scale with the same source,
+user_tier and urgency mix as the sample data in db/init_schema.sql.
+
+Texts are built from per-category templates with random slot values, and
+a share of rows are near-duplicate rewordings of earlier reports so that
+clustering and report-volume scoring see realistic repetition.
+"""
+
+import random
+from typing import Dict, Iterator, List, Tuple
+
+
+# Distributions observed in the seeded sample data
+SOURCE_WEIGHTS = {"Slack": 3, "Email": 3, "Notion": 2, "Survey": 2}
+TIER_WEIGHTS = {"Enterprise": 6, "Pro": 3, "Free": 1}
+URGENCY_WEIGHTS = {"critical": 3, "high": 3, "medium": 2, "low": 2}
+
+# Share of rows that restate an earlier report with small edits
+DUPLICATE_RATE = 0.25
+
+_SLOTS = {
+    "feature": [
+        "dark mode", "bulk export", "SSO login", "audit logs", "a mobile app",
+        "custom reports", "webhooks", "CSV import", "two-factor authentication",
+    ],
+    "integration": ["Salesforce", "Jira", "HubSpot", "Zapier", "Teams", "Zendesk"],
+    "page": [
+        "dashboard", "checkout flow", "settings page", "reports page",
+        "onboarding wizard", "billing page", "user profile page",
+    ],
+    "platform": ["iOS 17", "Android 14", "Safari", "Firefox", "Chrome", "Windows"],
+    "action": [
+        "upload a photo", "export a report", "save my settings",
+        "invite a teammate", "log in", "open an invoice",
+    ],
+    "number": ["2", "3", "5", "10", "48", "300"],
+}
+
+_TEMPLATES = [
+    # Bugs
+    "Our app crashes every time I try to {action} on {platform}. This is blocking my workflow!",
+    "Getting an error when I {action} on {platform}. It fails about half the time.",
+    "The {page} is broken on {platform}, nothing loads and the screen stays blank.",
+    # Performance
+    "The {page} takes forever to load since the last update. {number} second response times.",
+    "API response times have increased {number}x since the last release. Timeout errors everywhere.",
+    # Security
+    "Security concern: passwords are visible in plain text on the {page} on {platform}.",
+    "Possible security vulnerability: I could see another customer's data on the {page}.",
+    # Features
+    "Would love to see {feature} support. We need it for our team of {number} people.",
+    "Feature request: integration with {integration} would be a game changer for us.",
+    "{feature} is missing. We need it monthly for compliance.",
+    # UX
+    "The {page} is confusing. Lost {number} customers this week because they couldn't figure it out.",
+    "Navigation on the {page} is cluttered and hard to use, especially on {platform}.",
+    # Other
+    "Customer support took {number} hours to reply to a critical issue.",
+    "Love the product overall, but pricing for {number} seats feels steep.",
+]
+
+_NOISE = [
+    "", " Please help.", " Any update?", " Thanks!", " This is urgent.",
+    " Same as last week.", " cc the team", " (reported again)",
+]
+
+
+def _weighted(rng: random.Random, weights: Dict[str, int]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _fill(rng: random.Random, template: str) -> str:
+    values = {slot: rng.choice(options) for slot, options in _SLOTS.items()}
+    return template.format(**values)
+
+
+def _reword(rng: random.Random, text: str) -> str:
+    """Small edits that keep a report a near-duplicate of the original."""
+    if rng.random() < 0.5:
+        text = text.lower()
+    if rng.random() < 0.5:
+        text = text.replace("!", ".").replace("  ", " ")
+    return text.rstrip(".!") + rng.choice(_NOISE)
+
+
+def generate_feedback(
+    count: int,
+    seed: int = 42,
+    duplicate_rate: float = DUPLICATE_RATE
+) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """
+    Generate synthetic feedback rows.
+
+    Args:
+        count: Number of rows
+        seed: Random seed; the same seed yields the same rows
+        duplicate_rate: Share of rows that reword an earlier report
+
+    Yields:
+        tuple: (raw_text, source, metadata) ready for copy_raw_feedback()
+    """
+    rng = random.Random(seed)
+    originals: List[str] = []
+    for _ in range(count):
+        if originals and rng.random() < duplicate_rate:
+            text = _reword(rng, rng.choice(originals))
+        else:
+            text = _fill(rng, rng.choice(_TEMPLATES))
+            if len(originals) < 5000:
+                originals.append(text)
+            else:
+                originals[rng.randrange(len(originals))] = text
+        metadata = {
+            "user_tier": _weighted(rng, TIER_WEIGHTS),
+            "urgency": _weighted(rng, URGENCY_WEIGHTS),
+        }
+        yield text, _weighted(rng, SOURCE_WEIGHTS), metadata
+
+
+def sample_prioritized_items(count: int, seed: int = 42) -> List[Dict[str, object]]:
+    """
+    Build prioritized items shaped like the Prioritizer's output.
+
+    Args:
+        count: Number of items
+        seed: Random seed
+
+    Returns:
+        list: Dicts with title, category, score, team, action_plan and
+        pre_mortem_forecast
+    """
+    rng = random.Random(seed)
+    teams = ["Engineering", "Product", "UX", "Support"]
+    categories = ["Bug", "Feature", "UX", "Other"]
+    items: List[Dict[str, object]] = []
+    for rank in range(1, count + 1):
+        title = _fill(rng, rng.choice(_TEMPLATES))[:100]
+        items.append({
+            "rank": rank,
+            "title": title,
+            "category": rng.choice(categories),
+            "score": round(10.0 - rank * (9.0 / max(count, 1)), 2),
+            "team": rng.choice(teams),
+            "action_plan": {
+                "immediate_steps": [f"Reproduce: {title[:40]}", "Assign an owner"],
+                "medium_term_steps": ["Ship a fix behind a flag", "Add regression tests"],
+                "long_term_steps": ["Review the affected area's architecture"],
+            },
+            "pre_mortem_forecast": (
+                "Estimated 90-day impact if ignored:\n"
+                f"- Churn: {rng.randint(1, 9)}% of affected accounts\n"
+                f"- Total estimated loss: ${rng.randint(50, 900)}K over 90 days"
+            ),
+        })
+    return items
+
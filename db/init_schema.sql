@@ -4,6 +4,13 @@
 -- PostgreSQL Schema for Customer Feedback Processing
 
 -- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS slack_outbox CASCADE;
+DROP TABLE IF EXISTS feedback_stats CASCADE;
+DROP TABLE IF EXISTS data_versions CASCADE;
+DROP TABLE IF EXISTS feedback_lsh_buckets CASCADE;
+DROP TABLE IF EXISTS feedback_minhash CASCADE;
+DROP TABLE IF EXISTS pipeline_runs CASCADE;
+DROP TABLE IF EXISTS llm_result_cache CASCADE;
 DROP TABLE IF EXISTS prioritized_output CASCADE;
 DROP TABLE IF EXISTS raw_feedback CASCADE;
 
@@ -18,7 +25,11 @@ CREATE TABLE raw_feedback (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     processed BOOLEAN DEFAULT FALSE,
-    metadata JSONB  -- Additional structured data
+    metadata JSONB,  -- Additional structured data
+    cluster_id INTEGER,  -- Near-duplicate cluster (id of its first member)
+    external_id VARCHAR(255),  -- Id in the source system (e.g. Notion page) for synced sources
+    -- Full-text search document behind /api/search (same config as the API's queries)
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', raw_text)) STORED
 );
 
 -- Create prioritized_output table
@@ -37,12 +48,118 @@ CREATE TABLE prioritized_output (
     slack_delivered_at TIMESTAMP
 );
 
+-- Create llm_result_cache table
+-- Caches per-item LLM results keyed by content, model and prompt version
+CREATE TABLE llm_result_cache (
+    cache_key CHAR(64) PRIMARY KEY,  -- SHA-256 of text, metadata, model, prompt version
+    task VARCHAR(50) NOT NULL,  -- e.g., 'analysis'
+    model VARCHAR(100) NOT NULL,
+    result JSONB NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Create pipeline_runs table
+-- Tracks each pipeline run and its processing watermark for incremental mode
+CREATE TABLE pipeline_runs (
+    id SERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL DEFAULT 'full',  -- 'full' or 'incremental'
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- 'running', 'completed', 'skipped', 'failed'
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    watermark TIMESTAMP,  -- max(raw_feedback.updated_at) when the run finished
+    delta_count INTEGER DEFAULT 0,  -- new or changed feedback rows analyzed
+    top_signature CHAR(64),  -- hash of the top-N candidate set after analysis
+    stages JSONB  -- stages actually executed
+);
+
+-- Create feedback_minhash table
+-- MinHash signature per feedback item for near-duplicate clustering
+CREATE TABLE feedback_minhash (
+    feedback_id INTEGER PRIMARY KEY REFERENCES raw_feedback(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL,  -- uint32 MinHash values
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create feedback_lsh_buckets table
+-- LSH band buckets used to find near-duplicate candidates; one
+-- representative feedback item per cluster and bucket
+CREATE TABLE feedback_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    feedback_id INTEGER NOT NULL REFERENCES raw_feedback(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, cluster_id)
+);
+
+-- Create data_versions table
+-- Change counter per table, bumped by statement triggers; API ETags key on it
+CREATE TABLE data_versions (
+    table_name VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (table_name) VALUES ('prioritized_output');
+
+-- Create slack_outbox table
+-- Slack messages committed together with the prioritized output they
+-- report; drained by the delivery worker (backend/delivery.py)
+CREATE TABLE slack_outbox (
+    id SERIAL PRIMARY KEY,
+    output_ids INTEGER[] NOT NULL DEFAULT '{}',  -- prioritized_output rows in the message
+    channel VARCHAR(200) NOT NULL,  -- Slack channel, or 'webhook'
+    payload JSONB NOT NULL,  -- items and totals; formatted for Slack at send time
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- 'pending', 'sent', 'logged', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- also the claim lease
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+-- Create ingest_watermarks table
+-- Sync position per connector and scope (e.g. Notion database, Slack
+-- channel); saved in the same transaction as the rows it covers
+CREATE TABLE ingest_watermarks (
+    source VARCHAR(100) NOT NULL,  -- raw_feedback.source of the connector
+    scope VARCHAR(255) NOT NULL,  -- database/channel id within the source
+    watermark TEXT NOT NULL,  -- connector-specific position (timestamp, cursor)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, scope)
+);
+
+-- Create feedback_stats table
+-- Rollup counters behind /api/stats, kept current by triggers
+CREATE TABLE feedback_stats (
+    metric VARCHAR(20) NOT NULL,  -- 'total', 'priority' or 'category'
+    key VARCHAR(100) NOT NULL,  -- table name, priority rank or category ('' = none)
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, key)
+);
+
 -- Create indexes for performance
 CREATE INDEX idx_raw_feedback_processed ON raw_feedback(processed);
 CREATE INDEX idx_raw_feedback_score ON raw_feedback(severity_volume_score DESC);
 CREATE INDEX idx_raw_feedback_created ON raw_feedback(created_at DESC);
 CREATE INDEX idx_prioritized_output_rank ON prioritized_output(priority_rank);
 CREATE INDEX idx_prioritized_output_score ON prioritized_output(score DESC);
+CREATE INDEX idx_prioritized_output_feedback ON prioritized_output(feedback_id);
+-- Keyset pagination order of /api/priorities: rank (unranked last), score desc, id
+CREATE INDEX idx_prioritized_output_keyset
+    ON prioritized_output ((COALESCE(priority_rank, 2147483647)), (-score), id);
+CREATE INDEX idx_raw_feedback_updated ON raw_feedback(updated_at);
+CREATE INDEX idx_pipeline_runs_status ON pipeline_runs(status, finished_at DESC);
+CREATE INDEX idx_llm_result_cache_last_used ON llm_result_cache(last_used_at DESC);
+CREATE INDEX idx_raw_feedback_cluster ON raw_feedback(cluster_id);
+CREATE INDEX idx_raw_feedback_unclustered ON raw_feedback(id) WHERE cluster_id IS NULL;
+CREATE INDEX idx_feedback_lsh_buckets_feedback ON feedback_lsh_buckets(feedback_id);
+CREATE INDEX idx_raw_feedback_search ON raw_feedback USING GIN (search_vector);
+CREATE UNIQUE INDEX idx_raw_feedback_external ON raw_feedback(source, external_id)
+    WHERE external_id IS NOT NULL;
+CREATE INDEX idx_slack_outbox_due ON slack_outbox(next_attempt_at) WHERE status = 'pending';
 
 -- Create a function to update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -59,6 +176,235 @@ CREATE TRIGGER update_raw_feedback_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Create a function to re-queue feedback whose content changed
+CREATE OR REPLACE FUNCTION reset_processed_on_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.raw_text IS DISTINCT FROM OLD.raw_text
+       OR NEW.metadata IS DISTINCT FROM OLD.metadata THEN
+        NEW.processed = FALSE;
+    END IF;
+    IF NEW.raw_text IS DISTINCT FROM OLD.raw_text THEN
+        NEW.cluster_id = NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Create trigger so incremental runs re-analyze edited feedback
+CREATE TRIGGER reset_raw_feedback_processed
+    BEFORE UPDATE OF raw_text, metadata ON raw_feedback
+    FOR EACH ROW
+    EXECUTE FUNCTION reset_processed_on_change();
+
+-- Create a function to bump a table's change counter and notify listeners
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP
+    RETURNING version INTO new_version;
+    -- Tell dashboard listeners (delivered on commit)
+    PERFORM pg_notify('surf_events', json_build_object(
+        'type', 'data_changed',
+        'table', TG_TABLE_NAME,
+        'version', new_version
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Create trigger so every write to prioritized_output changes its version
+CREATE TRIGGER bump_prioritized_output_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON prioritized_output
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_data_version();
+
+-- Create a function to rebuild the /api/stats rollup from scratch
+CREATE OR REPLACE FUNCTION rebuild_feedback_stats()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE feedback_stats IN EXCLUSIVE MODE;
+    DELETE FROM feedback_stats;
+    INSERT INTO feedback_stats (metric, key, count)
+    SELECT 'total', 'raw_feedback', COUNT(*) FROM raw_feedback
+    UNION ALL
+    SELECT 'total', 'prioritized_output', COUNT(*) FROM prioritized_output
+    UNION ALL
+    SELECT 'priority', COALESCE(priority_rank::TEXT, ''), COUNT(*)
+    FROM prioritized_output
+    GROUP BY priority_rank
+    UNION ALL
+    SELECT 'category', COALESCE(rf.category, ''), COUNT(*)
+    FROM prioritized_output po
+    LEFT JOIN raw_feedback rf ON po.feedback_id = rf.id
+    GROUP BY rf.category;
+END;
+$$ language 'plpgsql';
+
+-- Create a function to keep raw_feedback counts in the rollup
+-- (statement-level, reading the transition tables)
+CREATE OR REPLACE FUNCTION raw_feedback_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE feedback_stats SET count = count + (SELECT COUNT(*) FROM new_rows)
+        WHERE metric = 'total' AND key = 'raw_feedback';
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE feedback_stats SET count = count - (SELECT COUNT(*) FROM old_rows)
+        WHERE metric = 'total' AND key = 'raw_feedback';
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        UPDATE feedback_stats SET count = 0
+        WHERE metric = 'total' AND key = 'raw_feedback';
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Create a function to move a feedback item's prioritized rows to its new
+-- category (row-level, so statements that don't change categories skip it)
+CREATE OR REPLACE FUNCTION raw_feedback_stats_category()
+RETURNS TRIGGER AS $$
+DECLARE
+    prioritized BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO prioritized FROM prioritized_output WHERE feedback_id = NEW.id;
+    IF prioritized > 0 THEN
+        INSERT INTO feedback_stats (metric, key, count)
+        VALUES ('category', COALESCE(OLD.category, ''), -prioritized),
+               ('category', COALESCE(NEW.category, ''), prioritized)
+        ON CONFLICT (metric, key) DO UPDATE
+            SET count = feedback_stats.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Create a function to take a deleted feedback item's prioritized rows out
+-- of its category before ON DELETE CASCADE removes them (the cascaded
+-- delete can no longer see the category)
+CREATE OR REPLACE FUNCTION raw_feedback_stats_before_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE feedback_stats
+    SET count = count - (SELECT COUNT(*) FROM prioritized_output WHERE feedback_id = OLD.id)
+    WHERE metric = 'category' AND key = COALESCE(OLD.category, '')
+      AND EXISTS (SELECT 1 FROM prioritized_output WHERE feedback_id = OLD.id);
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+-- Create a function to keep prioritized_output counts in the rollup
+CREATE OR REPLACE FUNCTION prioritized_output_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM feedback_stats WHERE metric IN ('priority', 'category');
+        UPDATE feedback_stats SET count = 0
+        WHERE metric = 'total' AND key = 'prioritized_output';
+        RETURN NULL;
+    END IF;
+
+    -- Transition tables only exist for the firing event, so the row
+    -- source is chosen before the shared delta query runs
+    changed := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS delta, priority_rank, feedback_id FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT -1 AS delta, priority_rank, feedback_id FROM old_rows'
+        ELSE 'SELECT 1 AS delta, priority_rank, feedback_id FROM new_rows
+              UNION ALL
+              SELECT -1, priority_rank, feedback_id FROM old_rows'
+    END;
+    EXECUTE format($q$
+        WITH changed AS (%s),
+        deltas AS (
+            SELECT 'total' AS metric, 'prioritized_output' AS key, SUM(delta) AS delta
+            FROM changed
+            UNION ALL
+            SELECT 'priority', COALESCE(priority_rank::TEXT, ''), SUM(delta)
+            FROM changed
+            GROUP BY priority_rank
+            UNION ALL
+            -- Removed rows whose feedback is already gone were taken out of
+            -- their category by raw_feedback_stats_before_delete
+            SELECT 'category', COALESCE(rf.category, ''), SUM(delta)
+            FROM changed
+            LEFT JOIN raw_feedback rf ON changed.feedback_id = rf.id
+            WHERE rf.id IS NOT NULL OR changed.feedback_id IS NULL OR changed.delta > 0
+            GROUP BY rf.category
+        )
+        INSERT INTO feedback_stats (metric, key, count)
+        SELECT metric, key, delta FROM deltas
+        WHERE delta <> 0
+        ORDER BY metric, key
+        ON CONFLICT (metric, key) DO UPDATE
+            SET count = feedback_stats.count + EXCLUDED.count
+    $q$, changed);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Create triggers that keep the /api/stats rollup current
+CREATE TRIGGER raw_feedback_stats_insert
+    AFTER INSERT ON raw_feedback
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION raw_feedback_stats();
+
+CREATE TRIGGER raw_feedback_stats_category
+    AFTER UPDATE OF category ON raw_feedback
+    FOR EACH ROW
+    WHEN (OLD.category IS DISTINCT FROM NEW.category)
+    EXECUTE FUNCTION raw_feedback_stats_category();
+
+CREATE TRIGGER raw_feedback_stats_delete
+    AFTER DELETE ON raw_feedback
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION raw_feedback_stats();
+
+CREATE TRIGGER raw_feedback_stats_truncate
+    AFTER TRUNCATE ON raw_feedback
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION raw_feedback_stats();
+
+CREATE TRIGGER raw_feedback_stats_before_delete
+    BEFORE DELETE ON raw_feedback
+    FOR EACH ROW
+    EXECUTE FUNCTION raw_feedback_stats_before_delete();
+
+CREATE TRIGGER prioritized_output_stats_insert
+    AFTER INSERT ON prioritized_output
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION prioritized_output_stats();
+
+CREATE TRIGGER prioritized_output_stats_update
+    AFTER UPDATE ON prioritized_output
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION prioritized_output_stats();
+
+CREATE TRIGGER prioritized_output_stats_delete
+    AFTER DELETE ON prioritized_output
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION prioritized_output_stats();
+
+CREATE TRIGGER prioritized_output_stats_truncate
+    AFTER TRUNCATE ON prioritized_output
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION prioritized_output_stats();
+
+-- Seed the rollup (total rows must exist before the triggers update them)
+SELECT rebuild_feedback_stats();
+
 -- Insert sample mock data for testing (10 items as specified)
 INSERT INTO raw_feedback (raw_text, source, metadata) VALUES
 ('Our mobile app crashes every time I try to upload a photo on iOS 17. This is blocking my entire workflow!', 'Slack', '{"user_tier": "Enterprise", "urgency": "high"}'),
@@ -76,6 +422,14 @@ INSERT INTO raw_feedback (raw_text, source, metadata) VALUES
 SELECT COUNT(*) as total_feedback FROM raw_feedback;
 
 COMMENT ON TABLE raw_feedback IS 'Stores raw customer feedback from all sources';
+COMMENT ON TABLE pipeline_runs IS 'Pipeline run history and watermarks for incremental processing';
+COMMENT ON TABLE llm_result_cache IS 'Per-item LLM results reused across pipeline runs (TTL + LRU eviction)';
+COMMENT ON TABLE feedback_minhash IS 'MinHash signatures for near-duplicate feedback clustering';
+COMMENT ON TABLE feedback_lsh_buckets IS 'LSH band buckets for finding near-duplicate candidates';
+COMMENT ON TABLE slack_outbox IS 'Transactional outbox of Slack deliveries, drained by the delivery worker';
+COMMENT ON TABLE feedback_stats IS 'Trigger-maintained counters behind /api/stats; rebuild with SELECT rebuild_feedback_stats()';
+COMMENT ON TABLE data_versions IS 'Per-table change counters used for API ETags';
 COMMENT ON TABLE prioritized_output IS 'Stores prioritized feedback with action plans and risk assessments';
 COMMENT ON COLUMN raw_feedback.severity_volume_score IS 'Calculated score based on severity and volume metrics';
+COMMENT ON COLUMN raw_feedback.cluster_id IS 'Near-duplicate cluster; cluster size is the report volume used in scoring';
 COMMENT ON COLUMN prioritized_output.pre_mortem_forecast IS 'Financial risk assessment if feedback is ignored (from RetentionCriticAgent)';
\ No newline at end of file
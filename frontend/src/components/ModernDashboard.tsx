@@ -38,16 +38,32 @@ const ModernDashboard: React.FC = () => {
 
   useEffect(() => {
     fetchData();
+
+    // Refetch when the server says the prioritized output changed, instead of polling
+    const events = new EventSource('/api/events');
+    const refresh = (event: MessageEvent) => {
+      const data = JSON.parse(event.data || '{}');
+      if (event.type === 'listener_connected' || data.table === 'prioritized_output') {
+        fetchData(true);
+      }
+    };
+    events.addEventListener('data_changed', refresh);
+    events.addEventListener('listener_connected', refresh);
+    return () => events.close();
   }, []);
 
-  const fetchData = async () => {
+  const fetchData = async (quiet = false) => {
     try {
-      setLoading(true);
-      const response = await axios.get('/api/priorities');
-      setItems(response.data.items);
-      if (response.data.items.length > 0) {
-        setSelectedItem(response.data.items[0]);
+      if (!quiet) {
+        setLoading(true);
       }
+      const response = await axios.get('/api/priorities');
+      const fetched: FeedbackItem[] = response.data.items;
+      setItems(fetched);
+      // Keep the current selection across live refreshes
+      setSelectedItem(current =>
+        fetched.find(item => item.id === current?.id) || fetched[0] || null
+      );
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -74,6 +74,7 @@ export interface PrioritiesResponse {
   items: PrioritizedItem[];
   total_analyzed: number;
   total_risk_estimate: string;
+  next_cursor?: string | null;
   generated_at: string;
   agent_pipeline_version?: string;
   metadata?: ResponseMetadata;
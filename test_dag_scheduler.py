@@ -0,0 +1,128 @@
+"""
+SURF DAG Scheduler Test
+=======================
+Tests the pipeline's stage scheduler: dependency ordering and inputs,
+concurrent independent stages, failure handling (dependents skipped,
+unrelated stages still run) and critical-path reporting.
+
+Runs without PostgreSQL, OpenAI or CrewAI.
+
+Usage:
+    python -m pytest test_dag_scheduler.py
+"""
+import threading
+import time
+
+from backend.dag_scheduler import DAGScheduler, StageFailedError
+
+
+def sleeper(seconds, result=None):
+    """Stage that sleeps, then returns result (default: its inputs)."""
+    def run(inputs):
+        time.sleep(seconds)
+        return inputs if result is None else result
+    return run
+
+
+def test_dependencies_and_inputs():
+    """Stages get their dependencies' results and run after them"""
+    order = []
+    lock = threading.Lock()
+
+    def stage(name, value):
+        def run(inputs):
+            with lock:
+                order.append(name)
+            return (value, inputs)
+        return run
+
+    dag = DAGScheduler()
+    dag.add_stage("load", stage("load", 1))
+    dag.add_stage("score", stage("score", 2), ["load"])
+    dag.add_stage("report", stage("report", 3), ["load", "score"])
+    report = dag.run()
+
+    assert order == ["load", "score", "report"]
+    assert report["results"]["load"] == (1, {})
+    assert report["results"]["report"] == (3, {"load": (1, {}), "score": (2, {"load": (1, {})})})
+    assert report["skipped"] == []
+
+
+def test_independent_stages_overlap():
+    """Independent stages run concurrently"""
+    dag = DAGScheduler(max_workers=4)
+    for name in ("a", "b", "c"):
+        dag.add_stage(name, sleeper(0.2, name))
+    report = dag.run()
+    assert report["sum_seconds"] >= 0.6
+    assert report["wall_seconds"] < 0.45
+
+
+def test_failure_skips_dependents():
+    """A failed stage skips its dependents; unrelated stages still run"""
+    ran = []
+
+    def boom(inputs):
+        raise RuntimeError("model timeout")
+
+    dag = DAGScheduler()
+    dag.add_stage("analysis", boom)
+    dag.add_stage("prioritization", lambda inputs: ran.append("prioritization"), ["analysis"])
+    dag.add_stage("delivery", lambda inputs: ran.append("delivery"), ["prioritization"])
+    dag.add_stage("ingestion", lambda inputs: ran.append("ingestion") or "summary")
+    try:
+        dag.run()
+    except StageFailedError as e:
+        assert list(e.failures) == ["analysis"]
+        assert isinstance(e.failures["analysis"], RuntimeError)
+        assert sorted(e.report["skipped"]) == ["delivery", "prioritization"]
+        assert e.report["results"]["ingestion"] == "summary"
+        assert "analysis" in str(e) and "model timeout" in str(e)
+    else:
+        raise AssertionError("run() did not raise StageFailedError")
+    assert ran == ["ingestion"]
+
+
+def test_critical_path():
+    """The critical path is the longest chain of completed stages"""
+    dag = DAGScheduler(max_workers=4)
+    dag.add_stage("quick", sleeper(0.02))
+    dag.add_stage("slow", sleeper(0.25))
+    dag.add_stage("merge", sleeper(0.05), ["quick", "slow"])
+    dag.add_stage("side", sleeper(0.1))
+    report = dag.run()
+    assert report["critical_path"] == ["slow", "merge"]
+    assert abs(report["critical_path_seconds"] - report["timings"]["slow"] - report["timings"]["merge"]) < 0.002
+    assert report["wall_seconds"] < report["sum_seconds"]
+
+
+def test_subset_with_earlier_results():
+    """A subset runs with earlier results; outside dependencies count as done"""
+    calls = []
+    dag = DAGScheduler()
+    dag.add_stage("analysis", lambda inputs: calls.append("analysis"))
+    dag.add_stage("ingestion", lambda inputs: calls.append("ingestion"))
+    dag.add_stage("delivery", lambda inputs: inputs, ["analysis", "ingestion"])
+    report = dag.run(stages=["delivery"], results={"analysis": "scored"})
+    assert calls == []
+    assert report["results"] == {"delivery": {"analysis": "scored", "ingestion": None}}
+    assert report["critical_path"] == ["delivery"]
+
+
+def test_invalid_graphs():
+    """Duplicate stages, unknown dependencies and cycles are rejected"""
+    dag = DAGScheduler()
+    dag.add_stage("a", sleeper(0))
+    for build in (
+        lambda: dag.add_stage("a", sleeper(0)),
+        lambda: DAGScheduler().add_stage("x", sleeper(0), ["missing"]).run(),
+        lambda: DAGScheduler()
+        .add_stage("x", sleeper(0), ["y"])
+        .add_stage("y", sleeper(0), ["x"])
+        .run(),
+    ):
+        try:
+            build()
+        except ValueError:
+            continue
+        raise AssertionError("invalid stage graph was accepted")
@@ -0,0 +1,165 @@
+"""
+SURF Near-Duplicate Clustering Test
+===================================
+Tests the MinHash/LSH clustering in backend.dedup: shingling, signatures,
+band hashes and how assign_clusters groups reworded reports, including
+incremental runs against clusters stored earlier.
+
+assign_clusters runs against an in-memory stand-in for the three
+FeedbackDatabase methods it uses, so no PostgreSQL is needed.
+
+Usage:
+    python -m pytest test_dedup.py
+"""
+
+import numpy as np
+
+from backend.db_connection import FeedbackDatabase
+from backend.dedup import MinHasher, assign_clusters, estimate_similarity
+
+EXPORT = (
+    "The export to CSV button on the reports page silently drops "
+    "every row after the first ten thousand"
+)
+EXPORT_REWORDED = EXPORT + " rows"
+LOGIN = "Single sign on login with Okta fails with an invalid SAML response error"
+
+
+class MemoryStore:
+    """In-memory raw_feedback, feedback_minhash and feedback_lsh_buckets."""
+
+    def __init__(self):
+        self.rows = {}
+        self.minhash = {}
+        self.buckets = {}  # (band, bucket) -> {cluster_id: feedback_id}
+        self.bucket_conflicts = 0
+
+    def add(self, *texts):
+        for text in texts:
+            feedback_id = len(self.rows) + 1
+            self.rows[feedback_id] = {"id": feedback_id, "raw_text": text, "cluster_id": None}
+        return self
+
+    def get_unclustered_feedback(self, limit=5000):
+        return [dict(row) for row in self.rows.values() if row["cluster_id"] is None][:limit]
+
+    def get_lsh_candidates(self, bands, buckets):
+        found = {}
+        for key in zip(bands, buckets):
+            for cluster_id, feedback_id in self.buckets.get(key, {}).items():
+                found[feedback_id] = {
+                    "feedback_id": feedback_id,
+                    "cluster_id": cluster_id,
+                    "signature": self.minhash[feedback_id],
+                }
+        return list(found.values())
+
+    def save_feedback_clusters(self, assignments):
+        for a in assignments:
+            self.rows[a["feedback_id"]]["cluster_id"] = a["cluster_id"]
+            if a["signature"] is not None:
+                self.minhash[a["feedback_id"]] = a["signature"]
+            for key in a["band_hashes"]:
+                members = self.buckets.setdefault(tuple(key), {})
+                if a["cluster_id"] in members:
+                    self.bucket_conflicts += 1  # ON CONFLICT DO NOTHING
+                members.setdefault(a["cluster_id"], a["feedback_id"])
+        return len(assignments)
+
+    def clusters(self):
+        return {feedback_id: row["cluster_id"] for feedback_id, row in self.rows.items()}
+
+
+def cluster(store, **kwargs):
+    """Run assign_clusters against a MemoryStore."""
+    names = ("get_unclustered_feedback", "get_lsh_candidates", "save_feedback_clusters")
+    originals = {name: FeedbackDatabase.__dict__[name] for name in names}
+    try:
+        for name in names:
+            setattr(FeedbackDatabase, name, staticmethod(getattr(store, name)))
+        return assign_clusters(hasher=MinHasher(num_perm=64, bands=16, shingle_size=3), **kwargs)
+    finally:
+        for name, original in originals.items():
+            setattr(FeedbackDatabase, name, original)
+
+
+def test_shingles():
+    """Shingles ignore case and whitespace; short texts are one shingle"""
+    hasher = MinHasher(num_perm=64, bands=16, shingle_size=3)
+    assert hasher.shingles("Export  is\nBROKEN today") == hasher.shingles("export is broken today")
+    assert len(hasher.shingles("export is broken today")) == 2
+    assert len(hasher.shingles("too slow")) == 1
+    assert hasher.shingles("") == [] and hasher.shingles(None) == []
+
+
+def test_signatures():
+    """Signatures are deterministic and estimate Jaccard similarity"""
+    hasher = MinHasher(num_perm=128, bands=16, shingle_size=3)
+    texts = [EXPORT, EXPORT_REWORDED, LOGIN, "   "]
+    signatures, has_shingles = hasher.signatures(texts)
+    assert signatures.shape == (4, 128) and signatures.dtype == np.uint32
+    assert has_shingles.tolist() == [True, True, True, False]
+
+    again, _ = MinHasher(num_perm=128, bands=16, shingle_size=3).signatures(texts)
+    assert np.array_equal(signatures, again)
+
+    a, b = set(hasher.shingles(EXPORT)), set(hasher.shingles(EXPORT_REWORDED))
+    jaccard = len(a & b) / len(a | b)
+    similarity = estimate_similarity(signatures[0], signatures[1:3])
+    assert abs(similarity[0] - jaccard) < 0.15
+    assert similarity[1] < 0.2
+
+
+def test_band_hashes():
+    """Signatures that agree on a band share that band's bucket"""
+    hasher = MinHasher(num_perm=64, bands=16, shingle_size=3)
+    signatures, _ = hasher.signatures([EXPORT, LOGIN])
+    changed = signatures[0].copy()
+    changed[:hasher.rows_per_band] += 1  # differs in the first band only
+    hashes = hasher.band_hashes(np.stack([signatures[0], changed, signatures[1]]))
+    assert hashes.shape == (3, 16) and hashes.dtype == np.int64
+    assert hashes[0, 0] != hashes[1, 0]
+    assert np.array_equal(hashes[0, 1:], hashes[1, 1:])
+    assert not np.any(hashes[0] == hashes[2])
+
+
+def test_bands_must_divide_permutations():
+    """DEDUP_BANDS has to divide DEDUP_NUM_PERM"""
+    try:
+        MinHasher(num_perm=64, bands=10)
+    except ValueError:
+        return
+    raise AssertionError("MinHasher accepted 10 bands for 64 permutations")
+
+
+def test_assign_clusters():
+    """Rewordings join the first report's cluster; other issues start their own"""
+    store = MemoryStore().add(EXPORT, LOGIN, EXPORT_REWORDED, EXPORT.upper(), "")
+    result = cluster(store, threshold=0.5)
+    assert store.clusters() == {1: 1, 2: 2, 3: 1, 4: 1, 5: 5}
+    assert result == {"clustered": 5, "joined": 2, "new_clusters": 3}
+    # Exact duplicates and empty texts add no minhash or bucket rows
+    assert sorted(store.minhash) == [1, 2, 3]
+    assert store.bucket_conflicts == 0
+
+
+def test_assign_clusters_incremental():
+    """Later runs join clusters stored by earlier ones"""
+    store = MemoryStore().add(EXPORT, LOGIN)
+    cluster(store)
+    store.add(EXPORT_REWORDED, "Okta " + LOGIN, "Dark mode would be great for late night work")
+    result = cluster(store)
+    assert store.clusters() == {1: 1, 2: 2, 3: 1, 4: 2, 5: 5}
+    assert result == {"clustered": 3, "joined": 2, "new_clusters": 1}
+    assert cluster(store) == {"clustered": 0, "joined": 0, "new_clusters": 0}
+
+
+def test_one_representative_per_bucket():
+    """A popular issue keeps one representative per cluster and bucket"""
+    store = MemoryStore().add(*[f"{EXPORT} report {i}" for i in range(30)])
+    cluster(store, threshold=0.5)
+    assert set(store.clusters().values()) == {1}
+    assert store.bucket_conflicts == 0
+    assert all(list(members) == [1] for members in store.buckets.values())
+    # 16 bands, so at most 16 buckets per representative
+    assert len(store.buckets) <= 16 * len(store.minhash)
@@ -0,0 +1,78 @@
+"""
+SURF Slack Delivery Test
+========================
+Tests how the delivery stage parses the RetentionCriticAgent's report
+before it is committed to prioritized_output and the Slack outbox.
+
+Runs without PostgreSQL, OpenAI or Slack.
+
+Usage:
+    python -m pytest test_delivery.py
+"""
+import json
+
+from backend.delivery import parse_report
+
+
+def test_parse_report_from_text():
+    """The JSON object is found inside surrounding LLM prose"""
+    report = "Here is the assessment:\n" + json.dumps({
+        "items": [
+            {"feedback_id": 7, "title": "Checkout fails", "score": 9.5, "team": "Engineering"},
+            {"feedback_id": "12", "title": "Dark mode", "score": "4.25", "rank": 2},
+        ],
+        "total_analyzed": 40,
+    }) + "\nLet me know if you need more."
+    message = parse_report(report)
+    assert [item["feedback_id"] for item in message["items"]] == [7, 12]
+    assert [item["rank"] for item in message["items"]] == [1, 2]
+    assert message["items"][1]["score"] == 4.25
+    assert message["total_analyzed"] == 40
+
+
+def test_parse_report_coerces_fields():
+    """Structured or numeric LLM fields become the column types"""
+    message = parse_report({"items": [{
+        "id": 3.0,
+        "title": "x" * 600,
+        "score": 8,
+        "rank": "first",
+        "team": ["Product"],
+        "pre_mortem_forecast": {"arr_at_risk": 120000, "accounts": 4},
+        "action_plan": ["Reproduce", "Fix"],
+    }]})
+    item = message["items"][0]
+    assert item["feedback_id"] == 3
+    assert len(item["title"]) == 500
+    assert item["rank"] == 1
+    assert item["team"] == '["Product"]'
+    assert json.loads(item["pre_mortem_forecast"]) == {"arr_at_risk": 120000, "accounts": 4}
+    assert item["action_plan"] == {"plan": ["Reproduce", "Fix"]}
+
+
+def test_parse_report_drops_malformed_items():
+    """Items that can't be stored are dropped, the rest are kept"""
+    message = parse_report({"items": [
+        {"feedback_id": "FB-12", "title": "Prefixed id", "score": 9},
+        {"feedback_id": True, "title": "Boolean id", "score": 9},
+        {"feedback_id": -4, "title": "Negative id", "score": 9},
+        {"feedback_id": 5, "title": "Word score", "score": "high"},
+        "not an object",
+        {"feedback_id": 8, "title": "Good", "score": 6},
+    ]})
+    assert [item["feedback_id"] for item in message["items"]] == [8]
+    assert message["items"][0]["rank"] == 6
+
+
+def test_parse_report_rejects_unusable_reports():
+    """A report without valid items raises ValueError (inline fallback)"""
+    for report in (
+        "no json here",
+        {"items": []},
+        {"items": [{"feedback_id": "FB-1", "score": 1}, ["nested"]]},
+    ):
+        try:
+            parse_report(report)
+        except ValueError:
+            continue
+        raise AssertionError(f"parse_report accepted {report!r}")
@@ -0,0 +1,158 @@
+"""
+SURF File Import Test
+=====================
+Tests RecordReader, which streams CSV, JSONL and mbox exports for
+backend.connectors.files: column mapping, the byte offsets chunks are
+checkpointed at, and resuming a file from one of those offsets.
+
+Runs without PostgreSQL.
+
+Usage:
+    python -m pytest test_file_import.py
+"""
+import os
+import tempfile
+
+from backend.connectors.files import RecordReader, detect_format
+from backend.ingest import FeedbackValidationError
+
+
+def write_file(directory, name, data):
+    """Write bytes to a file in directory and return its path."""
+    path = os.path.join(directory, name)
+    with open(path, "wb") as handle:
+        handle.write(data)
+    return path
+
+
+def comparable(records):
+    """Records with validation errors replaced by their message."""
+    return [
+        (offset, str(item) if isinstance(item, Exception) else item)
+        for offset, item in records
+    ]
+
+
+def assert_resumable(reader, data):
+    """Every end offset is a record boundary that reading can resume from."""
+    records = list(reader.records())
+    for position, (end, _) in enumerate(records):
+        assert end <= len(data)
+        resumed = list(reader.records(end))
+        assert comparable(resumed) == comparable(records[position + 1:])
+    assert records[-1][0] == len(data)
+    return records
+
+
+def test_detect_format():
+    """Formats come from the file extension"""
+    assert detect_format("survey.CSV") == "csv"
+    assert detect_format("dump.ndjson") == "jsonl"
+    assert detect_format("support.mbox") == "mbox"
+    try:
+        detect_format("notes.txt")
+    except ValueError:
+        return
+    raise AssertionError("detect_format accepted .txt")
+
+
+def test_csv_mapping_and_offsets():
+    """CSV rows map to feedback items and resume at record boundaries"""
+    data = (
+        "﻿Title,Comment,Tier,Submitted\r\n"
+        "Slow,\"Dashboard is slow,\r\nreally slow\",Pro,2024-03-01T10:00:00\r\n"
+        "\r\n"
+        "Export,CSV export drops rows,Enterprise,\r\n"
+    ).encode("utf-8")
+    with tempfile.TemporaryDirectory() as directory:
+        reader = RecordReader(
+            write_file(directory, "survey.csv", data), "csv",
+            text_columns=["Title", "Comment"],
+            created_column="Submitted",
+            metadata_columns=["Tier:user_tier"],
+        )
+        assert reader.header == ["Title", "Comment", "Tier", "Submitted"]
+        records = assert_resumable(reader, data)
+
+    items = [item for _, item in records]
+    assert items[0] == {
+        "raw_text": "Slow\n\nDashboard is slow,\r\nreally slow",
+        "source": "Survey",
+        "metadata": {"user_tier": "Pro"},
+        "created_at": "2024-03-01T10:00:00",
+    }
+    assert items[1]["raw_text"] == "Export\n\nCSV export drops rows"
+    assert items[1]["created_at"] is None
+    assert len(items) == 2
+
+
+def test_csv_missing_text_column():
+    """A CSV without the text column is refused up front"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_file(directory, "survey.csv", b"Title,Tier\nSlow,Pro\n")
+        try:
+            RecordReader(path, "csv", text_columns=["Comment"])
+        except ValueError as e:
+            assert "Comment" in str(e)
+            return
+    raise AssertionError("RecordReader accepted a CSV without the text column")
+
+
+def test_jsonl_records():
+    """JSONL records keep their fields; bad lines become errors in place"""
+    data = (
+        b'{"raw_text": "hi", "created_at": "2024-01-01", "source": "Slack", "tier": "Pro"}\n'
+        b"\n"
+        b"{not json\n"
+        b'["a list"]\n'
+        b'{"raw_text": "second", "metadata": {"urgency": "high"}, "team": ""}'
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        reader = RecordReader(write_file(directory, "dump.jsonl", data), "jsonl")
+        records = assert_resumable(reader, data)
+
+    items = [item for _, item in records]
+    # created_at is a column of its own, not metadata
+    assert items[0] == {
+        "raw_text": "hi", "source": "Slack", "metadata": {"tier": "Pro"}, "created_at": "2024-01-01",
+    }
+    assert isinstance(items[1], FeedbackValidationError)
+    assert isinstance(items[2], FeedbackValidationError)
+    assert items[3]["metadata"] == {"urgency": "high"}
+    assert items[3]["source"] is None
+    assert records[0][0] == data.index(b"\n") + 1
+
+
+def test_mbox_messages():
+    """mbox messages are split on From lines and mboxrd quoting is undone"""
+    data = (
+        b"From alice@example.com Mon Mar  4 10:00:00 2024\n"
+        b"From: Alice <alice@example.com>\n"
+        b"Subject: Billing is confusing\n"
+        b"Date: Mon, 04 Mar 2024 10:00:00 +0000\n"
+        b"\n"
+        b"I was charged twice.\n"
+        b">From the invoice it looks like a proration bug.\n"
+        b"\n"
+        b"From bob@example.com Tue Mar  5 11:00:00 2024\n"
+        b"From: bob@example.com\n"
+        b"Subject: Dark mode\n"
+        b"Content-Type: text/html\n"
+        b"\n"
+        b"<p>Please add <b>dark mode</b></p>\n"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        reader = RecordReader(write_file(directory, "support.mbox", data), "mbox")
+        records = assert_resumable(reader, data)
+
+    assert records[0][0] == data.index(b"From bob@")
+    first, second = (item for _, item in records)
+    assert first["raw_text"] == (
+        "Billing is confusing\n\nI was charged twice.\n"
+        "From the invoice it looks like a proration bug."
+    )
+    assert first["source"] == "Email"
+    assert first["metadata"]["from"] == "Alice <alice@example.com>"
+    assert first["created_at"].startswith("2024-03-04T10:00:00")
+    assert "<" not in second["raw_text"] and "dark mode" in second["raw_text"]
+    assert second["created_at"] is None
@@ -0,0 +1,144 @@
+"""
+SURF Feedback Ingestion Test
+============================
+Tests the validation shared by the feedback write paths
+(backend.ingest): validate_feedback, NDJSON line parsing and splitting a
+streamed body into numbered lines.
+
+Runs without PostgreSQL.
+
+Usage:
+    python -m pytest test_ingest.py
+"""
+import asyncio
+from datetime import datetime
+
+from backend import ingest
+from backend.ingest import (
+    FeedbackValidationError,
+    iter_ndjson_lines,
+    parse_ndjson_line,
+    validate_feedback,
+)
+
+
+def rejects(item, field):
+    """Assert validate_feedback rejects item with a message naming field."""
+    try:
+        validate_feedback(item)
+    except FeedbackValidationError as e:
+        assert field in str(e), f"{e} does not name {field}"
+        return
+    raise AssertionError(f"validate_feedback accepted {item!r}")
+
+
+def test_validate_feedback():
+    """A valid item becomes (raw_text, source, metadata, created_at)"""
+    assert validate_feedback({"raw_text": "Export is broken", "source": " Slack "}) == (
+        "Export is broken", "Slack", {}, None
+    )
+    row = validate_feedback({
+        "raw_text": "SSO fails",
+        "source": "Email",
+        "metadata": {"user_tier": "Enterprise"},
+        "created_at": "2024-05-01T09:30:00",
+    })
+    assert row == ("SSO fails", "Email", {"user_tier": "Enterprise"}, datetime(2024, 5, 1, 9, 30))
+
+
+def test_validate_feedback_timezones():
+    """Timezone-aware timestamps are stored as naive UTC"""
+    for text in ("2024-05-01T09:30:00Z", "2024-05-01T11:30:00+02:00", "2024-05-01T04:30:00-05:00"):
+        created_at = validate_feedback({"raw_text": "x", "source": "Survey", "created_at": text})[3]
+        assert created_at == datetime(2024, 5, 1, 9, 30) and created_at.tzinfo is None
+
+
+def test_validate_feedback_rejects():
+    """Invalid items are rejected with the offending field named"""
+    rejects(["not", "an", "object"], "object")
+    rejects({"source": "Slack"}, "raw_text")
+    rejects({"raw_text": "   ", "source": "Slack"}, "raw_text")
+    rejects({"raw_text": 42, "source": "Slack"}, "raw_text")
+    rejects({"raw_text": "a\x00b", "source": "Slack"}, "NUL")
+    rejects({"raw_text": "x" * (ingest.MAX_TEXT_CHARS + 1), "source": "Slack"}, "raw_text")
+    rejects({"raw_text": "x", "source": ""}, "source")
+    rejects({"raw_text": "x", "source": "s" * (ingest.MAX_SOURCE_CHARS + 1)}, "source")
+    rejects({"raw_text": "x", "source": "Sl\x00ack"}, "NUL")
+    rejects({"raw_text": "x", "source": "Slack", "metadata": ["tier"]}, "metadata")
+    rejects({"raw_text": "x", "source": "Slack", "created_at": 1714555800}, "created_at")
+    rejects({"raw_text": "x", "source": "Slack", "created_at": "yesterday"}, "created_at")
+
+
+def test_validate_feedback_metadata_storable():
+    """Metadata Postgres jsonb would refuse is rejected before the COPY"""
+    for metadata in (
+        {"score": float("nan")},
+        {"score": float("inf")},
+        {"nested": [{"ratio": float("-inf")}]},
+        {"note": "a\x00b"},
+        {"bad\x00key": 1},
+        {"tags": ["ok", "\x00"]},
+    ):
+        rejects({"raw_text": "x", "source": "Slack", "metadata": metadata}, "metadata")
+    # A literal backslash-u0000 is ordinary text
+    assert validate_feedback({"raw_text": "x", "source": "Slack", "metadata": {"note": "\\u0000"}})[2] == {
+        "note": "\\u0000"
+    }
+
+
+def test_parse_ndjson_line_storable():
+    """NaN, Infinity and \\u0000 from the JSON text are rejected too"""
+    for line in (
+        b'{"raw_text": "x", "source": "Slack", "metadata": {"score": NaN}}',
+        b'{"raw_text": "x", "source": "Slack", "metadata": {"score": -Infinity}}',
+        b'{"raw_text": "x", "source": "Slack", "metadata": {"note": "a\\u0000b"}}',
+        b'{"raw_text": "x", "source": "Sl\\u0000ack"}',
+    ):
+        try:
+            parse_ndjson_line(line)
+        except FeedbackValidationError:
+            continue
+        raise AssertionError(f"parse_ndjson_line accepted {line!r}")
+
+
+def test_parse_ndjson_line():
+    """NDJSON lines are decoded and validated"""
+    assert parse_ndjson_line(b'{"raw_text": "hi", "source": "Slack"}') == ("hi", "Slack", {}, None)
+    for line in (b"{broken", b"\xff\xfe", b'"just a string"'):
+        try:
+            parse_ndjson_line(line)
+        except FeedbackValidationError:
+            continue
+        raise AssertionError(f"parse_ndjson_line accepted {line!r}")
+
+
+def collect_lines(chunks):
+    """Run iter_ndjson_lines over a list of byte chunks."""
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [item async for item in iter_ndjson_lines(stream())]
+
+    return asyncio.run(run())
+
+
+def test_iter_ndjson_lines():
+    """Lines split across chunks are joined; blank lines keep their numbers"""
+    body = b'{"a": 1}\n\n{"b": 2}\r\n   \n{"c": 3}'
+    expected = [(1, b'{"a": 1}'), (3, b'{"b": 2}\r'), (5, b'{"c": 3}')]
+    assert collect_lines([body]) == expected
+    assert collect_lines([body[i:i + 3] for i in range(0, len(body), 3)]) == expected
+    assert collect_lines([]) == []
+
+
+def test_iter_ndjson_lines_too_long():
+    """A line longer than INGEST_MAX_LINE_BYTES is refused"""
+    limit = ingest.MAX_LINE_BYTES
+    try:
+        collect_lines([b'{"a": 1}\n', b"x" * (limit + 1)])
+    except FeedbackValidationError as e:
+        assert "line 2" in str(e)
+        return
+    raise AssertionError("iter_ndjson_lines accepted an over-long line")
@@ -0,0 +1,130 @@
+"""
+SURF Scoring Engine Test
+========================
+Tests the deterministic Severity-Volume scorer: keyword severity bands,
+the rubric arithmetic, report-volume bonuses and which rows are left for
+the LLM to review.
+
+Runs without PostgreSQL or OpenAI.
+
+Usage:
+    python -m pytest test_scoring.py
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.scoring import BANDS, SeverityVolumeScorer, detect_band
+
+BAND = {name: code for code, name in enumerate(BANDS)}
+
+
+def test_detect_band():
+    """Keywords, prefixes and phrases map to the most severe band"""
+    assert detect_band("Passwords are stored in plain text!") == (BAND["security"], False)
+    assert detect_band("The dashboard takes forever") == (BAND["performance"], False)
+    assert detect_band("App keeps CRASHING on login") == (BAND["bug"], False)
+    # Performance and bug are both Bug-category bands, so not ambiguous
+    assert detect_band("Reports are slow and sometimes fail") == (BAND["performance"], False)
+    assert detect_band("") == (-1, False)
+    assert detect_band(None) == (-1, False)
+    assert detect_band("Thanks, great product") == (-1, False)
+
+
+def test_detect_band_ambiguous():
+    """Keywords from more than one category are flagged as ambiguous"""
+    assert detect_band("Please add dark mode, the layout is confusing") == (BAND["feature"], True)
+    # Asking twice gives the same answer once the words are cached
+    assert detect_band("Please add dark mode, the layout is confusing") == (BAND["feature"], True)
+
+
+def test_score_arrays():
+    """Scores follow the weighted rubric on a 0-10 scale"""
+    scorer = SeverityVolumeScorer(severity_weight=0.6, volume_weight=0.4)
+    scores = scorer.score_arrays(
+        np.array([BAND["security"], BAND["other"], BAND["ux"]]),
+        np.array([2.0, 0.0, 1.0]),
+        np.array([2.0, 0.0, 0.5]),
+    )
+    # security 9.5, full volume 10; other 4.0, no volume; ux 5.0, 1.5/4 volume
+    assert scores.tolist() == [9.7, 2.4, round(0.6 * 5.0 + 0.4 * 3.75, 2)]
+
+
+def test_report_volume():
+    """Report count adds a log bonus that saturates at 10"""
+    scorer = SeverityVolumeScorer()
+    volume = scorer.report_volume(np.array([0, 1, scorer.cluster_saturation, 10_000]))
+    assert volume[0] == 0.0 and volume[1] == 0.0
+    assert abs(volume[2] - 10.0) < 1e-9 and volume[3] == 10.0
+    with_reports = scorer.score_arrays(
+        np.array([BAND["bug"]] * 2), np.zeros(2), np.zeros(2), np.array([1, 10])
+    )
+    assert with_reports[1] > with_reports[0]
+
+
+def test_score_batch():
+    """Rows get a category, a score and a confidence flag"""
+    scorer = SeverityVolumeScorer(severity_weight=0.6, volume_weight=0.4)
+    rows = [
+        {"id": 1, "raw_text": "Passwords leaked in logs",
+         "metadata": {"user_tier": "Enterprise", "urgency": "critical"}},
+        # JSONB may arrive as text
+        {"id": 2, "raw_text": "Please add an export",
+         "metadata": json.dumps({"user_tier": "Free", "urgency": "low"})},
+        # A known category wins over keywords from another category
+        {"id": 3, "raw_text": "The app crashes", "category": "UX",
+         "metadata": {"user_tier": "Pro", "urgency": "high"}},
+        # Missing metadata or ambiguous text needs a review
+        {"id": 4, "raw_text": "The app crashes", "metadata": None},
+        {"id": 5, "raw_text": "Please add dark mode, the layout is confusing",
+         "metadata": {"user_tier": "Pro", "urgency": "low"}},
+    ]
+    results = scorer.score_batch(rows)
+    assert [r["feedback_id"] for r in results] == [1, 2, 3, 4, 5]
+    assert [r["category"] for r in results] == ["Bug", "Feature", "UX", "Bug", "Feature"]
+    assert [r["confident"] for r in results] == [True, True, True, False, False]
+    assert results[0]["score"] == 9.7
+    assert results[2]["score"] == round(0.6 * 5.0 + 0.4 * 5.0, 2)
+
+    override = scorer.score_batch(rows[:1], categories=["Other"])
+    assert override[0]["category"] == "Other"
+    assert scorer.score_batch([]) == []
+
+
+def test_score_batch_matches_single_rows():
+    """Scoring a batch gives the same results as scoring rows one by one"""
+    scorer = SeverityVolumeScorer()
+    texts = ["slow sync", "login error", "love the new ui", "data breach", "hello", "please add sso"]
+    tiers = ["Enterprise", "Pro", "Free", "unknown"]
+    urgencies = ["critical", "high", "medium", "low", None]
+    rows = [
+        {
+            "id": i,
+            "raw_text": texts[i % len(texts)],
+            "category": [None, "Bug", "Feature"][i % 3],
+            "metadata": {"user_tier": tiers[i % len(tiers)], "urgency": urgencies[i % len(urgencies)]},
+        }
+        for i in range(60)
+    ]
+    sizes = [1 + (i * 7) % 40 for i in range(len(rows))]
+    batch = scorer.score_batch(rows, cluster_sizes=sizes)
+    single = [scorer.score_batch([row], cluster_sizes=[size])[0] for row, size in zip(rows, sizes)]
+    assert batch == single
+
+
+def test_score_batch_threads():
+    """Concurrent batches learning new words agree with a serial run"""
+    scorer = SeverityVolumeScorer()
+    batches = [
+        [
+            {"id": i, "raw_text": f"lagging{b}x{i} crashworthy{b} requesting{i} word{b}y{i}",
+             "metadata": {"user_tier": "Pro", "urgency": "high"}}
+            for i in range(200)
+        ]
+        for b in range(8)
+    ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        concurrent = list(pool.map(scorer.score_batch, batches))
+    assert concurrent == [scorer.score_batch(batch) for batch in batches]
+    assert all(r["category"] == "Bug" and not r["confident"] for batch in concurrent for r in batch)